@@ -0,0 +1,115 @@
+# benchmark_serialization.py
+
+# necessary imports
+import argparse
+import datetime
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+# Allow the shared modules in main/ to be imported when running this file as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from main import serialization
+
+"""
+    This script compares the time to serialize the metadata of the annotations corpus with the standard library
+    json module (json.dumps(indent=2) with a default function, as the chatbot did before) and with main.serialization,
+    with orjson and with its standard library fallback:
+        python analysis/benchmark_serialization.py --repeat 20
+    Each annotation is serialized as in the chat history (a string) and saved to a file (as in the annotations folder).
+    The dates of the annotations are parsed to datetime objects first, as they are in the final metadata.
+"""
+
+ANNOTATIONS_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "annotations")
+DATE_PROPERTIES = ("dateCreated", "dateModified", "datePublished")
+
+
+def json_serial(obj):
+    """Serialize dates the same way as MetadataManager.json_serial."""
+    if isinstance(obj, datetime.datetime):
+        return obj.strftime("%Y-%m-%d")
+
+
+def load_annotations(folder):
+    """Load the annotations, with their dates as datetime objects."""
+    annotations = []
+    for path in sorted(glob.glob(os.path.join(folder, "*.json"))):
+        with open(path, "r", encoding="utf-8") as file:
+            metadata = json.load(file)
+        for key in DATE_PROPERTIES:
+            try:
+                metadata[key] = datetime.datetime.fromisoformat(metadata[key])
+            except (KeyError, TypeError, ValueError):
+                pass
+        annotations.append(metadata)
+    return annotations
+
+
+def stdlib_render(metadata):
+    return json.dumps(metadata, indent=2, default=json_serial)
+
+
+def stdlib_save(metadata, path):
+    with open(path, "w") as file:
+        json.dump(metadata, file, indent=2, default=json_serial)
+
+
+def serialization_render(metadata):
+    return serialization.dumps(metadata, indent=True, default=json_serial)
+
+
+def serialization_save(metadata, path):
+    with open(path, "wb") as file:
+        file.write(serialization.dumps_bytes(metadata, indent=True, default=json_serial, ensure_ascii=True))
+
+
+def time_per_annotation(function, annotations, repeat):
+    """Return the average time in microseconds to run the function for one annotation."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for metadata in annotations:
+            function(metadata)
+    return (time.perf_counter() - start) / (repeat * len(annotations)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the JSON serialization of the annotations corpus.")
+    parser.add_argument("--folder", default=ANNOTATIONS_FOLDER, help="The folder of the annotations.")
+    parser.add_argument("--repeat", type=int, default=20, help="The number of times every annotation is serialized.")
+    args = parser.parse_args()
+
+    annotations = load_annotations(args.folder)
+    if not annotations:
+        print(f"No annotations found in {args.folder}.")
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "metadata.json")
+        results = {"json (before)": (
+            time_per_annotation(stdlib_render, annotations, args.repeat),
+            time_per_annotation(lambda metadata: stdlib_save(metadata, path), annotations, args.repeat),
+        )}
+        if serialization.orjson is not None:
+            results["serialization (orjson)"] = (
+                time_per_annotation(serialization_render, annotations, args.repeat),
+                time_per_annotation(lambda metadata: serialization_save(metadata, path), annotations, args.repeat),
+            )
+        with patch.object(serialization, "orjson", None):
+            results["serialization (json fallback)"] = (
+                time_per_annotation(serialization_render, annotations, args.repeat),
+                time_per_annotation(lambda metadata: serialization_save(metadata, path), annotations, args.repeat),
+            )
+
+    print(f"{len(annotations)} annotations, {args.repeat} repeats, microseconds per annotation")
+    print(f"{'':<32}{'render':>10}{'save':>10}")
+    baseline_render, baseline_save = results["json (before)"]
+    for name, (render, save) in results.items():
+        print(f"{name:<32}{render:>10.1f}{save:>10.1f}   ({baseline_render / render:.1f}x / {baseline_save / save:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,15 @@
 # necessary imports
 import json
 import os
+import sys
 from textblob import TextBlob
 import spacy
 import csv
 
+# Allow the shared modules in main/ to be imported when running this file as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from main.nlp_cache import doc_cache
+
 # Load the English NLP model
 nlp = spacy.load("en_core_web_md")
 
@@ -92,9 +97,7 @@ def get_char_length(text):
 
 def get_word_count(text):
     """Returns the number of meaningful words in the text."""
-    doc = nlp(text)
-    words = [token.text for token in doc if token.is_alpha]  
-    return len(words)
+    return doc_cache.get_features(nlp, text)["alpha_word_count"]
 
 def evaluate_description_subjectivity(description):
     """Evaluate description subjectivity using TextBlob."""
@@ -110,25 +113,34 @@ def evaluate_task_quality(task):
     if task == "":
         return 0.0, 0.0
     
-    doc = nlp(task)
+    features = doc_cache.get_features(nlp, task)
 
-    # Extract action verbs 
-    action_verbs = [token for token in doc if token.pos_ == "VERB"]
-    # Extract named entities 
-    entities = [ent.text for ent in doc.ents]
+    # Count action verbs and named entities
+    action_verbs = features["verb_count"]
+    entities = features["entity_count"]
     
     # Get total number of words (tokens) in the task description
-    total_tokens = len([token for token in doc if not token.is_stop and not token.is_punct])
+    total_tokens = features["content_token_count"]
 
     # Normalize the counts by total_tokens to get values between 0 and 1
     # Actionability score (based on verbs)
-    actionability_score = len(action_verbs) / total_tokens if total_tokens > 0 else 0.0
+    actionability_score = action_verbs / total_tokens if total_tokens > 0 else 0.0
     
     # Specificity score (based on entities)
-    specificity_score = len(entities) / total_tokens if total_tokens > 0 else 0.0
+    specificity_score = entities / total_tokens if total_tokens > 0 else 0.0
 
     return actionability_score, specificity_score
 
+def get_vector_similarity(text_a, features_a, text_b, features_b):
+    """Cosine similarity of two cached document vectors, matching spaCy's Doc.similarity."""
+    # Like Doc.similarity, identical texts are fully similar, even if they have no vector (e.g. unknown words)
+    if text_a == text_b:
+        return 1.0
+    if not features_a["vector_norm"] or not features_b["vector_norm"]:
+        return 0.0
+    dot_product = float((features_a["vector"] * features_b["vector"]).sum())
+    return dot_product / (features_a["vector_norm"] * features_b["vector_norm"])
+
 def evaluate_keyword_similarity(keywords):
     """Check if keywords are too similar (not diverse)."""
     if keywords == "":
@@ -136,10 +148,13 @@ def evaluate_keyword_similarity(keywords):
     
     keyword_list = [kw.strip() for kw in keywords.split(',') if kw.strip()]
     
+    # Each keyword is parsed once, instead of once for every pair it is part of
+    keyword_features = [doc_cache.get_features(nlp, keyword) for keyword in keyword_list]
+
     similarities = []
-    for i in range(len(keyword_list)):
-        for j in range(i + 1, len(keyword_list)):
-            sim = nlp(keyword_list[i]).similarity(nlp(keyword_list[j]))
+    for i in range(len(keyword_features)):
+        for j in range(i + 1, len(keyword_features)):
+            sim = get_vector_similarity(keyword_list[i], keyword_features[i], keyword_list[j], keyword_features[j])
             similarities.append(sim)
     
     avg_similarity = sum(similarities) / len(similarities) if similarities else 0
@@ -296,17 +311,6 @@ def evaluate_datasets(hf_metadata_folder, chatbot_metadata_folder):
     # Return the evaluation results
     return evaluation_results
 
-hf_metadata_folder = "hf_metadata"
-chatbot_metadata_folder = "annotations"
-
-results = evaluate_datasets(hf_metadata_folder, chatbot_metadata_folder)
-
-# Save results to a JSON file
-output_file = "analysis/metadata_evaluation.json"
-with open(output_file, "w") as file:
-    json.dump(results, file, indent=4)
-
-print(f"Results saved to {output_file}")
 
 def calculate_averages(results):
     """Calculate percentage averages for HF, Chatbot, and Comparison metrics."""
@@ -403,9 +407,29 @@ def save_to_csv(hf_averages, chatbot_averages, comparison_averages, output_file)
 
     print(f"Averages saved to {output_file}")
 
-# Calculate averages
-hf_averages, chatbot_averages, comparison_averages = calculate_averages(results)
+def main():
+    """Evaluate the metadata and save the results and their averages."""
+    hf_metadata_folder = "hf_metadata"
+    chatbot_metadata_folder = "annotations"
+
+    results = evaluate_datasets(hf_metadata_folder, chatbot_metadata_folder)
+
+    # Save results to a JSON file
+    output_file = "analysis/metadata_evaluation.json"
+    with open(output_file, "w") as file:
+        json.dump(results, file, indent=4)
+
+    print(f"Results saved to {output_file}")
+    print(f"spaCy feature cache statistics: {doc_cache.get_stats()}")
+
+    # Calculate averages
+    hf_averages, chatbot_averages, comparison_averages = calculate_averages(results)
+
+    # Save averages to a CSV file
+    csv_output_file = "analysis/evaluation_averages.csv"
+    save_to_csv(hf_averages, chatbot_averages, comparison_averages, csv_output_file)
+
 
-# Save averages to a CSV file
-csv_output_file = "analysis/evaluation_averages.csv"
-save_to_csv(hf_averages, chatbot_averages, comparison_averages, csv_output_file)
\ No newline at end of file
+# Runs the script
+if __name__ == "__main__":
+    main()
\ No newline at end of file
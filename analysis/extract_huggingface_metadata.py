@@ -1,29 +1,71 @@
-import os
+import argparse
 import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
-from huggingface_hub import HfApi
+import requests
+from huggingface_hub.utils import HfHubHTTPError
 
-# Define the Hugging Face API
-api = HfApi()
+# Allow the shared modules in main/ to be imported when running this file as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from main.hub_client import fetch_dataset_info
 
 # Define the output folder
 OUTPUT_FOLDER = "hf_metadata"
-os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
+# Status codes that mean the request can be retried
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class RateLimiter:
+    """Limit the rate of requests to each host, shared by all threads."""
+
+    def __init__(self, requests_per_second, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self.next_request_time = {}  # Maps a host to the earliest time of its next request
+        self.lock = threading.Lock()
+        self.clock = clock  # Injectable, so tests do not have to wait
+        self.sleep = sleep
+
+    def wait(self, host="huggingface.co"):
+        """Wait until a request to the host is allowed."""
+        with self.lock:
+            now = self.clock()
+            request_time = max(now, self.next_request_time.get(host, now))
+            self.next_request_time[host] = request_time + self.interval
+        if request_time > now:
+            self.sleep(request_time - now)
 
-def fetch_hf_metadata(dataset_id_to_find):
+
+def fetch_hf_metadata(dataset_id_to_find, rate_limiter=None, retries=3, backoff=1.0):
     """Fetch metadata from Hugging Face Hub for a given dataset ID."""
 
     try:
-        # Fetch the dataset details using the Hugging Face Hub API
-        api = HfApi() # Hugging Face API
-        found_dataset = list(api.list_datasets(dataset_name={dataset_id_to_find}, limit=1)) # Search for the dataset by ID
+        # Fetch the dataset details with an exact lookup, retrying rate limits and server errors
+        for attempt in range(retries + 1):
+            try:
+                if rate_limiter:
+                    rate_limiter.wait()
+                found_dataset = fetch_dataset_info(dataset_id_to_find)
+                break
+            except (HfHubHTTPError, requests.ConnectionError, requests.Timeout) as e:
+                response = getattr(e, "response", None)
+                status_code = getattr(response, "status_code", None)
+                if attempt == retries or (isinstance(e, HfHubHTTPError) and status_code not in RETRY_STATUS_CODES):
+                    raise
+                # Use the wait time requested by the Hub if there is one
+                retry_after = response.headers.get("Retry-After") if response is not None else None
+                time.sleep(float(retry_after) if retry_after and retry_after.isdigit() else backoff * 2 ** attempt)
+
         # Check if the dataset was found
-        if not found_dataset:
+        if found_dataset is None:
             # If no dataset is found, return None and False indicating failure
             print(f"Dataset '{dataset_id_to_find}' not found.")
             return None, False
-        found_dataset = found_dataset[0] # Get the first dataset from the list
 
         hf_data = {} # dictionary to store data
         # Extract relevant metadata fields
@@ -31,9 +73,9 @@ def fetch_hf_metadata(dataset_id_to_find):
         lisence = ""
         tasks = []
         modalities = []
-        languages = [] 
+        languages = []
         # Extract tags and populate the lists and variable
-        for tag in found_dataset.tags:
+        for tag in found_dataset.tags or []:
             if tag.startswith("license:"):
                 lisence = tag.split(":", 1)[1]
             elif tag.startswith("task_categories:"):
@@ -68,31 +110,79 @@ def fetch_hf_metadata(dataset_id_to_find):
         return {'error': str(e)}, False
 
 
-def save_metadata(metadata):
+def get_metadata_path(dataset_name, output_folder=OUTPUT_FOLDER):
+    """Get the path of the JSON file for a dataset."""
+    return os.path.join(output_folder, f"{dataset_name.replace('/', '_')}_hf.json")
+
+
+def is_fresh(file_path, max_age_days):
+    """Check if a metadata file exists and is younger than the maximum age."""
+    return os.path.exists(file_path) and time.time() - os.path.getmtime(file_path) < max_age_days * 24 * 60 * 60
+
+
+def save_metadata(metadata, output_folder=OUTPUT_FOLDER):
     """Save metadata to a JSON file."""
-    dataset_name = metadata["name"].replace("/", "_")
-    file_path = os.path.join(OUTPUT_FOLDER, f"{dataset_name}_hf.json")
-    
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(metadata, f, indent=2)
-    
+    file_path = get_metadata_path(metadata["name"], output_folder)
+
+    # Write to a temporary file and rename it, so an interrupted run never leaves a partial file
+    file_descriptor, temp_path = tempfile.mkstemp(dir=output_folder, suffix=".tmp")
+    try:
+        with os.fdopen(file_descriptor, "w", encoding="utf-8") as f:
+            json.dump(metadata, f, indent=2)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
     print(f"Saved metadata: {file_path}")
 
-def process_csv(csv_path):
-    """Read CSV, fetch metadata, and save JSON."""
+def process_csv(csv_path, output_folder=OUTPUT_FOLDER, workers=8, requests_per_second=10.0, retries=3, max_age_days=7.0, force=False):
+    """Read CSV, fetch metadata concurrently, and save JSON. Returns the number of datasets saved, skipped and failed."""
     df = pd.read_csv(csv_path)
-    
+
     if "Name" not in df.columns:
         print("Error: 'Name' column not found in CSV.")
-        return
-    
+        return None
+
+    os.makedirs(output_folder, exist_ok=True)
     dataset_names = df["Name"].dropna().unique()
-    
-    for dataset_name in dataset_names:
-        metadata, success = fetch_hf_metadata(dataset_name)
-        if success:
-            save_metadata(metadata)
+
+    # Skip datasets whose metadata was extracted recently
+    to_fetch = [name for name in dataset_names if force or not is_fresh(get_metadata_path(name, output_folder), max_age_days)]
+    counts = {"saved": 0, "skipped": len(dataset_names) - len(to_fetch), "failed": 0}
+
+    rate_limiter = RateLimiter(requests_per_second)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(fetch_hf_metadata, name, rate_limiter, retries): name for name in to_fetch}
+        for future in as_completed(futures):
+            metadata, success = future.result()
+            if success:
+                save_metadata(metadata, output_folder)
+                counts["saved"] += 1
+            else:
+                if metadata:
+                    print(f"Error fetching '{futures[future]}': {metadata['error']}")
+                counts["failed"] += 1
+
+    print(f"Saved {counts['saved']}, skipped {counts['skipped']} fresh and failed {counts['failed']} datasets.")
+    return counts
+
+
+def main():
+    """Parse the command line arguments and run the extraction."""
+    parser = argparse.ArgumentParser(description="Extract Hugging Face metadata for the datasets in a CSV file.")
+    parser.add_argument("csv_path", nargs="?", default="dataset_selection/huggingface_datasets.csv", help="CSV file with a 'Name' column.")
+    parser.add_argument("--output-folder", default=OUTPUT_FOLDER, help="Folder to save the JSON files to.")
+    parser.add_argument("--workers", type=int, default=8, help="Number of concurrent requests.")
+    parser.add_argument("--requests-per-second", type=float, default=10.0, help="Maximum requests per second to the Hub.")
+    parser.add_argument("--retries", type=int, default=3, help="Number of retries for rate limits and server errors.")
+    parser.add_argument("--max-age-days", type=float, default=7.0, help="Skip datasets whose JSON file is younger than this.")
+    parser.add_argument("--force", action="store_true", help="Fetch every dataset, even if its JSON file is fresh.")
+    args = parser.parse_args()
+
+    process_csv(args.csv_path, args.output_folder, args.workers, args.requests_per_second, args.retries, args.max_age_days, args.force)
+
 
 # Runs the script
-csv_file_path = "dataset_selection/huggingface_datasets.csv"
-process_csv(csv_file_path)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,781 @@
+# annotation_index.py
+
+# necessary imports
+import argparse
+import collections
+import heapq
+import itertools
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Tuple
+import numpy as np
+from .constants import ANNOTATIONS_DIRECTORY, ANNOTATION_INDEX_PATH, ANNOTATION_SEARCH_LIMIT, NEAR_DUPLICATE_THRESHOLD
+from .near_duplicates import band_buckets, estimate_similarity, minhash_signature
+from .serialization import dumps, loads
+
+"""
+    This module contains an index of the annotations folder stored in SQLite, so annotations can be found by their
+    license, task, modality, language, keywords or dates without opening every file.
+    Every annotation is stored as JSON, and the values of the indexed attributes are stored in a separate table with
+    an index on (attribute, value), so a query is an index lookup instead of a scan of the folder. Attributes that
+    hold comma-separated lists (e.g. "text-generation, question-answering") are indexed by each of their items.
+
+    The name, keywords and description of every annotation are also indexed for full-text search (SQLite FTS5), and
+    search results come with the counts of their tasks, modalities and licenses, to narrow the search down (facets).
+
+    The MinHash signatures of the description and the citation of every annotation are stored with it, with the LSH
+    buckets of each signature, so annotations with near-identical descriptions or citations are found by looking up
+    the annotations in the same buckets instead of comparing every pair (see main/near_duplicates.py).
+
+    Files saved by the chatbot are added to the index when they are saved. Files added to the folder in other ways
+    are imported by a refresh, which only reads the files that changed since the last refresh:
+        python -m main.annotation_index refresh
+        python -m main.annotation_index query --license mit --modality text --date-from 2024-01-01
+        python -m main.annotation_index facets task
+        python -m main.annotation_index search "question answering" --modality text
+        python -m main.annotation_index duplicates --threshold 0.8
+"""
+
+# Maps every indexed attribute to its Croissant property and whether it holds a comma-separated list
+INDEXED_ATTRIBUTES = {
+    "name": ("name", False),
+    "creators": ("creator", True),
+    "license": ("license", True),
+    "publisher": ("publisher", False),
+    "version": ("version", False),
+    "keywords": ("keywords", True),
+    "in_language": ("inLanguage", True),
+    "task": ("task", True),
+    "modality": ("modality", True),
+    "date_created": ("dateCreated", False),
+    "date_modified": ("dateModified", False),
+    "date_published": ("datePublished", False),
+}
+
+DATE_ATTRIBUTES = ("date_created", "date_modified", "date_published")
+
+# Attributes whose values are counted for the results of a search
+SEARCH_FACET_ATTRIBUTES = ("task", "modality", "license")
+
+# Weights of the name, keywords and description columns when search results are ranked
+SEARCH_COLUMN_WEIGHTS = (10.0, 5.0, 1.0)
+
+# Maps every field compared for near-duplicates to its Croissant property
+NEAR_DUPLICATE_FIELDS = {"description": "description", "citation": "citeAs"}
+
+# The version of the database schema. The index only mirrors the annotations folder, so an index with another
+# version is dropped and imported again.
+SCHEMA_VERSION = 3
+
+
+def extract_index_values(metadata: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """
+    Extract the values of the indexed attributes from an annotation.
+
+    Args:
+        metadata: The Croissant metadata of the annotation.
+
+    Returns:
+        A list of (attribute, value) Tuples, without duplicates.
+    """
+    values = []
+    for attribute, (croissant_property, is_list) in INDEXED_ATTRIBUTES.items():
+        value = metadata.get(croissant_property)
+        items = value if isinstance(value, list) else [value]
+        for item in items:
+            if isinstance(item, dict):
+                item = item.get("name")  # E.g. a creator given as a Person or an Organization
+            if item is None or item == "":
+                continue
+            item = str(item)
+            if attribute in DATE_ATTRIBUTES:
+                item = item[:10]  # Dates are compared as YYYY-MM-DD
+            parts = item.split(",") if is_list else [item]
+            values.extend((attribute, part.strip()) for part in parts if part.strip())
+    return list(dict.fromkeys((attribute, value.lower()) for attribute, value in values))
+
+
+def extract_search_text(metadata: Dict[str, Any]) -> Tuple[str, str, str]:
+    """
+    Extract the text of an annotation that is indexed for full-text search.
+
+    Args:
+        metadata: The Croissant metadata of the annotation.
+
+    Returns:
+        A Tuple containing the name, keywords and description of the annotation.
+    """
+    return to_text(metadata.get("name")), to_text(metadata.get("keywords")), to_text(metadata.get("description"))
+
+
+def to_text(value: Any) -> str:
+    """
+    Turn the value of a Croissant property into text.
+
+    Args:
+        value: The value, a list of values or None.
+
+    Returns:
+        The text, with the items of a list separated by commas.
+    """
+    if isinstance(value, list):
+        return ", ".join(to_text(item) for item in value)
+    return "" if value is None else str(value)
+
+
+def build_match_query(text: str) -> str | None:
+    """
+    Turn the words of a search into an FTS5 query that matches annotations containing all of them.
+    The last word also matches longer words, so results appear while a word is being typed.
+
+    Args:
+        text: The search text.
+
+    Returns:
+        The FTS5 query, or None if the text contains no words.
+    """
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return None
+    return " ".join([f'"{word}"' for word in words[:-1]] + [f'"{words[-1]}"*'])
+
+
+class AnnotationIndex:
+    """A thread-safe SQLite index of the annotations folder."""
+
+    def __init__(self, db_path: str = ANNOTATION_INDEX_PATH):
+        self.db_path = db_path
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        # A busy timeout lets several worker processes write to the same database
+        self._connection = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        self._facet_values = None  # The facet values of every annotation, read on the first search
+        self._facet_ids = None
+        self._facet_data_version = None
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            # Searches read many pages of the index, so more of them are kept in memory than the default 2 MB
+            self._connection.execute("PRAGMA cache_size = -65536")
+            if self._connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                for table in ("annotations", "annotation_values", "annotation_text", "annotation_signatures", "annotation_buckets"):
+                    self._connection.execute(f"DROP TABLE IF EXISTS {table}")
+                self._connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            # The id is the rowid of the annotation in the full-text index
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS annotations (
+                    id INTEGER PRIMARY KEY,
+                    filename TEXT NOT NULL UNIQUE,
+                    name TEXT,
+                    metadata TEXT NOT NULL,
+                    file_mtime_ns INTEGER,
+                    file_size INTEGER,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS annotation_values (
+                    attribute TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    annotation_id INTEGER NOT NULL,
+                    PRIMARY KEY (attribute, value, annotation_id)
+                ) WITHOUT ROWID
+                """
+            )
+            # Removing an annotation looks its values up by annotation
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS annotation_values_by_annotation ON annotation_values (annotation_id, attribute)"
+            )
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS annotation_signatures (
+                    annotation_id INTEGER NOT NULL,
+                    field TEXT NOT NULL,
+                    signature BLOB NOT NULL,
+                    PRIMARY KEY (annotation_id, field)
+                ) WITHOUT ROWID
+                """
+            )
+            # Near-duplicates are found by looking up the annotations in the same LSH buckets
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS annotation_buckets (
+                    field TEXT NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    annotation_id INTEGER NOT NULL,
+                    PRIMARY KEY (field, bucket, annotation_id)
+                ) WITHOUT ROWID
+                """
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS annotation_buckets_by_annotation ON annotation_buckets (annotation_id)"
+            )
+            self._connection.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS annotation_text USING fts5(name, keywords, description, tokenize = 'porter unicode61')"
+            )
+
+    def upsert(self, filename: str, metadata: Dict[str, Any], filepath: str | None = None):
+        """
+        Add or replace an annotation.
+
+        Args:
+            filename: The name of the annotation file.
+            metadata: The Croissant metadata of the annotation.
+            filepath: The path of the saved file, so a refresh knows it is up to date.
+        """
+        self.upsert_many([(filename, metadata, filepath)])
+
+    def upsert_many(self, rows: Iterable[Tuple[str, Dict[str, Any], str | None]]) -> int:
+        """
+        Add or replace many annotations in one transaction.
+
+        Args:
+            rows: Tuples of (filename, metadata, file path).
+
+        Returns:
+            The number of annotations written.
+        """
+        count = 0
+        with self._lock, self._connection:
+            try:
+                for filename, metadata, filepath in rows:
+                    # Dates are stored as YYYY-MM-DD, the same way as in the saved files
+                    metadata = loads(dumps(metadata))
+                    stat = os.stat(filepath) if filepath else None
+                    self._remove_annotation(filename)
+                    cursor = self._connection.execute(
+                        """
+                        INSERT INTO annotations (filename, name, metadata, file_mtime_ns, file_size, updated_at)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        """,
+                        (filename, metadata.get("name"), dumps(metadata), stat.st_mtime_ns if stat else None,
+                         stat.st_size if stat else None, time.time()),
+                    )
+                    self._connection.execute(
+                        "INSERT INTO annotation_text (rowid, name, keywords, description) VALUES (?, ?, ?, ?)",
+                        (cursor.lastrowid, *extract_search_text(metadata)),
+                    )
+                    for field, croissant_property in NEAR_DUPLICATE_FIELDS.items():
+                        signature = minhash_signature(to_text(metadata.get(croissant_property)))
+                        if signature is None:
+                            continue
+                        self._connection.execute(
+                            "INSERT INTO annotation_signatures (annotation_id, field, signature) VALUES (?, ?, ?)",
+                            (cursor.lastrowid, field, signature.tobytes()),
+                        )
+                        self._connection.executemany(
+                            "INSERT OR IGNORE INTO annotation_buckets (field, bucket, annotation_id) VALUES (?, ?, ?)",
+                            [(field, bucket, cursor.lastrowid) for bucket in band_buckets(signature)],
+                        )
+                    index_values = extract_index_values(metadata)
+                    self._connection.executemany(
+                        "INSERT INTO annotation_values (attribute, value, annotation_id) VALUES (?, ?, ?)",
+                        [(attribute, value, cursor.lastrowid) for attribute, value in index_values],
+                    )
+                    if self._facet_values is not None:
+                        pairs = tuple((attribute, value) for attribute, value in index_values if attribute in SEARCH_FACET_ATTRIBUTES)
+                        self._facet_values[cursor.lastrowid] = pairs
+                        for pair in pairs:
+                            self._facet_ids.setdefault(pair, set()).add(cursor.lastrowid)
+                    count += 1
+            except BaseException:
+                self._facet_values = None  # The transaction is rolled back, so the facet values are read again
+                raise
+        return count
+
+    def remove(self, filenames: Iterable[str]):
+        """
+        Remove annotations from the index.
+
+        Args:
+            filenames: The names of the annotation files.
+        """
+        with self._lock, self._connection:
+            for filename in filenames:
+                self._remove_annotation(filename)
+
+    def _remove_annotation(self, filename: str):
+        """
+        Remove an annotation, its values and its text. The caller must hold the lock.
+
+        Args:
+            filename: The name of the annotation file.
+        """
+        row = self._connection.execute("SELECT id FROM annotations WHERE filename = ?", (filename,)).fetchone()
+        if row:
+            if self._facet_values is not None:
+                for pair in self._facet_values.pop(row[0], ()):
+                    self._facet_ids[pair].discard(row[0])
+            self._connection.execute("DELETE FROM annotation_text WHERE rowid = ?", row)
+            self._connection.execute("DELETE FROM annotation_values WHERE annotation_id = ?", row)
+            self._connection.execute("DELETE FROM annotation_signatures WHERE annotation_id = ?", row)
+            self._connection.execute("DELETE FROM annotation_buckets WHERE annotation_id = ?", row)
+            self._connection.execute("DELETE FROM annotations WHERE id = ?", row)
+
+    def get(self, filename: str) -> Dict[str, Any] | None:
+        """
+        Get an annotation.
+
+        Args:
+            filename: The name of the annotation file.
+
+        Returns:
+            The Croissant metadata of the annotation, or None if it is not in the index.
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT metadata FROM annotations WHERE filename = ?", (filename,)).fetchone()
+        return loads(row[0]) if row else None
+
+    def query(self, filters: Dict[str, str | List[str]] | None = None, date_attribute: str = "date_published",
+              date_from: str | None = None, date_to: str | None = None, limit: int | None = None) -> List[Dict[str, Any]]:
+        """
+        Find the annotations that match all filters.
+
+        Args:
+            filters: A Dictionary mapping indexed attributes to a value, or to a list of values of which one must match.
+                Values are matched case-insensitively against the whole value or one item of a comma-separated list.
+            date_attribute: The date attribute that date_from and date_to apply to.
+            date_from: The earliest date (YYYY-MM-DD), inclusive.
+            date_to: The latest date (YYYY-MM-DD), inclusive.
+            limit: The maximum number of annotations to return.
+
+        Returns:
+            A list of Dictionaries containing the filename and the metadata of every matching annotation, sorted by filename.
+        """
+        conditions, parameters = self._filter_conditions(filters)
+        if date_from or date_to:
+            if date_attribute not in DATE_ATTRIBUTES:
+                raise ValueError(f"'{date_attribute}' is not a date attribute. Date attributes: {', '.join(DATE_ATTRIBUTES)}")
+            conditions.append(
+                "id IN (SELECT annotation_id FROM annotation_values WHERE attribute = ? AND value BETWEEN ? AND ?)"
+            )
+            parameters.extend([date_attribute, date_from or "0000-00-00", date_to or "9999-99-99"])
+
+        sql = "SELECT filename, metadata FROM annotations"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY filename"
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+        with self._lock:
+            rows = self._connection.execute(sql, parameters).fetchall()
+        return [{"filename": filename, "metadata": loads(metadata)} for filename, metadata in rows]
+
+    def search(self, text: str = "", filters: Dict[str, str | List[str]] | None = None, limit: int = ANNOTATION_SEARCH_LIMIT,
+               offset: int = 0, facet_limit: int = 20) -> Dict[str, Any]:
+        """
+        Search the annotations by the words in their name, keywords and description.
+
+        Args:
+            text: The search text. Annotations must contain all of its words. Without words, all annotations match.
+            filters: A Dictionary mapping attributes in SEARCH_FACET_ATTRIBUTES to a value, or to a list of values
+                of which one must match.
+            limit: The maximum number of results to return.
+            offset: The number of best results to skip, to page through the results.
+            facet_limit: The maximum number of values counted for every facet.
+
+        Returns:
+            A Dictionary containing the total number of matching annotations, the requested page of results (their
+            filename, metadata, score and a snippet of the matching text), best first, and the facets: for every
+            attribute in SEARCH_FACET_ATTRIBUTES, the number of matching annotations with each value, most common first.
+            Without search words, the most recently saved annotations come first.
+        """
+        wanted = []
+        for attribute, values in (filters or {}).items():
+            if attribute not in SEARCH_FACET_ATTRIBUTES:
+                raise ValueError(f"'{attribute}' is not a search filter. Search filters: {', '.join(SEARCH_FACET_ATTRIBUTES)}")
+            values = [values] if isinstance(values, str) else list(values)
+            wanted.append({(attribute, value.strip().lower()) for value in values})
+        match_query = build_match_query(text)
+        weights = ", ".join(str(weight) for weight in SEARCH_COLUMN_WEIGHTS)
+
+        with self._lock:
+            facet_values, facet_ids = self._get_facet_values()
+            if match_query is not None:
+                # bm25 scores are negative, the best match has the lowest score
+                matches = self._connection.execute(
+                    f"SELECT rowid, bm25(annotation_text, {weights}) FROM annotation_text WHERE annotation_text MATCH ?",
+                    (match_query,),
+                ).fetchall()
+            else:
+                matches = [(annotation_id, 0.0) for annotation_id in facet_values]
+            if wanted:
+                # The annotations with one of the wanted values of every filtered attribute
+                allowed = set.intersection(*(
+                    set().union(*(facet_ids.get(value, ()) for value in values)) for values in wanted
+                ))
+                matches = [(annotation_id, score) for annotation_id, score in matches if annotation_id in allowed]
+
+            # Only the requested page of results is sorted and read from the database
+            page = heapq.nsmallest(offset + limit, matches, key=lambda match: (match[1], -match[0]))[offset:]
+            page_ids = [annotation_id for annotation_id, _ in page]
+            if match_query is not None and page_ids:
+                # The + stops SQLite from passing the rowids to FTS5, which would run the search again for each of them
+                details = self._connection.execute(
+                    f"""
+                    SELECT annotations.id, annotations.filename, annotations.metadata,
+                        snippet(annotation_text, -1, '**', '**', '…', 16)
+                    FROM annotation_text JOIN annotations ON annotations.id = annotation_text.rowid
+                    WHERE annotation_text MATCH ? AND +annotation_text.rowid IN ({', '.join('?' * len(page_ids))})
+                    """,
+                    (match_query, *page_ids),
+                ).fetchall()
+            elif page_ids:
+                details = self._connection.execute(
+                    f"SELECT id, filename, metadata, '' FROM annotations WHERE id IN ({', '.join('?' * len(page_ids))})",
+                    page_ids,
+                ).fetchall()
+            else:
+                details = []
+            if match_query is None and not wanted:
+                counts = {pair: len(ids) for pair, ids in facet_ids.items() if ids}
+            else:
+                counts = collections.Counter(
+                    itertools.chain.from_iterable(facet_values.get(annotation_id, ()) for annotation_id, _ in matches)
+                )
+
+        details = {row[0]: row[1:] for row in details}
+        results = [
+            {"filename": details[annotation_id][0], "metadata": loads(details[annotation_id][1]),
+             "score": -score if match_query is not None else 0.0, "snippet": details[annotation_id][2]}
+            for annotation_id, score in page
+        ]
+        facets = {attribute: [] for attribute in SEARCH_FACET_ATTRIBUTES}
+        for (attribute, value), count in sorted(counts.items(), key=lambda item: (-item[1], item[0][1])):
+            if len(facets[attribute]) < facet_limit:
+                facets[attribute].append((value, count))
+        return {"total": len(matches), "results": results, "facets": facets}
+
+    def _get_facet_values(self) -> Tuple[Dict[int, Tuple[Tuple[str, str], ...]], Dict[Tuple[str, str], set]]:
+        """
+        Get the facet values of every annotation, kept in memory so search results are filtered and counted without
+        queries. They are read again when another process changed the index. The caller must hold the lock.
+
+        Returns:
+            A Tuple containing a Dictionary mapping the id of every annotation to its (attribute, value) Tuples of the
+            facet attributes, and a Dictionary mapping every (attribute, value) Tuple to the ids of its annotations.
+        """
+        # The data version changes when another connection changes the database
+        data_version = self._connection.execute("PRAGMA data_version").fetchone()[0]
+        if self._facet_values is None or data_version != self._facet_data_version:
+            facet_values = {annotation_id: [] for (annotation_id,) in self._connection.execute("SELECT id FROM annotations")}
+            rows = self._connection.execute(
+                f"""
+                SELECT annotation_id, attribute, value FROM annotation_values
+                WHERE attribute IN ({', '.join('?' * len(SEARCH_FACET_ATTRIBUTES))})
+                """,
+                SEARCH_FACET_ATTRIBUTES,
+            )
+            facet_ids = {}
+            pairs = {}  # The same (attribute, value) Tuple is shared by all annotations with the value
+            for annotation_id, attribute, value in rows:
+                pair = pairs.setdefault((attribute, value), (attribute, value))
+                facet_ids.setdefault(pair, set()).add(annotation_id)
+                facet_values.setdefault(annotation_id, []).append(pair)
+            self._facet_values = {annotation_id: tuple(pairs) for annotation_id, pairs in facet_values.items()}
+            self._facet_ids = facet_ids
+            self._facet_data_version = data_version
+        return self._facet_values, self._facet_ids
+
+    def find_near_duplicates(self, filename: str, threshold: float = NEAR_DUPLICATE_THRESHOLD) -> List[Dict[str, Any]]:
+        """
+        Find the annotations whose description or citation is nearly the same as the one of an annotation.
+
+        Args:
+            filename: The name of the annotation file.
+            threshold: The estimated similarity from which texts are near-duplicates, from 0.0 to 1.0.
+
+        Returns:
+            A list of Dictionaries containing the filename of every near-duplicate, the field that is nearly the same
+            and the estimated similarity, the most similar first.
+        """
+        duplicates = []
+        with self._lock:
+            signatures = self._connection.execute(
+                """
+                SELECT annotation_signatures.annotation_id, field, signature FROM annotation_signatures
+                JOIN annotations ON annotations.id = annotation_signatures.annotation_id WHERE filename = ?
+                """,
+                (filename,),
+            ).fetchall()
+            for annotation_id, field, signature in signatures:
+                signature = np.frombuffer(signature, dtype=np.uint32)
+                buckets = band_buckets(signature)
+                # The candidates share at least one bucket with the annotation
+                candidates = self._connection.execute(
+                    f"""
+                    SELECT annotations.filename, annotation_signatures.signature FROM annotation_signatures
+                    JOIN annotations ON annotations.id = annotation_signatures.annotation_id
+                    WHERE annotation_signatures.field = ? AND annotation_signatures.annotation_id IN (
+                        SELECT annotation_id FROM annotation_buckets WHERE field = ? AND bucket IN ({', '.join('?' * len(buckets))})
+                    ) AND annotation_signatures.annotation_id != ?
+                    """,
+                    (field, field, *buckets, annotation_id),
+                ).fetchall()
+                for other_filename, other_signature in candidates:
+                    similarity = estimate_similarity(signature, np.frombuffer(other_signature, dtype=np.uint32))
+                    if similarity >= threshold:
+                        duplicates.append({"filename": other_filename, "field": field, "similarity": similarity})
+        return sorted(duplicates, key=lambda duplicate: (-duplicate["similarity"], duplicate["filename"], duplicate["field"]))
+
+    def find_all_near_duplicates(self, threshold: float = NEAR_DUPLICATE_THRESHOLD) -> List[Dict[str, Any]]:
+        """
+        Find the groups of annotations with nearly the same description or citation, for curators to review.
+        Only the annotations that share an LSH bucket are compared, each with the first annotation of the bucket,
+        so the work grows with the number of annotations rather than the number of pairs.
+
+        Args:
+            threshold: The estimated similarity from which texts are near-duplicates, from 0.0 to 1.0.
+
+        Returns:
+            A list of Dictionaries containing the field that is nearly the same and the filenames of every group,
+            the largest groups first.
+        """
+        with self._lock:
+            shared_buckets = self._connection.execute(
+                """
+                SELECT field, group_concat(annotation_id) FROM annotation_buckets
+                GROUP BY field, bucket HAVING COUNT(*) > 1
+                """
+            ).fetchall()
+            if not shared_buckets:
+                return []
+            # Only the signatures of the annotations that share a bucket are read
+            candidate_ids = sorted({int(annotation_id) for _, annotation_ids in shared_buckets for annotation_id in annotation_ids.split(",")})
+            signatures = {}
+            for start in range(0, len(candidate_ids), 500):
+                chunk = candidate_ids[start:start + 500]
+                for annotation_id, field, signature in self._connection.execute(
+                    f"SELECT annotation_id, field, signature FROM annotation_signatures WHERE annotation_id IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                ):
+                    signatures[(field, annotation_id)] = np.frombuffer(signature, dtype=np.uint32)
+            filenames = dict(self._connection.execute("SELECT id, filename FROM annotations").fetchall())
+
+        # The groups are the connected annotations, kept as a parent pointer for each annotation of each field
+        parents = {}
+        def find(node):
+            while parents.setdefault(node, node) != node:
+                parents[node] = parents[parents[node]]
+                node = parents[node]
+            return node
+
+        compared = set()
+        for field, annotation_ids in shared_buckets:
+            first, *others = (int(annotation_id) for annotation_id in annotation_ids.split(","))
+            for other in others:
+                pair = (field, min(first, other), max(first, other))
+                if pair in compared or find((field, first)) == find((field, other)):
+                    continue
+                compared.add(pair)
+                if estimate_similarity(signatures[(field, first)], signatures[(field, other)]) >= threshold:
+                    parents[find((field, other))] = find((field, first))
+
+        groups = {}
+        for node in parents:
+            groups.setdefault(find(node), []).append(node)
+        groups = [
+            {"field": root[0], "filenames": sorted(filenames[annotation_id] for _, annotation_id in nodes)}
+            for root, nodes in groups.items() if len(nodes) > 1
+        ]
+        return sorted(groups, key=lambda group: (-len(group["filenames"]), group["field"], group["filenames"]))
+
+    def _filter_conditions(self, filters: Dict[str, str | List[str]] | None) -> Tuple[List[str], List[Any]]:
+        """
+        Build the SQL conditions of attribute filters.
+
+        Args:
+            filters: A Dictionary mapping indexed attributes to a value or a list of values.
+
+        Returns:
+            A Tuple containing the list of conditions and the list of their parameters.
+        """
+        conditions = []
+        parameters = []
+        for attribute, values in (filters or {}).items():
+            if attribute not in INDEXED_ATTRIBUTES:
+                raise ValueError(f"'{attribute}' is not an indexed attribute. Indexed attributes: {', '.join(INDEXED_ATTRIBUTES)}")
+            values = [values] if isinstance(values, str) else list(values)
+            conditions.append(
+                f"id IN (SELECT annotation_id FROM annotation_values WHERE attribute = ? AND value IN ({', '.join('?' * len(values))}))"
+            )
+            parameters.extend([attribute, *(value.strip().lower() for value in values)])
+        return conditions, parameters
+
+    def facets(self, attribute: str, limit: int | None = None) -> List[Tuple[str, int]]:
+        """
+        Count the annotations with each value of an attribute.
+
+        Args:
+            attribute: An indexed attribute.
+            limit: The maximum number of values to return.
+
+        Returns:
+            A list of (value, number of annotations) Tuples, the most common values first.
+        """
+        if attribute not in INDEXED_ATTRIBUTES:
+            raise ValueError(f"'{attribute}' is not an indexed attribute. Indexed attributes: {', '.join(INDEXED_ATTRIBUTES)}")
+        sql = "SELECT value, COUNT(*) AS count FROM annotation_values WHERE attribute = ? GROUP BY value ORDER BY count DESC, value"
+        parameters = [attribute]
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+        with self._lock:
+            return [tuple(row) for row in self._connection.execute(sql, parameters).fetchall()]
+
+    def count(self) -> int:
+        """
+        Count the annotations in the index.
+
+        Returns:
+            The number of annotations.
+        """
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM annotations").fetchone()[0]
+
+    def import_folder(self, folder: str = ANNOTATIONS_DIRECTORY) -> Dict[str, int]:
+        """
+        Bring the index up to date with the annotations folder. Only the files that changed since they were
+        indexed are read, and the annotations of files that no longer exist are removed.
+
+        Args:
+            folder: The annotations folder.
+
+        Returns:
+            A Dictionary containing the numbers of annotations updated, unchanged and removed.
+        """
+        with self._lock:
+            indexed = {
+                filename: (mtime_ns, size)
+                for filename, mtime_ns, size in self._connection.execute(
+                    "SELECT filename, file_mtime_ns, file_size FROM annotations"
+                ).fetchall()
+            }
+        filenames = sorted(filename for filename in os.listdir(folder) if filename.endswith(".json")) if os.path.isdir(folder) else []
+
+        rows = []
+        for filename in filenames:
+            filepath = os.path.join(folder, filename)
+            stat = os.stat(filepath)
+            if indexed.get(filename) == (stat.st_mtime_ns, stat.st_size):
+                continue
+            try:
+                with open(filepath, "rb") as file:
+                    metadata = loads(file.read())
+            except ValueError:
+                continue  # Not a JSON file
+            if isinstance(metadata, dict):
+                rows.append((filename, metadata, filepath))
+
+        removed = set(indexed) - set(filenames)
+        self.upsert_many(rows)
+        self.remove(removed)
+        return {"updated": len(rows), "unchanged": len(filenames) - len(rows), "removed": len(removed)}
+
+    def close(self):
+        """
+        Close the database connection.
+        """
+        with self._lock:
+            self._connection.close()
+
+
+_annotation_index = None
+_annotation_index_lock = threading.Lock()
+
+
+def get_annotation_index() -> AnnotationIndex:
+    """
+    Get the shared annotation index, bringing it up to date with the annotations folder the first time it is used.
+
+    Returns:
+        The shared AnnotationIndex.
+    """
+    global _annotation_index
+    with _annotation_index_lock:
+        if _annotation_index is None:
+            _annotation_index = AnnotationIndex()
+            _annotation_index.import_folder()
+        return _annotation_index
+
+
+def main():
+    """Command line interface for the annotation index."""
+    parser = argparse.ArgumentParser(description="Query the index of the annotations folder.")
+    parser.add_argument("--db", default=ANNOTATION_INDEX_PATH, help="Path of the index database.")
+    parser.add_argument("--folder", default=ANNOTATIONS_DIRECTORY, help="The annotations folder.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("refresh", help="Import the new and changed files of the annotations folder.")
+
+    query_parser = subparsers.add_parser("query", help="Print the annotations that match all filters.")
+    for attribute in INDEXED_ATTRIBUTES:
+        if attribute not in DATE_ATTRIBUTES:
+            query_parser.add_argument(f"--{attribute.replace('_', '-')}", dest=attribute, action="append",
+                                      help=f"A value of {attribute}. Repeat to match any of several values.")
+    query_parser.add_argument("--date-attribute", default="date_published", choices=DATE_ATTRIBUTES)
+    query_parser.add_argument("--date-from", help="The earliest date (YYYY-MM-DD).")
+    query_parser.add_argument("--date-to", help="The latest date (YYYY-MM-DD).")
+    query_parser.add_argument("--limit", type=int)
+    query_parser.add_argument("--json", action="store_true", help="Print the metadata of the annotations as JSON.")
+
+    facets_parser = subparsers.add_parser("facets", help="Count the annotations with each value of an attribute.")
+    facets_parser.add_argument("attribute", choices=list(INDEXED_ATTRIBUTES))
+    facets_parser.add_argument("--limit", type=int)
+
+    search_parser = subparsers.add_parser("search", help="Search the annotations by the words in their name, keywords and description.")
+    search_parser.add_argument("text", help="The words to search for.")
+    for attribute in SEARCH_FACET_ATTRIBUTES:
+        search_parser.add_argument(f"--{attribute}", action="append", help=f"A value of {attribute}. Repeat to match any of several values.")
+    search_parser.add_argument("--limit", type=int, default=ANNOTATION_SEARCH_LIMIT)
+
+    duplicates_parser = subparsers.add_parser("duplicates", help="Print the groups of annotations with nearly the same description or citation.")
+    duplicates_parser.add_argument("--threshold", type=float, default=NEAR_DUPLICATE_THRESHOLD,
+                                   help="The estimated similarity from which texts are near-duplicates (0.0 to 1.0).")
+
+    args = parser.parse_args()
+    index = AnnotationIndex(args.db)
+    counts = index.import_folder(args.folder)
+    if args.command == "refresh":
+        print(f"The index at {args.db} contains {index.count()} annotations "
+              f"({counts['updated']} updated, {counts['removed']} removed).")
+    elif args.command == "query":
+        filters = {
+            attribute: getattr(args, attribute) for attribute in INDEXED_ATTRIBUTES
+            if attribute not in DATE_ATTRIBUTES and getattr(args, attribute)
+        }
+        results = index.query(filters, args.date_attribute, args.date_from, args.date_to, args.limit)
+        if args.json:
+            print(dumps([result["metadata"] for result in results], indent=True))
+        else:
+            for result in results:
+                print(f"{result['filename']}\t{result['metadata'].get('name', '')}")
+            print(f"{len(results)} annotations")
+    elif args.command == "search":
+        filters = {attribute: getattr(args, attribute) for attribute in SEARCH_FACET_ATTRIBUTES if getattr(args, attribute)}
+        result = index.search(args.text, filters, limit=args.limit)
+        for match in result["results"]:
+            print(f"{match['score']:>7.2f}  {match['filename']}\t{match['metadata'].get('name', '')}")
+        print(f"{result['total']} annotations")
+        for attribute, counts in result["facets"].items():
+            print(f"{attribute}: " + ", ".join(f"{value} ({count})" for value, count in counts))
+    elif args.command == "facets":
+        for value, count in index.facets(args.attribute, args.limit):
+            print(f"{count:>6}  {value}")
+    elif args.command == "duplicates":
+        groups = index.find_all_near_duplicates(args.threshold)
+        for group in groups:
+            print(f"{group['field']}: " + ", ".join(group["filenames"]))
+        print(f"{len(groups)} groups of near-duplicates")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
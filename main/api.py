@@ -0,0 +1,298 @@
+# api.py
+
+# necessary imports
+import argparse
+import asyncio
+from typing import Any, Callable, Dict, List
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel, Field
+from .annotation_index import get_annotation_index
+from .attribute_quality import AttributeQualityChecker
+from .constants import METADATA_ATTRIBUTES, API_BULK_MAX_ITEMS, API_BULK_CONCURRENCY, ANNOTATION_SEARCH_LIMIT
+from .llm import suggest_metadata
+from .metadata_manager import MetadataManager
+from .validation import MetadataValidator
+
+"""
+    This module contains a REST API for annotating datasets without the chat UI:
+        python -m main.api --port 8000
+    The endpoints are stateless: every request sends the metadata it works on and gets JSON back.
+    Every endpoint has a bulk variant that processes a list of items concurrently and reports
+    the result (or the error) of every item, so pipelines can annotate many datasets per request.
+    The annotations saved to the annotations folder can be searched by their text, with facet counts of their
+    tasks, modalities and licenses.
+    The interactive documentation of the endpoints is served at /docs.
+"""
+
+
+# Request and response models
+class AttributeValue(BaseModel):
+    attribute: str
+    value: str
+
+class MetadataRecord(BaseModel):
+    metadata: Dict[str, str]
+
+class SuggestionRequest(BaseModel):
+    attribute: str
+    metadata: Dict[str, str] = {}
+    informal_description: str = ""
+
+class FinaliseRequest(BaseModel):
+    metadata: Dict[str, str]
+    save: bool = False  # Whether to also save the final metadata to the annotations folder
+
+class DatasetRequest(BaseModel):
+    dataset_id: str
+
+class SearchRequest(BaseModel):
+    text: str = ""
+    filters: Dict[str, List[str]] = {}  # E.g. {"task": ["question-answering"], "license": ["mit", "apache-2.0"]}
+    limit: int = Field(ANNOTATION_SEARCH_LIMIT, ge=1, le=100)
+    offset: int = Field(0, ge=0)
+
+class BulkAttributeValues(BaseModel):
+    items: List[AttributeValue] = Field(max_length=API_BULK_MAX_ITEMS)
+
+class BulkMetadataRecords(BaseModel):
+    items: List[MetadataRecord] = Field(max_length=API_BULK_MAX_ITEMS)
+
+class BulkSuggestionRequests(BaseModel):
+    items: List[SuggestionRequest] = Field(max_length=API_BULK_MAX_ITEMS)
+
+class BulkFinaliseRequests(BaseModel):
+    items: List[FinaliseRequest] = Field(max_length=API_BULK_MAX_ITEMS)
+
+class BulkDatasetRequests(BaseModel):
+    items: List[DatasetRequest] = Field(max_length=API_BULK_MAX_ITEMS)
+
+
+api = FastAPI(
+    title="Croissant Chatbot API",
+    description="Validate, suggest, fetch and finalise dataset metadata in the Croissant format.",
+)
+
+# The validator and the quality checker are shared by all requests. The quality checker runs without the
+# deadline of the chat: a client of the API has no next message to show a refined verdict with, and a check that
+# missed the deadline would be kept in the shared checker.
+validator = MetadataValidator()
+quality_checker = AttributeQualityChecker()
+quality_checker.description_check_deadline = None
+
+
+def check_attribute_name(attribute: str):
+    """
+    Reject attribute names that are not metadata attributes.
+
+    Args:
+        attribute: The name of the attribute.
+    """
+    if attribute not in METADATA_ATTRIBUTES:
+        raise HTTPException(status_code=400, detail=f"Invalid attribute name: {attribute}")
+
+
+def validate_metadata(metadata: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Validate and check the quality of metadata attributes.
+
+    Args:
+        metadata: A Dictionary of metadata attributes and their values.
+
+    Returns:
+        A Dictionary containing whether the metadata is valid, and the errors and quality issues of each attribute.
+    """
+    errors = validator.validate_all_attributes(metadata)
+    issues = quality_checker.check_quality_of_all_attributes(metadata)
+    return {"valid": not errors and not issues, "errors": errors, "issues": issues}
+
+
+def finalise(metadata: Dict[str, str], save: bool) -> Dict[str, Any]:
+    """
+    Convert metadata to the Croissant format.
+
+    Args:
+        metadata: A Dictionary of metadata attributes and their values.
+        save: Whether to save the final metadata to the annotations folder.
+
+    Returns:
+        A Dictionary containing whether the conversion succeeded, and the final metadata or the error.
+    """
+    manager = MetadataManager()
+    manager.metadata = dict(metadata)
+    success, final_metadata = manager.finalise_metadata(save=save)
+    if not success:
+        return {"success": False, "error": final_metadata.get("error")}
+    return {"success": True, "metadata": final_metadata}
+
+
+def fetch_dataset(dataset_id: str) -> Dict[str, Any]:
+    """
+    Fetch the metadata of a Hugging Face dataset.
+
+    Args:
+        dataset_id: The ID of the dataset (e.g. cais/mmlu).
+
+    Returns:
+        A Dictionary containing whether the dataset was found, and its metadata or the error.
+    """
+    metadata, found = MetadataManager().find_dataset_info(dataset_id)
+    if not found:
+        return {"found": False, "error": metadata.get("error") if metadata else f"Dataset {dataset_id} was not found."}
+    return {"found": True, "metadata": metadata}
+
+
+async def run_bulk(function: Callable[[Any], Dict[str, Any]], items: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Run a blocking function for every item of a bulk request in worker threads.
+
+    Args:
+        function: The function to run for each item.
+        items: The items of the request.
+
+    Returns:
+        A list of results in the same order as the items. An item that failed gets a Dictionary with its error.
+    """
+    semaphore = asyncio.Semaphore(API_BULK_CONCURRENCY)
+
+    async def run_item(item) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                return await asyncio.to_thread(function, item)
+            except HTTPException as e:
+                return {"error": e.detail}
+            except Exception as e:
+                return {"error": str(e)}
+
+    return await asyncio.gather(*(run_item(item) for item in items))
+
+
+async def run_single(function: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Run a blocking function in a worker thread, turning unexpected errors into a 502 response.
+
+    Args:
+        function: The function to run.
+
+    Returns:
+        The result of the function.
+    """
+    try:
+        return await asyncio.to_thread(function)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+
+def search_annotations(request: SearchRequest) -> Dict[str, Any]:
+    """
+    Search the saved annotations.
+
+    Args:
+        request: The search text, the filters and the page of results.
+
+    Returns:
+        A Dictionary containing the total number of matching annotations, the page of results and the facet counts.
+    """
+    try:
+        result = get_annotation_index().search(request.text, request.filters, request.limit, request.offset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    result["facets"] = {
+        attribute: [{"value": value, "count": count} for value, count in counts]
+        for attribute, counts in result["facets"].items()
+    }
+    return result
+
+
+def validate_attribute_value(item: AttributeValue) -> Dict[str, Any]:
+    """Validate the value of one attribute."""
+    check_attribute_name(item.attribute)
+    return {"attribute": item.attribute, **validate_metadata({item.attribute: item.value})}
+
+
+def suggest_attribute(item: SuggestionRequest) -> Dict[str, Any]:
+    """Ask the LLM for suggestions for one attribute."""
+    check_attribute_name(item.attribute)
+    return {"attribute": item.attribute, "suggestion": suggest_metadata(item.metadata, item.informal_description, item.attribute)}
+
+
+# Endpoints
+@api.get("/health")
+async def health() -> Dict[str, str]:
+    return {"status": "ok"}
+
+@api.post("/validate/attribute")
+async def validate_attribute_endpoint(item: AttributeValue) -> Dict[str, Any]:
+    return await run_single(lambda: validate_attribute_value(item))
+
+@api.post("/validate/attribute/bulk")
+async def validate_attribute_bulk_endpoint(request: BulkAttributeValues) -> List[Dict[str, Any]]:
+    return await run_bulk(validate_attribute_value, request.items)
+
+@api.post("/validate/record")
+async def validate_record_endpoint(record: MetadataRecord) -> Dict[str, Any]:
+    return await run_single(lambda: validate_metadata(record.metadata))
+
+@api.post("/validate/record/bulk")
+async def validate_record_bulk_endpoint(request: BulkMetadataRecords) -> List[Dict[str, Any]]:
+    def validate_records():
+        records = [item.metadata for item in request.items]
+        # The descriptions of all records are parsed by spaCy in batches
+        all_issues = quality_checker.check_quality_of_all_attributes_batch(records)
+        results = []
+        for metadata, issues in zip(records, all_issues):
+            errors = validator.validate_all_attributes(metadata)
+            results.append({"valid": not errors and not issues, "errors": errors, "issues": issues})
+        return results
+    return await run_single(validate_records)
+
+@api.post("/suggest")
+async def suggest_endpoint(item: SuggestionRequest) -> Dict[str, Any]:
+    return await run_single(lambda: suggest_attribute(item))
+
+@api.post("/suggest/bulk")
+async def suggest_bulk_endpoint(request: BulkSuggestionRequests) -> List[Dict[str, Any]]:
+    return await run_bulk(suggest_attribute, request.items)
+
+@api.post("/hf")
+async def hf_endpoint(item: DatasetRequest) -> Dict[str, Any]:
+    result = await run_single(lambda: fetch_dataset(item.dataset_id))
+    if not result["found"]:
+        raise HTTPException(status_code=404, detail=result["error"])
+    return result
+
+@api.post("/hf/bulk")
+async def hf_bulk_endpoint(request: BulkDatasetRequests) -> List[Dict[str, Any]]:
+    return await run_bulk(lambda item: fetch_dataset(item.dataset_id), request.items)
+
+@api.post("/finalise")
+async def finalise_endpoint(item: FinaliseRequest) -> Dict[str, Any]:
+    result = await run_single(lambda: finalise(item.metadata, item.save))
+    if not result["success"]:
+        raise HTTPException(status_code=422, detail=result["error"])
+    return result
+
+@api.post("/finalise/bulk")
+async def finalise_bulk_endpoint(request: BulkFinaliseRequests) -> List[Dict[str, Any]]:
+    return await run_bulk(lambda item: finalise(item.metadata, item.save), request.items)
+
+@api.post("/search")
+async def search_endpoint(request: SearchRequest) -> Dict[str, Any]:
+    return await run_single(lambda: search_annotations(request))
+
+
+def main():
+    """
+    Run the REST API.
+    """
+    parser = argparse.ArgumentParser(description="Run the Croissant Chatbot REST API.")
+    parser.add_argument("--host", default="127.0.0.1", help="The host the API listens on.")
+    parser.add_argument("--port", type=int, default=8000, help="The port the API listens on.")
+    args = parser.parse_args()
+    uvicorn.run(api, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
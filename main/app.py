@@ -2,34 +2,123 @@
 
 # necessary imports
 import gradio as gr
-from .constants import METADATA_ATTRIBUTES
-import os
-import tempfile
+from .constants import METADATA_ATTRIBUTES, QUEUE_MAX_SIZE, BUSY_MESSAGE, CONFORMANCE_WAIT_TIMEOUT
+from contextlib import contextmanager
+from typing import Any, Dict
+from .annotation_index import get_annotation_index, SEARCH_FACET_ATTRIBUTES
 from .croissant_chatbot_manager import CroissantChatbotManager
+from .dataset_name_index import get_dataset_name_index
+from .session_store import SessionStore
+from .session_persistence import SessionPersistence
+from .load_control import concurrency_groups, get_load_stats
 
 
 """ 
     This module contains functions to create the Gradio UI for the Croissant Chatbot.
     All emojis used come from: https://emojidb.org/gradio-emojis
+    Every browser tab has its own session ID, kept in the session storage of the tab, and its CroissantChatbotManager
+    is kept in the session store. Sessions are saved after every handler, so a reloaded tab resumes its session,
+    also after a restart or on another worker. Tabs do not share a session, so their handlers never change the same
+    CroissantChatbotManager at the same time.
+    Events run in concurrency groups (cheap UI events, LLM-bound events and NLP-bound events), so slow events do not
+    starve cheap ones, and an event is rejected with a busy message when too many events of its group are waiting.
 """
 
+# One CroissantChatbotManager per session, saved to the session database
+session_store = SessionStore(
+    CroissantChatbotManager,
+    persistence=SessionPersistence(),
+    to_state=CroissantChatbotManager.to_state,
+    from_state=CroissantChatbotManager.from_state,
+)
+
+
+# The key of the session ID in the session storage of a browser tab
+SESSION_STORAGE_KEY = "croissant_chatbot_session"
+
+# Maps the Gradio session of a browser tab to the ID of the chatbot session it resumed
+tab_sessions = {}
+
+
+def get_session_key(session_id, request: gr.Request) -> str:
+    """Return the ID of the chatbot session of a request."""
+    # API clients and tabs whose session is not restored yet have no session ID, so their Gradio session is used
+    return session_id or tab_sessions.get(request.session_hash) or request.session_hash
+
+@contextmanager
+def chatbot_session(session_id, request: gr.Request, group: str):
+    """Get the CroissantChatbotManager of a session and save the session when the handler is done."""
+    session_key = get_session_key(session_id, request)
+    with concurrency_groups[group].run():
+        try:
+            yield session_store.get(session_key)
+        finally:
+            session_store.save(session_key)
+
+def admit_event(group):
+    """Create a handler that admits an event of a concurrency group before it joins the queue, or shows a busy message."""
+    def admit():
+        if not concurrency_groups[group].admit():
+            raise gr.Error(BUSY_MESSAGE, title="Busy", print_exception=False)
+    return admit
+
+def concurrency_settings(group):
+    """Return the arguments that put an event into a concurrency group."""
+    return {"concurrency_id": group, "concurrency_limit": concurrency_groups[group].concurrency_limit}
+
+def load_stats() -> Dict[str, Any]:
+    """Return the queue depth and wait times of the concurrency groups and the session statistics."""
+    return {"groups": get_load_stats(), "sessions": session_store.get_stats()}
+
+def restore_session(stored_session_id, request: gr.Request):
+    """Use the Gradio session of a new browser tab as its session ID, or show the chat history of the session of a reloaded tab."""
+    if not stored_session_id:
+        # Handlers that run before the session ID is stored use the Gradio session too, so they share the session
+        return request.session_hash, [], request.session_hash
+    tab_sessions[request.session_hash] = stored_session_id
+    return stored_session_id, session_store.get(stored_session_id).history, stored_session_id
+
+def remove_session(request: gr.Request):
+    """Remove the session of a closed or reloaded browser tab from memory. It is saved, so a reloaded tab resumes it."""
+    session_key = tab_sessions.pop(request.session_hash, request.session_hash)
+    session_store.save(session_key)
+    session_store.remove(session_key)
+
 
 def create_chatbot_ui():
     """Create the chatbot UI."""
     return gr.Chatbot(type="messages")
 
-def create_prompt_input(chatbot_instance, chatbot_ui):
+def create_prompt_input(session_id, chatbot_ui):
     """Create the prompt input box."""
     prompt = gr.Textbox(
         max_lines=1,
         label="Chat Message",
         value="Type a greeting to start the chatbot...", # Initial value
     )
-    prompt.submit(chatbot_instance.handle_user_input, [prompt], [chatbot_ui])
-    prompt.submit(lambda: "", None, [prompt])  # Clear the input box after submission
+
+    def handle_prompt_submit(message, session, request: gr.Request):
+        with chatbot_session(session, request, "nlp") as chatbot_instance:
+            return chatbot_instance.handle_user_input(message)
+
+    def handle_conformance_result(session, request: gr.Request):
+        with chatbot_session(session, request, "conformance") as chatbot_instance:
+            # Only send the history again when the 'complete' command started a conformance check
+            if chatbot_instance.pending_conformance is None:
+                return gr.skip()
+            if not chatbot_instance.collect_conformance_result(timeout=CONFORMANCE_WAIT_TIMEOUT):
+                return gr.skip()
+            return chatbot_instance.history
+
+    # The quality checks of the entered values run spaCy
+    admitted = prompt.submit(admit_event("nlp"), None, None, queue=False, show_api=False)
+    submitted = admitted.success(handle_prompt_submit, [prompt, session_id], [chatbot_ui], **concurrency_settings("nlp"))
+    # The result of the background conformance check is shown when it is done, after the answer to 'complete'
+    submitted.then(handle_conformance_result, [session_id], [chatbot_ui], show_progress="hidden", **concurrency_settings("conformance"))
+    admitted.success(lambda: "", None, [prompt], queue=False)  # Clear the input box after submission
     return prompt
 
-def create_metadata_attributes_dropdown(chatbot_instance):
+def create_metadata_attributes_dropdown(session_id):
     """Create a dropdown for metadata attributes."""
     with gr.Row():
         dropdown = gr.Dropdown(
@@ -40,49 +129,99 @@ def create_metadata_attributes_dropdown(chatbot_instance):
             filterable=True,  # Allow user to search for attributes
         )
 
-        def handle_dropdown_change(attribute):
-            # Ignore if the dropdown value is None
-            if attribute is None:
-                return gr.update(value=None), chatbot_instance.history
+        def handle_dropdown_change(attribute, session, request: gr.Request):
+            with chatbot_session(session, request, "llm") as chatbot_instance:
+                # Ignore if the dropdown value is None. This also runs when the dropdown is reset after a selection,
+                # so the unchanged history is not sent to the browser again.
+                if attribute is None:
+                    return gr.update(value=None), gr.skip()
 
-            # Handle the selected attribute
-            updated_history = chatbot_instance.handle_selected_attribute(attribute)
-            # Reset the dropdown value to None after selection
-            return gr.update(value=None), updated_history
+                # Handle the selected attribute
+                updated_history = chatbot_instance.handle_selected_attribute(attribute)
+                # Reset the dropdown value to None after selection
+                return gr.update(value=None), updated_history
 
-        dropdown.change(
+        # Selecting an attribute asks the LLM for suggestions
+        dropdown.change(admit_event("llm"), None, None, queue=False, show_api=False).success(
             handle_dropdown_change,
-            inputs=[dropdown],
-            outputs=[dropdown, chatbot_ui]
+            inputs=[dropdown, session_id],
+            outputs=[dropdown, chatbot_ui],
+            **concurrency_settings("llm")
+        )
+        return dropdown
+
+def create_HF_dataset_dropdown(session_id, chatbot_ui):
+    """Create a dropdown that autocompletes Hugging Face dataset names."""
+    with gr.Row():
+        dropdown = gr.Dropdown(
+            choices=[],
+            label="Search Hugging Face Datasets",
+            info="Start typing a dataset name (e.g. cais/mmlu) and select it to fetch its metadata.",
+            multiselect=False,
+            value=None,  # No default value
+            allow_custom_value=True,  # Allow names that are not in the list yet
+            filterable=True,
+        )
+
+        def handle_key_up(key_up_data: gr.KeyUpData):
+            # Only the best completions are sent to the browser, not every known dataset
+            return gr.update(choices=get_dataset_name_index().complete(key_up_data.input_value))
+
+        def handle_dropdown_select(dataset_name, session, request: gr.Request):
+            with chatbot_session(session, request, "llm") as chatbot_instance:
+                # Ignore if the dropdown value is empty, without sending the unchanged history to the browser again
+                if not dataset_name:
+                    return gr.update(value=None), gr.skip()
+                updated_history = chatbot_instance.handle_selected_HF_name(dataset_name)
+                # Reset the dropdown value to None after selection
+                return gr.update(value=None, choices=[]), updated_history
+
+        dropdown.key_up(handle_key_up, inputs=None, outputs=[dropdown], queue=False, show_progress="hidden")
+        # Selecting a dataset waits for the Hugging Face Hub
+        dropdown.select(admit_event("llm"), None, None, queue=False, show_api=False).success(
+            handle_dropdown_select, inputs=[dropdown, session_id], outputs=[dropdown, chatbot_ui], **concurrency_settings("llm")
         )
         return dropdown
 
-def display_metadata_wrapper(chatbot_instance):
+def display_metadata_wrapper(session_id, request: gr.Request):
     """Wrapper for the handle_display_metadata method to work with Gradio."""
-    chatbot_instance.handle_display_metadata()
-    return chatbot_instance.history
+    with chatbot_session(session_id, request, "ui") as chatbot_instance:
+        chatbot_instance.handle_display_metadata()
+        return chatbot_instance.history
 
-def display_instructions_wrapper(chatbot_instance):
+def display_instructions_wrapper(session_id, request: gr.Request):
     """Wrapper for the display_chatbot_instructions method to work with Gradio."""
-    chatbot_instance.handle_display_chatbot_instructions()
-    return chatbot_instance.history
+    with chatbot_session(session_id, request, "ui") as chatbot_instance:
+        chatbot_instance.handle_display_chatbot_instructions()
+        return chatbot_instance.history
+
+def reset_chat_wrapper(session_id, request: gr.Request):
+    """Wrapper for the reset_chat method to work with Gradio."""
+    with chatbot_session(session_id, request, "ui") as chatbot_instance:
+        return chatbot_instance.reset_chat()
 
-def create_control_buttons(chatbot_instance, chatbot_ui):
+def create_control_buttons(session_id, chatbot_ui):
     """Create styled control buttons."""
     with gr.Row():
         # Button to display metadata
         display_btn = gr.Button("📋 Display Metadata So Far", scale=1, elem_classes="control-btn")
-        display_btn.click(lambda: display_metadata_wrapper(chatbot_instance), inputs=[], outputs=[chatbot_ui])
+        display_btn.click(admit_event("ui"), None, None, queue=False, show_api=False).success(
+            display_metadata_wrapper, inputs=[session_id], outputs=[chatbot_ui], **concurrency_settings("ui")
+        )
 
         # Button to display instructions
         see_instructions_btn = gr.Button("📃 See Instructions", scale=1, elem_classes="control-btn")
-        see_instructions_btn.click(lambda: display_instructions_wrapper(chatbot_instance), inputs=[], outputs=[chatbot_ui])
+        see_instructions_btn.click(admit_event("ui"), None, None, queue=False, show_api=False).success(
+            display_instructions_wrapper, inputs=[session_id], outputs=[chatbot_ui], **concurrency_settings("ui")
+        )
 
         # Button to refresh the chat
         refresh_btn = gr.Button("🔄 Refresh Chat", scale=1, elem_classes="control-btn")
-        refresh_btn.click(lambda: chatbot_instance.reset_chat(), inputs=[], outputs=[chatbot_ui])
+        refresh_btn.click(admit_event("ui"), None, None, queue=False, show_api=False).success(
+            reset_chat_wrapper, inputs=[session_id], outputs=[chatbot_ui], **concurrency_settings("ui")
+        )
 
-def create_download_metadata_button(chatbot_instance):
+def create_download_metadata_button(session_id):
     """Create a button for downloading the metadata file."""
     with gr.Row():
         download_btn = gr.Button("💾 Download Metadata File", scale=1, elem_classes="control-btn")
@@ -91,32 +230,75 @@ def create_download_metadata_button(chatbot_instance):
         with download_section:
             output_file = gr.File(label="Metadata File", interactive=False)  # File component for download
 
-        def save_and_show():
-            try:
-                # Save the metadata to the annotations folder
-                filepath, filename = chatbot_instance.metadata_manager.save_metadata_to_file(chatbot_instance.metadata_manager.final_metadata)
-
-                # Copy the file to the system's temporary directory
-                temp_dir = tempfile.gettempdir()
-                temp_filepath = os.path.join(temp_dir, filename)  
-
-                # Copy the file to the temporary directory
-                with open(filepath, "r") as src, open(temp_filepath, "w") as dest:
-                    dest.write(src.read())
+        def save_and_show(session, request: gr.Request):
+            with chatbot_session(session, request, "ui") as chatbot_instance:
+                # The final metadata was already saved to the annotations folder when it was finalised,
+                # so the file to download is created straight from memory (and reused while it is unchanged)
+                metadata_manager = chatbot_instance.metadata_manager
+                filepath, filename = metadata_manager.get_download_file(metadata_manager.final_metadata)
 
-                # Return the temporary file path for Gradio to serve
-                return gr.update(visible=True), temp_filepath
-            
-            except Exception as e:
-                print(f"Error saving metadata file: {e}")
+            if filepath is None:
+                gr.Warning(filename)  # The error message
                 return gr.update(visible=False), None
 
-        download_btn.click(
+            # Return the file path for Gradio to serve
+            return gr.update(visible=True), filepath
+
+        download_btn.click(admit_event("ui"), None, None, queue=False, show_api=False).success(
             save_and_show,
-            inputs=[],
-            outputs=[download_section, output_file]
+            inputs=[session_id],
+            outputs=[download_section, output_file],
+            **concurrency_settings("ui")
         )
 
+def format_search_results(result: Dict[str, Any]) -> str:
+    """Format the results of an annotation search as Markdown."""
+    if not result["results"]:
+        return "No annotations match the search."
+    lines = [f"Found **{result['total']} annotation{'s' if result['total'] != 1 else ''}**."]
+    for match in result["results"]:
+        metadata = match["metadata"]
+        lines.append(f"- **{metadata.get('name', match['filename'])}** (`{match['filename']}`)")
+        details = ", ".join(f"{attribute}: {metadata[attribute]}" for attribute in SEARCH_FACET_ATTRIBUTES if metadata.get(attribute))
+        if details:
+            lines.append(f"  {details}")
+        if match["snippet"]:
+            lines.append(f"  {match['snippet']}")
+    return "\n".join(lines)
+
+def create_annotation_search():
+    """Create a search of the saved annotations, with filters that show how many results have each value."""
+    with gr.Column():
+        search_text = gr.Textbox(label="Search Annotations", placeholder="Search the names, keywords and descriptions of saved annotations")
+        with gr.Row():
+            filter_dropdowns = [
+                gr.Dropdown(choices=[], value=[], label=attribute.capitalize(), multiselect=True, interactive=True)
+                for attribute in SEARCH_FACET_ATTRIBUTES
+            ]
+        search_btn = gr.Button("🔍 Search", scale=1, elem_classes="control-btn")
+        results_markdown = gr.Markdown()
+
+        def handle_search(text, *selected_values):
+            with concurrency_groups["ui"].run():
+                filters = {attribute: values for attribute, values in zip(SEARCH_FACET_ATTRIBUTES, selected_values) if values}
+                result = get_annotation_index().search(text, filters)
+            # Every filter shows the values of the results with their counts, and keeps the selected values
+            dropdown_updates = []
+            for attribute, values in zip(SEARCH_FACET_ATTRIBUTES, selected_values):
+                counts = dict(result["facets"][attribute])
+                choices = [(f"{value} ({counts.get(value, 0)})", value) for value in values]
+                choices += [(f"{value} ({count})", value) for value, count in counts.items() if value not in values]
+                dropdown_updates.append(gr.update(choices=choices, value=values))
+            return format_search_results(result), *dropdown_updates
+
+        for trigger in (search_btn.click, search_text.submit):
+            trigger(admit_event("ui"), None, None, queue=False, show_api=False).success(
+                handle_search,
+                inputs=[search_text, *filter_dropdowns],
+                outputs=[results_markdown, *filter_dropdowns],
+                **concurrency_settings("ui")
+            )
+
 """
     Main Gradio UI
 """
@@ -141,25 +323,46 @@ with gr.Blocks(theme=gr.themes.Default(primary_hue=gr.themes.colors.pink
 
     gr.Markdown("# Croissant Chatbot") # Title of the app
 
-    # Create a CroissantChatbotManager instance
-    chatbot_instance = CroissantChatbotManager() 
+    # The session ID of the tab. It is also kept in the session storage of the tab, which is not shared with other
+    # tabs, so the session is resumed when the page is reloaded.
+    session_id = gr.State(None)
+    stored_session_id = gr.Textbox(visible=False)
 
     # Chatbot UI
     chatbot_ui = create_chatbot_ui()
 
     # Prompt Input
-    prompt = create_prompt_input(chatbot_instance, chatbot_ui)
+    prompt = create_prompt_input(session_id, chatbot_ui)
 
     # Tabs for different functionalities
     with gr.Tab("Metadata Dropdown"):
-        create_metadata_attributes_dropdown(chatbot_instance)
+        create_metadata_attributes_dropdown(session_id)
+
+    with gr.Tab("Hugging Face Datasets"):
+        create_HF_dataset_dropdown(session_id, chatbot_ui)
 
     with gr.Tab("Control Buttons"):
         # Control Buttons
-        create_control_buttons(chatbot_instance, chatbot_ui)
+        create_control_buttons(session_id, chatbot_ui)
 
         # Download Metadata Button
-        create_download_metadata_button(chatbot_instance)
+        create_download_metadata_button(session_id)
+
+    with gr.Tab("Search Annotations"):
+        create_annotation_search()
+
+    # Create a session ID for a new tab, or show the chat of the session of a reloaded tab
+    demo.load(
+        restore_session, inputs=[stored_session_id], outputs=[session_id, chatbot_ui, stored_session_id],
+        js=f"() => sessionStorage.getItem('{SESSION_STORAGE_KEY}')", **concurrency_settings("ui")
+    ).then(None, inputs=[stored_session_id], js=f"(session) => {{ sessionStorage.setItem('{SESSION_STORAGE_KEY}', session); }}")
+    demo.unload(remove_session)
+
+    # Metrics on the queue depth and wait times of every concurrency group
+    gr.api(load_stats, api_name="load_stats", queue=False)
+
+# A hard limit on the Gradio queue. The concurrency groups normally reject events with a busy message before it is reached.
+demo.queue(max_size=QUEUE_MAX_SIZE)
 
 if __name__ == "__main__":
     demo.launch() 
\ No newline at end of file
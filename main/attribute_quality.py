@@ -1,12 +1,19 @@
 # attribute_quality.py
 
 # necessary imports
+import re
 import spacy  
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
 from lexical_diversity import lex_div as ld 
-from typing import Tuple, Dict
-from .constants import METADATA_ATTRIBUTES
+from typing import Tuple, Dict, List
+from .constants import METADATA_ATTRIBUTES, SPACY_MODEL_NAME
+from .nlp_cache import doc_cache
+from .nlp_pool import get_nlp_pool
 
-nlp = spacy.load("en_core_web_sm")
+nlp = spacy.load(SPACY_MODEL_NAME)
+
+# Threads that run description checks with a deadline and finish them in the background
+description_check_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="description-check")
 
 class AttributeQualityChecker:
     """A class to assess the quality of metadata attribute values beyond basic validation."""
@@ -17,13 +24,23 @@ class AttributeQualityChecker:
         self.keyword_similarity_threshold = 1 # 1 = All keywords must be unique
         self.sentence_variety_threshold = 2  # Minimum unique sentence structures
         self.mattr_window = 15  # Window size for MATTR calculation
+        self.nlp_pool = get_nlp_pool()  # Worker processes for spaCy (None to run in-process)
+        self.max_description_length = 5000  # Longer descriptions are sampled before running spaCy
+        self.description_check_deadline = 2.0  # Seconds to wait for spaCy (None = no deadline)
+        self.batch_chunk_size = 1000  # Number of records parsed together by the batch quality check
+        self.pending_description_check = None  # Future of the full check of the last description that missed the deadline
 
-    def check_description(self, value: str) -> Tuple[bool, str]:
+    def check_description(self, value: str, use_deadline: bool = True) -> Tuple[bool, str]:
         """
         Assess the quality of the dataset description.
 
+        Long descriptions are sampled, and if spaCy does not finish before the deadline a preliminary verdict
+        without the sentence variety is returned, while the full check carries on in the background
+        (see pending_description_check).
+
         Args:
             value: The description text to be evaluated.
+            use_deadline: Whether to return a preliminary verdict when the deadline is reached.
 
         Returns:
             A Tuple containing a boolean indicating quality and a message.
@@ -34,7 +51,14 @@ class AttributeQualityChecker:
             lexical_diversity, lex_error = self.calculate_lexical_diversity(value)
             if lex_error:
                 return False, lex_error
-            sentence_variety, sen_error = self.calculate_sentence_variety(value)
+
+            # Only a sample of the sentences of a very long description is run through spaCy
+            analysed_text, sampled_sentences, total_sentences = self.sample_description(value)
+            if use_deadline:
+                sentence_variety, sen_error, pending = self.calculate_sentence_variety_within_deadline(analysed_text)
+            else:
+                sentence_variety, sen_error = self.calculate_sentence_variety(analysed_text)
+                pending = None
             if sen_error:
                 return False, sen_error
             
@@ -45,16 +69,113 @@ class AttributeQualityChecker:
             if lexical_diversity < self.lexical_diversity_threshold:
                 valid = False
                 message = "The description lacks lexical diversity and may be repetitive. "
-            if sentence_variety < self.sentence_variety_threshold:
+            # The sentence variety is unknown until spaCy finishes
+            if sentence_variety is not None and sentence_variety < self.sentence_variety_threshold:
                 valid = False
                 message = message + "The description has limited sentence variety and may be monotonous."
             
             if valid:
-                message = "Description quality is acceptable."
+                message = "Description quality is acceptable." if pending is None else "No issues were found so far."
+
+            # Tell the user when the verdict is not based on the whole description
+            notes = []
+            if sampled_sentences < total_sentences:
+                notes.append(f"The description is long, so only a sample of {sampled_sentences} of its {total_sentences} sentences was analysed.")
+            elif analysed_text != value:
+                notes.append(f"The description is long, so only its first {len(analysed_text)} characters were analysed.")
+            if pending is not None:
+                self.pending_description_check = self.refine_description_check(value, pending)
+                notes.append("This is a preliminary result because the analysis of the sentence variety takes longer. Any issue it finds will be shown with your next message.")
+            if notes:
+                message = f"{message.rstrip()} {' '.join(notes)}"
 
             return valid, message
         except Exception as e:
             return False, f"Unexpected error in description quality check: {str(e)}"
+
+    def refine_description_check(self, value: str, pending: Future | None = None) -> Future:
+        """
+        Run the full description check, without a deadline, in the background.
+
+        Args:
+            value: The description text to be evaluated.
+            pending: The Future of the sentence variety calculation that missed the deadline, if any.
+                The full check runs when it is done, so spaCy does not parse the description twice.
+
+        Returns:
+            A Future that resolves to the Tuple returned by check_description.
+        """
+        if pending is None:
+            return description_check_executor.submit(self.check_description, value, False)
+
+        refined = Future()
+        def finish_check(_):
+            # The sentence structures are cached by now, so the full check is quick
+            try:
+                refined.set_result(self.check_description(value, False))
+            except Exception as e:
+                refined.set_exception(e)
+        pending.add_done_callback(finish_check)
+        return refined
+
+    def sample_description(self, value: str) -> Tuple[str, int, int]:
+        """
+        Sample evenly spaced sentences from a description that is longer than max_description_length.
+
+        Args:
+            value: The description text to be sampled.
+
+        Returns:
+            A Tuple containing the text to analyse, the number of sampled sentences,
+            and the total number of sentences in the description.
+        """
+        sentences = self.split_sentences(value)
+        if len(value) <= self.max_description_length or not sentences:
+            return value, len(sentences), len(sentences)
+
+        average_sentence_length = len(value) / len(sentences)
+        sample_size = max(1, int(self.max_description_length // average_sentence_length))
+        step = len(sentences) / sample_size
+        sampled_sentences = [sentences[int(i * step)] for i in range(sample_size)]
+        # Truncate in case a single sentence is longer than the limit
+        sample = " ".join(sampled_sentences)[:self.max_description_length]
+        return sample, len(sampled_sentences), len(sentences)
+
+    def calculate_sentence_variety_within_deadline(self, value: str) -> Tuple[int | None, str | None, Future | None]:
+        """
+        Calculate the sentence variety, unless spaCy misses the deadline.
+
+        Args:
+            value: The text for which sentence variety is to be calculated.
+
+        Returns:
+            A Tuple containing the count of unique sentence structures (None if spaCy missed the deadline),
+            an error message (None if no error), and the Future of the calculation if it is still running.
+        """
+        # Cached texts and checks without a deadline are calculated straight away
+        if self.description_check_deadline is None or doc_cache.contains(doc_cache.make_key(nlp, value)):
+            sentence_variety, error = self.calculate_sentence_variety(value)
+            return sentence_variety, error, None
+
+        future = description_check_executor.submit(self.calculate_sentence_variety, value)
+        try:
+            sentence_variety, error = future.result(timeout=self.description_check_deadline)
+            return sentence_variety, error, None
+        except TimeoutError:
+            # The calculation carries on in the background and caches its result for the full check
+            return None, None, future
+
+    def split_sentences(self, value: str) -> list[str]:
+        """
+        Split a text into sentences with a regular expression, which is much cheaper than spaCy.
+
+        Args:
+            value: The text to split.
+
+        Returns:
+            A list of the sentences in the text.
+        """
+        return [sentence for sentence in re.split(r"(?<=[.!?])\s+", value.strip()) if sentence]
     
     def calculate_lexical_diversity(self, value: str) -> Tuple[float, str | None]:
         """
@@ -90,12 +211,8 @@ class AttributeQualityChecker:
             and the second element is an error message (None if no error).
         """
         try:
-            sentence_structures = []
-            for sent in nlp(value).sents:
-                structure, error = self.get_sentence_structure(sent)
-                if error:
-                    return 0, f"Error in sentence variety calculation: {error}"  # Return the error immediately
-                sentence_structures.append(structure)
+            # The sentence structures are cached so the same text is only parsed once
+            sentence_structures = doc_cache.get_features(nlp, value, pool=self.nlp_pool)["sentence_structures"]
 
             unique_structures = len(set(sentence_structures))  # Count unique sentence structures
             return unique_structures, None  # No error
@@ -188,3 +305,34 @@ class AttributeQualityChecker:
             return issues
         except Exception as e:
             return {"error": f"Error in checking quality of all attributes: {str(e)}"}
+
+    def check_quality_of_all_attributes_batch(self, metadata_list: List[Dict[str, str]], batch_size: int = 64, n_process: int = 1) -> List[Dict[str, str]]:
+        """
+        Evaluate the attributes of many metadata records, parsing all descriptions with nlp.pipe.
+
+        Args:
+            metadata_list: A list of metadata Dictionaries (e.g. the files in the annotations folder).
+            batch_size: The number of descriptions spaCy processes in each batch.
+            n_process: The number of processes spaCy uses.
+
+        Returns:
+            A list of issue Dictionaries, one for each metadata record in the same order.
+        """
+        results = []
+        # Records are processed in chunks so the parsed descriptions stay in the cache until they are checked
+        for start in range(0, len(metadata_list), self.batch_chunk_size):
+            chunk = metadata_list[start:start + self.batch_chunk_size]
+            try:
+                # Parse every description of the chunk in one pass, as check_description would sample it
+                texts = [
+                    self.sample_description(metadata["description"])[0]
+                    for metadata in chunk
+                    if isinstance(metadata.get("description"), str)
+                ]
+                doc_cache.get_features_batch(nlp, texts, batch_size=batch_size, n_process=n_process)
+            except Exception as e:
+                results.extend({"error": f"Error in batch quality check: {str(e)}"} for _ in chunk)
+                continue
+            # The descriptions are now cached, so the per-record checks do not run spaCy again
+            results.extend(self.check_quality_of_all_attributes(metadata) for metadata in chunk)
+        return results
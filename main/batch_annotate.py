@@ -0,0 +1,333 @@
+# batch_annotate.py
+
+# necessary imports
+import argparse
+import csv
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List
+from tqdm import tqdm
+from .attribute_quality import AttributeQualityChecker
+from .constants import METADATA_ATTRIBUTES, BATCH_LLM_ATTRIBUTES, BATCH_QUALITY_CHUNK_SIZE
+from .llm import fill_missing_metadata
+from .metadata_manager import MetadataManager
+from .validation import MetadataValidator
+
+"""
+    This module annotates many Hugging Face datasets without the chat UI:
+        python -m main.batch_annotate dataset_selection/huggingface_datasets.csv --workers 8 --llm-workers 2
+    For every dataset ID it fetches the metadata (find_dataset_info), asks the LLM for the missing descriptive
+    attributes in one request, validates the metadata, and finalises it to the annotations folder. Datasets are
+    processed concurrently, with a separate limit on concurrent LLM requests. The quality of the metadata of every
+    chunk of BATCH_QUALITY_CHUNK_SIZE datasets is checked together, so spaCy parses their descriptions in one pass.
+    The result of every dataset is appended to a checkpoint file, so an interrupted run resumes where it stopped.
+    Datasets that were finalised or do not exist are not processed again; the ones whose lookup failed (e.g. a
+    network or Hub error) or that could not be finalised are retried.
+    At the end, a summary shows how often each attribute was missing, invalid or had quality issues.
+"""
+
+DEFAULT_CHECKPOINT_PATH = os.path.join("batch", "checkpoint.jsonl")
+# The statuses of the datasets that are not processed again when a run resumes
+COMPLETED_STATUSES = ("finalised", "not_found")
+
+
+def read_dataset_ids(path: str, column: str = "Name") -> List[str]:
+    """
+    Read dataset IDs from a CSV file (e.g. dataset_selection/huggingface_datasets.csv) or a text file with one ID per line.
+
+    Args:
+        path: The path of the file.
+        column: The CSV column that contains the dataset IDs. The first column is used if it does not exist.
+
+    Returns:
+        The dataset IDs in the order of the file, without duplicates.
+    """
+    with open(path, "r", encoding="utf-8", newline="") as file:
+        if path.endswith(".csv"):
+            reader = csv.DictReader(file)
+            key = column if column in (reader.fieldnames or []) else (reader.fieldnames or [None])[0]
+            values = [row.get(key) or "" for row in reader]
+        else:
+            values = file.read().splitlines()
+    dataset_ids = [value.strip() for value in values if value.strip() and value.strip() != "Unknown"]
+    return list(dict.fromkeys(dataset_ids))
+
+
+def load_checkpoint(checkpoint_path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Load the results of the datasets that were already processed.
+
+    Args:
+        checkpoint_path: The path of the checkpoint file.
+
+    Returns:
+        A Dictionary mapping a dataset ID to its result.
+    """
+    results = {}
+    if not os.path.exists(checkpoint_path):
+        return results
+    with open(checkpoint_path, "r", encoding="utf-8") as file:
+        for line in file:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue  # A line cut short by an interrupted run
+            results[result["dataset_id"]] = result
+    return results
+
+
+class CheckpointWriter:
+    """Appends the result of every dataset to the checkpoint file as one JSON line, shared by all threads."""
+
+    def __init__(self, checkpoint_path: str):
+        directory = os.path.dirname(os.path.abspath(checkpoint_path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(checkpoint_path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, result: Dict[str, Any]):
+        """
+        Append the result of a dataset.
+
+        Args:
+            result: The result Dictionary of the dataset.
+        """
+        with self._lock:
+            self._file.write(json.dumps(result, default=str) + "\n")
+            self._file.flush()
+
+    def close(self):
+        """
+        Close the checkpoint file.
+        """
+        with self._lock:
+            self._file.close()
+
+
+def annotate_dataset(dataset_id: str, use_llm: bool = True, llm_semaphore: threading.Semaphore | None = None,
+                     save: bool = True, check_quality: bool = True) -> Dict[str, Any]:
+    """
+    Fetch, complete, validate and finalise the metadata of one dataset.
+
+    Args:
+        dataset_id: The ID of the Hugging Face dataset.
+        use_llm: Whether to ask the LLM for the missing descriptive attributes.
+        llm_semaphore: A semaphore that limits the concurrent LLM requests.
+        save: Whether to save the final metadata to the annotations folder.
+        check_quality: Whether to check the quality of the metadata. If not, the metadata is returned under
+            "metadata" so the caller can check it together with the metadata of other datasets (see check_quality_of_results).
+
+    Returns:
+        A Dictionary containing the status of the dataset, the attributes filled by the LLM, the missing attributes,
+        the validation errors and quality issues of each attribute, and the saved annotations with nearly the same
+        description or citation.
+    """
+    result = {"dataset_id": dataset_id, "status": "failed", "filled": [], "missing": [], "errors": {}, "issues": {}}
+    manager = MetadataManager()
+    metadata, found = manager.find_dataset_info(dataset_id)
+    if not found:
+        # find_dataset_info returns the error of a failed lookup, and None if the dataset does not exist
+        if metadata and metadata.get("error"):
+            result["status"] = "error"
+            result["error"] = metadata["error"]
+        else:
+            result["status"] = "not_found"
+            result["error"] = f"Dataset {dataset_id} was not found."
+        return result
+
+    # Ask the LLM for all missing descriptive attributes of the dataset in one request
+    missing = [attribute for attribute in BATCH_LLM_ATTRIBUTES if not manager.metadata.get(attribute)]
+    filled = {}
+    if use_llm and missing:
+        try:
+            if llm_semaphore is not None:
+                with llm_semaphore:
+                    filled = fill_missing_metadata(manager.metadata, missing)
+            else:
+                filled = fill_missing_metadata(manager.metadata, missing)
+        except Exception as e:
+            result["llm_error"] = str(e)
+
+    # Values from the LLM that are not valid are not kept
+    filled_errors = MetadataValidator().validate_all_attributes(filled) if filled else {}
+    filled = {attribute: value for attribute, value in filled.items() if attribute not in filled_errors}
+    manager.update_metadata(filled)
+    result["filled"] = sorted(filled)
+
+    result["missing"] = [attribute for attribute in METADATA_ATTRIBUTES if not manager.metadata.get(attribute)]
+    result["errors"] = MetadataValidator().validate_all_attributes(manager.metadata)
+    if check_quality:
+        check_quality_of_results([result], [manager.metadata])
+    else:
+        result["metadata"] = dict(manager.metadata)
+
+    success, final_metadata = manager.finalise_metadata(save=save)
+    if success:
+        result["status"] = "finalised"
+        result["near_duplicates"] = manager.near_duplicates
+    else:
+        result["error"] = final_metadata.get("error")
+    return result
+
+
+def check_quality_of_results(results: List[Dict[str, Any]], metadata_list: List[Dict[str, str]]):
+    """
+    Check the quality of the metadata of many datasets at once and add the issues to their results.
+
+    Args:
+        results: The result Dictionaries of the datasets.
+        metadata_list: The metadata Dictionaries of the datasets, in the same order.
+    """
+    # Without the deadline of the chat, so the issues are never preliminary
+    checker = AttributeQualityChecker()
+    checker.description_check_deadline = None
+    for result, issues in zip(results, checker.check_quality_of_all_attributes_batch(metadata_list)):
+        result["issues"] = issues
+
+
+def summarise(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Summarise the results of a batch.
+
+    Args:
+        results: The result Dictionaries of the datasets.
+
+    Returns:
+        A Dictionary containing the number of datasets with each status, for each attribute, the rates of datasets
+        where it was missing, invalid or had quality issues and the number of values filled by the LLM, and the
+        number of datasets with near-duplicates among the saved annotations.
+    """
+    statuses = {}
+    for result in results:
+        statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+
+    found = [result for result in results if result["status"] not in ("not_found", "error")]
+    attributes = {}
+    for attribute in METADATA_ATTRIBUTES:
+        missing = sum(attribute in result["missing"] for result in found)
+        invalid = sum(attribute in result["errors"] for result in found)
+        issues = sum(attribute in result["issues"] for result in found)
+        failed = sum(
+            attribute in result["missing"] or attribute in result["errors"] or attribute in result["issues"]
+            for result in found
+        )
+        attributes[attribute] = {
+            "missing_rate": missing / len(found) if found else 0.0,
+            "invalid_rate": invalid / len(found) if found else 0.0,
+            "issue_rate": issues / len(found) if found else 0.0,
+            "failure_rate": failed / len(found) if found else 0.0,
+            "filled_by_llm": sum(attribute in result["filled"] for result in found),
+        }
+    near_duplicates = sum(bool(result.get("near_duplicates")) for result in results)
+    return {"datasets": len(results), "statuses": statuses, "attributes": attributes, "near_duplicates": near_duplicates}
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    """
+    Format a summary as a table.
+
+    Args:
+        summary: A Dictionary returned by summarise.
+
+    Returns:
+        The summary as text.
+    """
+    statuses = ", ".join(f"{status}: {count}" for status, count in sorted(summary["statuses"].items()))
+    lines = [f"Datasets: {summary['datasets']} ({statuses})", "",
+             f"{'attribute':<16}{'missing':>9}{'invalid':>9}{'issues':>9}{'failed':>9}{'LLM':>6}"]
+    for attribute, stats in summary["attributes"].items():
+        lines.append(
+            f"{attribute:<16}{stats['missing_rate']:>9.1%}{stats['invalid_rate']:>9.1%}"
+            f"{stats['issue_rate']:>9.1%}{stats['failure_rate']:>9.1%}{stats['filled_by_llm']:>6}"
+        )
+    if summary.get("near_duplicates"):
+        lines += ["", f"{summary['near_duplicates']} datasets have near-duplicate descriptions or citations, "
+                      "run python -m main.annotation_index duplicates to review them."]
+    return "\n".join(lines)
+
+
+def annotate_datasets(dataset_ids: List[str], checkpoint_path: str = DEFAULT_CHECKPOINT_PATH, workers: int = 8,
+                      llm_workers: int = 2, use_llm: bool = True, save: bool = True, progress: bool = True) -> List[Dict[str, Any]]:
+    """
+    Annotate many datasets concurrently, skipping the datasets the checkpoint file records as finalised or not found.
+    The datasets are processed in chunks, and the results of a chunk are written to the checkpoint file after the
+    quality of its metadata was checked in one pass.
+
+    Args:
+        dataset_ids: The IDs of the Hugging Face datasets.
+        checkpoint_path: The path of the checkpoint file.
+        workers: The number of datasets processed at once.
+        llm_workers: The number of concurrent LLM requests.
+        use_llm: Whether to ask the LLM for the missing descriptive attributes.
+        save: Whether to save the final metadata to the annotations folder.
+        progress: Whether to show a progress bar.
+
+    Returns:
+        The result Dictionaries of all datasets, including the ones from the checkpoint file, in the order of dataset_ids.
+    """
+    done = load_checkpoint(checkpoint_path)
+    todo = [
+        dataset_id for dataset_id in dataset_ids
+        if dataset_id not in done or done[dataset_id]["status"] not in COMPLETED_STATUSES
+    ]
+    llm_semaphore = threading.BoundedSemaphore(max(1, llm_workers))
+    checkpoint = CheckpointWriter(checkpoint_path)
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor, \
+             tqdm(total=len(dataset_ids), initial=len(dataset_ids) - len(todo), disable=not progress, unit="dataset") as progress_bar:
+            for start in range(0, len(todo), BATCH_QUALITY_CHUNK_SIZE):
+                futures = {
+                    executor.submit(annotate_dataset, dataset_id, use_llm, llm_semaphore, save, False): dataset_id
+                    for dataset_id in todo[start:start + BATCH_QUALITY_CHUNK_SIZE]
+                }
+                results = []
+                for future in as_completed(futures):
+                    dataset_id = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = {"dataset_id": dataset_id, "status": "failed", "error": str(e),
+                                  "filled": [], "missing": [], "errors": {}, "issues": {}}
+                    results.append(result)
+                    progress_bar.update(1)
+
+                # The metadata of the datasets that were found is checked in one pass, and not saved to the checkpoint
+                checked = [result for result in results if "metadata" in result]
+                check_quality_of_results(checked, [result.pop("metadata") for result in checked])
+                for result in results:
+                    done[result["dataset_id"]] = result
+                    checkpoint.write(result)
+    finally:
+        checkpoint.close()
+    return [done[dataset_id] for dataset_id in dataset_ids if dataset_id in done]
+
+
+def main():
+    """
+    Run the batch annotation from the command line.
+    """
+    parser = argparse.ArgumentParser(description="Annotate many Hugging Face datasets without the chat UI.")
+    parser.add_argument("input", help="A CSV file of dataset IDs (e.g. dataset_selection/huggingface_datasets.csv) or a text file with one ID per line.")
+    parser.add_argument("--column", default="Name", help="The CSV column that contains the dataset IDs.")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT_PATH, help="The file that records the processed datasets, to resume an interrupted run.")
+    parser.add_argument("--workers", type=int, default=8, help="The number of datasets processed at once.")
+    parser.add_argument("--llm-workers", type=int, default=2, help="The number of concurrent LLM requests.")
+    parser.add_argument("--no-llm", action="store_true", help="Do not ask the LLM for missing attributes.")
+    parser.add_argument("--dry-run", action="store_true", help="Do not save the final metadata to the annotations folder.")
+    parser.add_argument("--summary", help="Also write the summary as JSON to this file.")
+    args = parser.parse_args()
+
+    dataset_ids = read_dataset_ids(args.input, args.column)
+    results = annotate_datasets(dataset_ids, args.checkpoint, args.workers, args.llm_workers,
+                                use_llm=not args.no_llm, save=not args.dry_run)
+    summary = summarise(results)
+    print(format_summary(summary))
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as file:
+            json.dump(summary, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
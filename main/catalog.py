@@ -0,0 +1,372 @@
+# catalog.py
+
+# necessary imports
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Iterable, Tuple
+from .constants import CATALOG_PATH, CATALOG_ENRICHED_MAX_AGE
+from .serialization import dumps
+
+"""
+    This module contains a local catalog of Hugging Face dataset metadata stored in SQLite.
+    The catalog is keyed by the lowercased dataset ID and is consulted before the Hugging Face Hub,
+    so popular datasets resolve instantly, even when the Hub is unreachable.
+
+    The catalog is filled from the files written by analysis/extract_huggingface_metadata.py (hf_metadata/),
+    the CSV written by dataset_selection/select_datasets.py, and every successful Hub lookup.
+    Only the rows of Hub lookups are enriched with the dataset card and git tags, so only they are served instead of
+    the Hub, for CATALOG_ENRICHED_MAX_AGE seconds. The other rows are used when the Hub cannot be reached.
+    A Hub lookup records the commit (sha) of the dataset. When a later lookup finds another commit, the row is
+    replaced instead of merged, so attributes merged in from other sources for an older version are not kept.
+    To rebuild it run:
+        python -m main.catalog refresh
+"""
+
+BASE_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_HF_METADATA_FOLDER = os.path.join(BASE_DIRECTORY, "hf_metadata")
+DEFAULT_DATASETS_CSV = os.path.join(BASE_DIRECTORY, "dataset_selection", "huggingface_datasets.csv")
+
+
+class DatasetCatalog:
+    """A thread-safe SQLite catalog of Hugging Face dataset metadata."""
+
+    def __init__(self, db_path: str = CATALOG_PATH):
+        self.db_path = db_path
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS datasets (
+                    dataset_key TEXT PRIMARY KEY,
+                    dataset_id TEXT NOT NULL,
+                    metadata TEXT NOT NULL,
+                    last_modified TEXT,
+                    updated_at REAL NOT NULL,
+                    enriched_at REAL,
+                    sha TEXT
+                )
+                """
+            )
+            # Catalogs created before rows were marked as enriched get the columns, with no row enriched
+            columns = [row[1] for row in self._connection.execute("PRAGMA table_info(datasets)")]
+            if "enriched_at" not in columns:
+                self._connection.execute("ALTER TABLE datasets ADD COLUMN enriched_at REAL")
+            if "sha" not in columns:
+                self._connection.execute("ALTER TABLE datasets ADD COLUMN sha TEXT")
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    name TEXT PRIMARY KEY,
+                    state TEXT NOT NULL
+                )
+                """
+            )
+
+    def get(self, dataset_id: str) -> Dict[str, str] | None:
+        """
+        Get the metadata of a dataset.
+
+        Args:
+            dataset_id: The ID of the dataset (case-insensitive).
+
+        Returns:
+            The metadata Dictionary of the dataset, or None if it is not in the catalog.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT metadata FROM datasets WHERE dataset_key = ?", (dataset_id.strip().lower(),)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_enriched(self, dataset_id: str, max_age: float = CATALOG_ENRICHED_MAX_AGE) -> Dict[str, str] | None:
+        """
+        Get the metadata of a dataset if it was enriched by a Hub lookup recently enough to be served instead of the Hub.
+
+        Args:
+            dataset_id: The ID of the dataset (case-insensitive).
+            max_age: The number of seconds after the lookup that the metadata is served.
+
+        Returns:
+            The metadata Dictionary of the dataset, or None if it is not in the catalog, not enriched or too old.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT metadata, enriched_at FROM datasets WHERE dataset_key = ?", (dataset_id.strip().lower(),)
+            ).fetchone()
+        if not row or row[1] is None or time.time() - row[1] > max_age:
+            return None
+        return json.loads(row[0])
+
+    def upsert(self, dataset_id: str, metadata: Dict[str, str], last_modified: str | None = None, enriched: bool = False,
+               sha: str | None = None):
+        """
+        Add or update the metadata of a dataset. Non-empty values are merged into the existing metadata.
+
+        Args:
+            dataset_id: The ID of the dataset.
+            metadata: The metadata attributes of the dataset.
+            last_modified: When the dataset was last modified on the Hub, if known.
+            enriched: Whether the metadata comes from a Hub lookup enriched with the dataset card and git tags.
+            sha: The commit of the dataset the metadata was read from, if known. Metadata of another commit than
+                the one in the catalog replaces the existing metadata instead of being merged into it.
+        """
+        self.upsert_many([(dataset_id, metadata, last_modified, sha)], enriched=enriched)
+
+    def upsert_many(self, rows: Iterable[Tuple], enriched: bool = False) -> int:
+        """
+        Add or update the metadata of many datasets in one transaction.
+
+        Args:
+            rows: Tuples of (dataset ID, metadata, last modified), or (dataset ID, metadata, last modified, sha).
+            enriched: Whether the metadata comes from Hub lookups enriched with the dataset card and git tags.
+
+        Returns:
+            The number of datasets written.
+        """
+        count = 0
+        with self._lock, self._connection:
+            for dataset_id, metadata, last_modified, *version in rows:
+                sha = version[0] if version else None
+                key = dataset_id.strip().lower()
+                row = self._connection.execute(
+                    "SELECT metadata, last_modified, enriched_at, sha FROM datasets WHERE dataset_key = ?", (key,)
+                ).fetchone()
+                # The metadata of a new commit replaces the row, including the attributes merged in for an older one
+                new_version = sha is not None and (row is None or row[3] != sha)
+                merged = json.loads(row[0]) if row and not new_version else {}
+                merged.update({attribute: value for attribute, value in metadata.items() if value})
+                if enriched:
+                    enriched_at = time.time()
+                elif row and last_modified and row[1] and last_modified != row[1]:
+                    enriched_at = None  # The dataset changed on the Hub since it was enriched
+                else:
+                    enriched_at = row[2] if row else None
+                self._connection.execute(
+                    """
+                    INSERT OR REPLACE INTO datasets (dataset_key, dataset_id, metadata, last_modified, updated_at, enriched_at, sha)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (key, dataset_id.strip(), json.dumps(merged), last_modified or (row[1] if row else None), time.time(),
+                     enriched_at, sha or (row[3] if row else None)),
+                )
+                count += 1
+        return count
+
+    def get_last_modified(self, dataset_id: str) -> str | None:
+        """
+        Get when a dataset was last modified on the Hub, as recorded in the catalog.
+
+        Args:
+            dataset_id: The ID of the dataset (case-insensitive).
+
+        Returns:
+            The last modified timestamp, or None if it is unknown.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT last_modified FROM datasets WHERE dataset_key = ?", (dataset_id.strip().lower(),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_last_modified_many(self, dataset_ids: List[str]) -> Dict[str, str | None]:
+        """
+        Get when many datasets were last modified on the Hub, as recorded in the catalog.
+
+        Args:
+            dataset_ids: The IDs of the datasets (case-insensitive).
+
+        Returns:
+            A Dictionary mapping each lowercased dataset ID in the catalog to its last modified timestamp.
+        """
+        keys = [dataset_id.strip().lower() for dataset_id in dataset_ids]
+        last_modified = {}
+        with self._lock:
+            # SQLite limits the number of parameters in a query, so the IDs are looked up in chunks
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._connection.execute(
+                    f"SELECT dataset_key, last_modified FROM datasets WHERE dataset_key IN ({', '.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                last_modified.update(rows)
+        return last_modified
+
+    def get_sync_state(self, name: str) -> Dict | None:
+        """
+        Get the saved state of a sync job.
+
+        Args:
+            name: The name of the sync job.
+
+        Returns:
+            The state Dictionary, or None if the job has no saved state.
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT state FROM sync_state WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_sync_state(self, name: str, state: Dict | None):
+        """
+        Save the state of a sync job, or remove it.
+
+        Args:
+            name: The name of the sync job.
+            state: The state Dictionary, or None to remove the saved state.
+        """
+        with self._lock, self._connection:
+            if state is None:
+                self._connection.execute("DELETE FROM sync_state WHERE name = ?", (name,))
+            else:
+                self._connection.execute("INSERT OR REPLACE INTO sync_state (name, state) VALUES (?, ?)", (name, json.dumps(state)))
+
+    def list_dataset_ids(self) -> List[str]:
+        """
+        List the IDs of all datasets in the catalog.
+
+        Returns:
+            A sorted list of dataset IDs.
+        """
+        with self._lock:
+            rows = self._connection.execute("SELECT dataset_id FROM datasets ORDER BY dataset_key").fetchall()
+        return [row[0] for row in rows]
+
+    def count(self) -> int:
+        """
+        Count the datasets in the catalog.
+
+        Returns:
+            The number of datasets.
+        """
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM datasets").fetchone()[0]
+
+    def import_hf_metadata_folder(self, folder: str = DEFAULT_HF_METADATA_FOLDER) -> int:
+        """
+        Import the files written by analysis/extract_huggingface_metadata.py.
+
+        Args:
+            folder: The folder containing the *_hf.json files.
+
+        Returns:
+            The number of datasets imported.
+        """
+        if not os.path.isdir(folder):
+            return 0
+        rows = []
+        for filename in sorted(os.listdir(folder)):
+            if not filename.endswith("_hf.json"):
+                continue
+            with open(os.path.join(folder, filename), "r", encoding="utf-8") as file:
+                metadata = json.load(file)
+            if metadata.get("name"):
+                rows.append((metadata["name"], metadata, None))
+        return self.upsert_many(rows)
+
+    def import_datasets_csv(self, csv_path: str = DEFAULT_DATASETS_CSV) -> int:
+        """
+        Import the CSV of popular datasets written by dataset_selection/select_datasets.py.
+
+        Args:
+            csv_path: The path of the CSV file.
+
+        Returns:
+            The number of datasets imported.
+        """
+        if not os.path.isfile(csv_path):
+            return 0
+        rows = []
+        with open(csv_path, "r", encoding="utf-8", newline="") as file:
+            for record in csv.DictReader(file):
+                dataset_id = (record.get("Name") or "").strip()
+                if not dataset_id:
+                    continue
+                metadata = {
+                    "name": dataset_id,
+                    "url": record.get("Link", ""),
+                    "task": record.get("Dataset Tasks", ""),
+                    "modality": record.get("Modality", ""),
+                    "date_modified": record.get("Last Modified", ""),
+                }
+                # "Unknown" is written by select_datasets.py when a value is missing
+                metadata = {attribute: value for attribute, value in metadata.items() if value != "Unknown"}
+                rows.append((dataset_id, metadata, None))
+        return self.upsert_many(rows)
+
+    def refresh(self, hf_metadata_folder: str = DEFAULT_HF_METADATA_FOLDER, csv_path: str = DEFAULT_DATASETS_CSV) -> int:
+        """
+        Import the CSV of popular datasets and the extracted Hugging Face metadata files.
+
+        Args:
+            hf_metadata_folder: The folder containing the *_hf.json files.
+            csv_path: The path of the CSV file.
+
+        Returns:
+            The number of datasets in the catalog.
+        """
+        # The CSV is imported first so the richer extracted metadata is merged on top of it
+        self.import_datasets_csv(csv_path)
+        self.import_hf_metadata_folder(hf_metadata_folder)
+        return self.count()
+
+    def close(self):
+        """
+        Close the database connection.
+        """
+        with self._lock:
+            self._connection.close()
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> DatasetCatalog:
+    """
+    Get the shared catalog, filling it from the files in the repository the first time it is created.
+
+    Returns:
+        The shared DatasetCatalog.
+    """
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = DatasetCatalog()
+            if _catalog.count() == 0:
+                _catalog.refresh()
+        return _catalog
+
+
+def main():
+    """Command line interface for the catalog."""
+    parser = argparse.ArgumentParser(description="Manage the local catalog of Hugging Face dataset metadata.")
+    parser.add_argument("--db", default=CATALOG_PATH, help="Path of the catalog database.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    refresh_parser = subparsers.add_parser("refresh", help="Import the extracted metadata files and the datasets CSV.")
+    refresh_parser.add_argument("--hf-metadata-folder", default=DEFAULT_HF_METADATA_FOLDER)
+    refresh_parser.add_argument("--csv", default=DEFAULT_DATASETS_CSV)
+
+    get_parser = subparsers.add_parser("get", help="Print the metadata of a dataset.")
+    get_parser.add_argument("dataset_id")
+
+    args = parser.parse_args()
+    catalog = DatasetCatalog(args.db)
+    if args.command == "refresh":
+        count = catalog.refresh(args.hf_metadata_folder, args.csv)
+        print(f"The catalog at {args.db} contains {count} datasets.")
+    elif args.command == "get":
+        metadata = catalog.get(args.dataset_id)
+        print(dumps(metadata, indent=True) if metadata else f"'{args.dataset_id}' is not in the catalog.")
+    catalog.close()
+
+
+if __name__ == "__main__":
+    main()
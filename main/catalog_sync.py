@@ -0,0 +1,147 @@
+# catalog_sync.py
+
+# necessary imports
+import argparse
+from typing import Dict, Iterator, List, Tuple
+from huggingface_hub import DatasetInfo, constants
+from huggingface_hub.utils import http_backoff, hf_raise_for_status
+from .catalog import DatasetCatalog
+from .constants import CATALOG_PATH, CATALOG_SYNC_PAGE_SIZE, HUB_REQUEST_TIMEOUT
+from .dataset_card import extract_metadata_from_front_matter
+from .hub_client import extract_metadata_from_dataset_info
+
+"""
+    This module syncs the local catalog with the dataset listing of the Hugging Face Hub.
+    The listing is requested page by page with full=true, so every page already contains the tags
+    and dataset card front-matter of its datasets and no dataset has to be fetched on its own.
+    Datasets whose last modified time matches the catalog are skipped, and the URL of the next page
+    is saved in the catalog after every page, so an interrupted sync resumes where it stopped.
+    To run it:
+        python -m main.catalog_sync --limit 100000
+"""
+
+SYNC_STATE_NAME = "hub_datasets"
+
+
+def build_first_page_url(page_size: int = CATALOG_SYNC_PAGE_SIZE, sort: str = "likes") -> str:
+    """
+    Build the URL of the first page of the dataset listing.
+
+    Args:
+        page_size: The number of datasets per page.
+        sort: The property the datasets are sorted by, from the highest value to the lowest.
+
+    Returns:
+        The URL of the first page.
+    """
+    return f"{constants.ENDPOINT}/api/datasets?full=true&limit={page_size}&sort={sort}&direction=-1"
+
+
+def fetch_dataset_pages(url: str) -> Iterator[Tuple[List[Dict], str | None]]:
+    """
+    Fetch the pages of the dataset listing, following the "next" links of the responses.
+
+    Args:
+        url: The URL of the first page to fetch.
+
+    Returns:
+        An iterator of Tuples containing the datasets of a page and the URL of the next page (None on the last page).
+    """
+    while url:
+        # Rate limits and server errors are retried with an exponential backoff
+        response = http_backoff("GET", url, retry_on_status_codes=(429, 500, 502, 503, 504), timeout=HUB_REQUEST_TIMEOUT)
+        hf_raise_for_status(response)
+        url = response.links.get("next", {}).get("url")
+        yield response.json(), url
+
+
+def extract_metadata_from_listing(item: Dict) -> Tuple[str, Dict[str, str], str | None]:
+    """
+    Map a dataset from the full dataset listing to a catalog row.
+
+    Args:
+        item: A dataset returned by the /api/datasets endpoint with full=true.
+
+    Returns:
+        A Tuple containing the dataset ID, its metadata attributes and its last modified time.
+    """
+    item.setdefault("siblings", None)
+    dataset_info = DatasetInfo(**item)
+    metadata = extract_metadata_from_dataset_info(dataset_info)
+    # Fill attributes the dataset info leaves empty from the dataset card front-matter
+    card_data = item.get("cardData") if isinstance(item.get("cardData"), dict) else {}
+    for attribute, value in extract_metadata_from_front_matter(card_data).items():
+        metadata.setdefault(attribute, value)
+    last_modified = dataset_info.last_modified.isoformat() if dataset_info.last_modified else None
+    return dataset_info.id, metadata, last_modified
+
+
+def sync_catalog(catalog: DatasetCatalog, limit: int | None = None, page_size: int = CATALOG_SYNC_PAGE_SIZE,
+                 sort: str = "likes", restart: bool = False) -> Dict[str, int]:
+    """
+    Sync the catalog with the dataset listing of the Hugging Face Hub, resuming an interrupted sync.
+
+    Args:
+        catalog: The catalog to write to.
+        limit: The maximum number of datasets to sync (defaults to all datasets).
+        page_size: The number of datasets per page.
+        sort: The property the datasets are sorted by, from the highest value to the lowest.
+        restart: Whether to ignore the checkpoint of an interrupted sync and start from the first page.
+
+    Returns:
+        A Dictionary containing the number of datasets seen, written and skipped because they were unchanged.
+    """
+    state = None if restart else catalog.get_sync_state(SYNC_STATE_NAME)
+    if state is None:
+        state = {"next_url": build_first_page_url(page_size, sort), "seen": 0, "written": 0, "unchanged": 0}
+
+    for items, next_url in fetch_dataset_pages(state["next_url"]):
+        if limit is not None:
+            items = items[:max(0, limit - state["seen"])]
+        rows = [extract_metadata_from_listing(item) for item in items]
+
+        # Only datasets that changed since they were last synced are written
+        known_last_modified = catalog.get_last_modified_many([dataset_id for dataset_id, _, _ in rows])
+        changed_rows = [
+            row for row in rows
+            if row[2] is None or known_last_modified.get(row[0].lower()) != row[2]
+        ]
+        catalog.upsert_many(changed_rows)
+
+        state["seen"] += len(rows)
+        state["written"] += len(changed_rows)
+        state["unchanged"] += len(rows) - len(changed_rows)
+        state["next_url"] = next_url
+        # The checkpoint is saved after the page is written, so a page is never skipped (but may be written twice)
+        catalog.set_sync_state(SYNC_STATE_NAME, state)
+        if next_url is None or (limit is not None and state["seen"] >= limit):
+            break
+
+    # A finished sync starts from the first page next time
+    catalog.set_sync_state(SYNC_STATE_NAME, None)
+    return {"seen": state["seen"], "written": state["written"], "unchanged": state["unchanged"]}
+
+
+def main():
+    """Command line interface for the catalog sync."""
+    parser = argparse.ArgumentParser(description="Sync the local catalog with the dataset listing of the Hugging Face Hub.")
+    parser.add_argument("--db", default=CATALOG_PATH, help="Path of the catalog database.")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of datasets to sync (default: all).")
+    parser.add_argument("--page-size", type=int, default=CATALOG_SYNC_PAGE_SIZE, help="Number of datasets per page.")
+    parser.add_argument("--sort", default="likes", help="Property to sort the datasets by (e.g. likes, downloads).")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint of an interrupted sync.")
+    args = parser.parse_args()
+
+    catalog = DatasetCatalog(args.db)
+    try:
+        counts = sync_catalog(catalog, limit=args.limit, page_size=args.page_size, sort=args.sort, restart=args.restart)
+        print(f"Synced {counts['seen']} datasets: {counts['written']} written, {counts['unchanged']} unchanged.")
+    except KeyboardInterrupt:
+        state = catalog.get_sync_state(SYNC_STATE_NAME) or {}
+        print(f"Sync interrupted after {state.get('seen', 0)} datasets. Run the command again to resume.")
+    finally:
+        catalog.close()
+
+
+if __name__ == "__main__":
+    main()
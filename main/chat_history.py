@@ -0,0 +1,150 @@
+# chat_history.py
+
+# necessary imports
+import threading
+from typing import Dict, Iterable, List
+from .constants import HISTORY_MAX_MESSAGES
+
+"""
+    This module contains the chat history of a chatbot session.
+    The history is a list of messages that Gradio can display, but it keeps its size flat over a long session:
+        - Static messages (instructions and prompts) are shared by all sessions. Earlier copies of a static message
+          stay in place as a one-line reference to its latest copy, so the order of the conversation is kept.
+        - Older copies of messages that are replaced by a newer version (e.g. the current metadata) are collapsed.
+        - When the history is longer than its limit, the oldest messages are removed and counted in a note.
+    Gradio sends the whole value of a Chatbot output for every event (it only sends differences between the values
+    a streaming handler yields), so the history is not sent as a delta. Keeping the history bounded keeps the
+    payload of every event flat instead.
+"""
+
+# One shared copy of every static message, keyed by its content
+interned_messages = {}
+interned_messages_lock = threading.Lock()
+
+
+def intern_message(message: Dict[str, str]) -> Dict[str, str]:
+    """
+    Get the shared copy of a static message, so sessions do not keep their own copies of the same long text.
+
+    Args:
+        message: A Dictionary containing the role and content of the message.
+
+    Returns:
+        The shared copy of the message.
+    """
+    with interned_messages_lock:
+        return interned_messages.setdefault((message.get("role"), message.get("content")), message)
+
+
+class ChatHistory(list):
+    """A bounded list of chat messages that collapses repeated messages."""
+
+    def __init__(self, messages: Iterable[Dict[str, str]] = (), collapsible_prefixes: Iterable[str] = (),
+                 max_messages: int = HISTORY_MAX_MESSAGES, hidden_count: int = 0):
+        super().__init__()
+        self.collapsible_prefixes = tuple(collapsible_prefixes)
+        self.max_messages = max_messages
+        self.hidden_count = hidden_count
+        for message in messages:
+            # Skip the note about removed messages, it is added again when needed
+            if not self.is_hidden_note(message):
+                # Messages restored from a saved session share the static messages already known to this process
+                with interned_messages_lock:
+                    message = interned_messages.get((message.get("role"), message.get("content")), message)
+                self.append(message)
+        self.update_hidden_note()
+
+    def append(self, message: Dict[str, str], static: bool = False):
+        """
+        Append a message, collapsing older copies of it and removing the oldest messages if the history is full.
+
+        Args:
+            message: A Dictionary containing the role and content of the message.
+            static: Whether the message is a static message (e.g. instructions) that only needs to be shown once.
+        """
+        content = message.get("content")
+        if static:
+            # Keep one shared copy of a static message, at its latest position
+            message = intern_message(message)
+            self.replace_with_reference(content)
+        elif isinstance(content, str):
+            prefix = next((prefix for prefix in self.collapsible_prefixes if content.startswith(prefix)), None)
+            if prefix is not None:
+                self.collapse(prefix)
+        super().append(message)
+        self.trim()
+
+    def replace_with_reference(self, content: str):
+        """
+        Replace the earlier copies of a static message by a short message saying that it is shown again below.
+
+        Args:
+            content: The content of the static message.
+        """
+        if not isinstance(content, str):
+            return
+        first_line = next((line.strip() for line in content.splitlines() if line.strip()), "")
+        summary = first_line if len(first_line) <= 60 else f"{first_line[:60].rstrip()}..."
+        reference_content = f"{summary} _(shown again below)_"
+        for index, existing in enumerate(self):
+            if existing.get("content") == content:
+                self[index] = {"role": existing.get("role", "assistant"), "content": reference_content}
+
+    def collapse(self, prefix: str):
+        """
+        Replace the messages that start with a prefix by a short message saying that a newer version is shown below.
+
+        Args:
+            prefix: The start of the messages to collapse.
+        """
+        collapsed_content = f"{prefix} _(a newer version is shown below)_"
+        for index, existing in enumerate(self):
+            content = existing.get("content")
+            if isinstance(content, str) and content.startswith(prefix) and content != collapsed_content:
+                self[index] = {"role": existing.get("role", "assistant"), "content": collapsed_content}
+
+    def trim(self):
+        """
+        Remove the oldest messages when the history is longer than its limit.
+        """
+        note_count = 1 if self and self.is_hidden_note(self[0]) else 0
+        excess = len(self) - note_count - self.max_messages
+        if excess > 0:
+            del self[note_count:note_count + excess]
+            self.hidden_count += excess
+            self.update_hidden_note()
+
+    def update_hidden_note(self):
+        """
+        Add or update the note at the start of the history that counts the removed messages.
+        """
+        if self.hidden_count == 0:
+            return
+        note = {"role": "assistant", "content": f"_{self.hidden_count} earlier messages were removed to keep the chat short._"}
+        if self and self.is_hidden_note(self[0]):
+            self[0] = note
+        else:
+            self.insert(0, note)
+
+    @staticmethod
+    def is_hidden_note(message: Dict[str, str]) -> bool:
+        """
+        Check if a message is the note that counts the removed messages.
+
+        Args:
+            message: A Dictionary containing the role and content of the message.
+
+        Returns:
+            True if the message is the note, False otherwise.
+        """
+        content = message.get("content")
+        return isinstance(content, str) and content.startswith("_") and content.endswith("earlier messages were removed to keep the chat short._")
+
+    def to_list(self) -> List[Dict[str, str]]:
+        """
+        Return the messages as a plain list.
+
+        Returns:
+            A list of the messages.
+        """
+        return list(self)
@@ -0,0 +1,182 @@
+# conformance.py
+
+# necessary imports
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List
+import mlcroissant as mlc
+from .constants import CONFORMANCE_WORKERS, CONFORMANCE_CACHE_MAX_ENTRIES, CONFORMANCE_CACHE_TTL
+from .serialization import dumps_bytes, loads
+from .shared_cache import get_shared_cache
+
+"""
+    This module runs the full mlcroissant conformance check of the final metadata in the background.
+    Finalising the metadata does not wait for mlcroissant, so the 'complete' command answers straight away, and the
+    check runs in a worker thread. Its verdict (the errors and warnings reported by mlcroissant) is cached by the hash
+    of the metadata, in memory and in the cache shared by the worker processes, so finalising unchanged metadata
+    again does not run the check again.
+"""
+
+
+def content_hash(final_metadata: Dict[str, Any]) -> str:
+    """
+    Hash the content of the final metadata, independent of the order of its keys.
+
+    Args:
+        final_metadata: The final Croissant metadata.
+
+    Returns:
+        The hex digest of the metadata.
+    """
+    return hashlib.sha256(dumps_bytes(final_metadata, sort_keys=True)).hexdigest()
+
+
+def check_conformance(final_metadata: Dict[str, Any]) -> Dict[str, List[str]]:
+    """
+    Run the mlcroissant checks on the final metadata as it is saved to the JSON file.
+
+    Args:
+        final_metadata: The final Croissant metadata.
+
+    Returns:
+        A Dictionary containing the sorted errors and warnings reported by mlcroissant.
+    """
+    # Read the metadata back the same way as a consumer of the saved file would
+    jsonld = loads(dumps_bytes(final_metadata))
+    context = mlc.Context()
+    try:
+        mlc.Metadata.from_json(context, jsonld)
+    except mlc.ValidationError:
+        pass  # The errors are collected in the issues of the context
+    except Exception as e:
+        context.issues.add_error(str(e))
+    return {"errors": sorted(context.issues.errors), "warnings": sorted(context.issues.warnings)}
+
+
+def format_verdict(verdict: Dict[str, List[str]]) -> str:
+    """
+    Format a verdict as a chat message.
+
+    Args:
+        verdict: A Dictionary returned by check_conformance.
+
+    Returns:
+        The message.
+    """
+    if not verdict["errors"] and not verdict["warnings"]:
+        return "The Croissant conformance check of your final metadata passed without any issues."
+    lines = ["The Croissant conformance check of your final metadata found the following:"]
+    lines.extend(f"- **Error:** {error}" for error in verdict["errors"])
+    lines.extend(f"- **Warning:** {warning}" for warning in verdict["warnings"])
+    lines.append("You can still download the metadata file, or update the attributes and type **complete** again.")
+    return "\n".join(lines)
+
+
+class ConformanceChecker:
+    """Runs conformance checks in worker threads and caches their verdicts by the hash of the metadata."""
+
+    def __init__(self, workers: int = CONFORMANCE_WORKERS, max_entries: int = CONFORMANCE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="conformance-check")
+        self._verdicts = OrderedDict()  # Maps a content hash to its verdict, least recently used first
+        self._running = {}  # Maps a content hash to the Future of its running check
+        self._lock = threading.Lock()
+        self.checks = 0
+        self.cache_hits = 0
+
+    def submit(self, final_metadata: Dict[str, Any]) -> Future:
+        """
+        Start the conformance check of the final metadata, unless its verdict is already known.
+
+        Args:
+            final_metadata: The final Croissant metadata.
+
+        Returns:
+            A Future of the verdict Dictionary.
+        """
+        key = content_hash(final_metadata)
+        with self._lock:
+            verdict = self._verdicts.get(key)
+            if verdict is not None:
+                self._verdicts.move_to_end(key)
+                self.cache_hits += 1
+                return self._completed(verdict)
+            # A check of the same metadata that is still running is shared
+            if key in self._running:
+                self.cache_hits += 1
+                return self._running[key]
+
+        shared_cache = get_shared_cache()
+        if shared_cache is not None:
+            found, verdict = shared_cache.get("conformance", key)
+            if found:
+                self._remember(key, verdict)
+                with self._lock:
+                    self.cache_hits += 1
+                return self._completed(verdict)
+
+        with self._lock:
+            if key in self._running:
+                return self._running[key]
+            # The check works on its own copy, so the session can change its metadata in the meantime
+            future = self._executor.submit(self._run, key, loads(dumps_bytes(final_metadata)))
+            self._running[key] = future
+            self.checks += 1
+        return future
+
+    def _run(self, key: str, final_metadata: Dict[str, Any]) -> Dict[str, List[str]]:
+        """
+        Run a check and remember its verdict.
+
+        Args:
+            key: The content hash of the metadata.
+            final_metadata: The final Croissant metadata.
+
+        Returns:
+            The verdict Dictionary.
+        """
+        try:
+            verdict = check_conformance(final_metadata)
+            self._remember(key, verdict)
+            shared_cache = get_shared_cache()
+            if shared_cache is not None:
+                shared_cache.set("conformance", key, verdict, ttl=CONFORMANCE_CACHE_TTL)
+            return verdict
+        finally:
+            with self._lock:
+                self._running.pop(key, None)
+
+    def _remember(self, key: str, verdict: Dict[str, List[str]]):
+        """
+        Add a verdict to the in-memory cache.
+
+        Args:
+            key: The content hash of the metadata.
+            verdict: The verdict Dictionary.
+        """
+        with self._lock:
+            self._verdicts[key] = verdict
+            self._verdicts.move_to_end(key)
+            while len(self._verdicts) > self.max_entries:
+                self._verdicts.popitem(last=False)
+
+    @staticmethod
+    def _completed(verdict: Dict[str, List[str]]) -> Future:
+        """
+        Wrap a known verdict in a completed Future.
+
+        Args:
+            verdict: The verdict Dictionary.
+
+        Returns:
+            The completed Future.
+        """
+        future = Future()
+        future.set_result(verdict)
+        return future
+
+
+# One checker is shared by all sessions
+conformance_checker = ConformanceChecker()
@@ -2,6 +2,9 @@
 
 """Contains constant values for the project"""
 
+# necessary imports
+import os
+
 # A Dictionary of metadata attributes and their descriptions
 METADATA_ATTRIBUTES = {
     "name": "the name of the dataset (non-empty string).",
@@ -20,3 +23,100 @@ METADATA_ATTRIBUTES = {
     "task": "the task(s) associated with the dataset (comma-separated non-empty strings) (e.g. text-generation, text2text-generation, question-answering).",
     "modality": "the modality(s) of the dataset (comma-separated non-empty strings) (e.g. tabular, text, timeseries, video)."
 }
+
+# The spaCy model used for the description quality checks
+SPACY_MODEL_NAME = "en_core_web_sm"
+
+# Limits for the shared cache of features extracted from spaCy Doc objects
+DOC_CACHE_MAX_ENTRIES = 5000
+DOC_CACHE_MAX_BYTES = 32 * 1024 * 1024  # 32 MB
+
+# Limits for the cache of dataset information fetched from the Hugging Face Hub
+HUB_CACHE_TTL = 60 * 60  # Seconds a found dataset is cached for
+HUB_NEGATIVE_CACHE_TTL = 5 * 60  # Seconds a dataset that was not found is cached for
+HUB_CACHE_MAX_ENTRIES = 10000
+HUB_REQUEST_TIMEOUT = 10  # Seconds to wait for the Hugging Face Hub
+
+# Seconds to wait for the dataset card and git tags when enriching Hugging Face metadata
+DATASET_CARD_ENRICHMENT_DEADLINE = 3.0
+
+# The local catalog of Hugging Face dataset metadata, consulted before the Hub
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "catalog", "hf_catalog.sqlite3")
+CATALOG_ENRICHED_MAX_AGE = 7 * 24 * 60 * 60  # Seconds the metadata of a Hub lookup is served from the catalog instead of the Hub
+
+# The download files in the temporary directory are removed when they are older than this many seconds,
+# or when there are more than this many of them (the oldest first)
+DOWNLOADS_MAX_AGE = 24 * 60 * 60
+DOWNLOADS_MAX_COUNT = 1000
+
+# Number of datasets requested per page when syncing the catalog with the Hugging Face Hub
+CATALOG_SYNC_PAGE_SIZE = 1000
+
+# Limits for the chatbot sessions kept in memory
+SESSION_MAX_COUNT = 1000  # Least recently used sessions are evicted beyond this
+SESSION_IDLE_TIMEOUT = 60 * 60  # Seconds after which an idle session is evicted
+
+# The database of saved chatbot sessions, so sessions survive restarts and can be resumed by any worker
+SESSION_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sessions", "sessions.sqlite3")
+SESSION_FLUSH_INTERVAL = 1.0  # Seconds between writes of the changed sessions to the database
+SESSION_RETENTION = 7 * 24 * 60 * 60  # Seconds a saved session is kept after its last change
+SESSION_COMPACTION_INTERVAL = 60 * 60  # Seconds between removals of expired sessions from the database
+
+# The maximum number of messages kept in the chat history of a session
+HISTORY_MAX_MESSAGES = 200
+
+# The cache shared by the worker processes of a multi-worker deployment (see main/server.py).
+# It is enabled by setting the SHARED_CACHE_PATH environment variable, which the server does for its workers.
+DEFAULT_SHARED_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "shared_cache.sqlite3")
+LLM_CACHE_TTL = 7 * 24 * 60 * 60  # Seconds an LLM response is cached for
+
+# Concurrency groups of the Gradio events, so slow events do not starve cheap ones. Every group runs a limited number
+# of events at once, and new events are rejected with a busy message when too many events of the group are waiting.
+CONCURRENCY_GROUPS = {
+    "ui": {"concurrency_limit": 8, "max_waiting": 64},  # Cheap events, e.g. displaying the metadata
+    "llm": {"concurrency_limit": 4, "max_waiting": 32},  # Events that wait for the LLM or the Hugging Face Hub
+    "nlp": {"concurrency_limit": 2, "max_waiting": 16},  # Events that run the spaCy quality checks
+    "conformance": {"concurrency_limit": 16, "max_waiting": 64},  # Events that wait for the background conformance check
+}
+QUEUE_MAX_SIZE = 128  # The maximum number of events waiting in the Gradio queue across all groups
+QUEUE_ADMISSION_TIMEOUT = 10 * 60  # Seconds after which an admitted event that never started is no longer counted as waiting
+BUSY_MESSAGE = "The chatbot is very busy right now. Please wait a moment and try again."
+
+# Limits of the bulk endpoints of the REST API (see main/api.py)
+API_BULK_MAX_ITEMS = 1000  # The maximum number of items in one bulk request
+API_BULK_CONCURRENCY = 8  # The number of items of a bulk request processed at once
+
+# Attributes the batch annotation CLI asks the LLM to fill when they are missing (see main/batch_annotate.py).
+# Factual attributes such as the URL, dates, license and citation are left for a person to fill.
+BATCH_LLM_ATTRIBUTES = ["description", "keywords", "in_language", "task", "modality"]
+# Number of datasets whose quality is checked together (parsing their descriptions in one pass of spaCy) before
+# their results are written to the checkpoint file
+BATCH_QUALITY_CHUNK_SIZE = 100
+
+# Whether finalise_metadata builds the Croissant metadata with mlcroissant (slower, but runs its validation)
+# instead of mapping the attributes to JSON-LD directly (see main/croissant_jsonld.py)
+FINALISE_STRICT = False
+
+# The background Croissant conformance check that runs after the metadata is finalised (see main/conformance.py)
+CONFORMANCE_WORKERS = 2  # Threads that run the mlcroissant checks
+CONFORMANCE_CACHE_MAX_ENTRIES = 1000  # Verdicts kept in memory, keyed by the hash of the final metadata
+CONFORMANCE_CACHE_TTL = 30 * 24 * 60 * 60  # Seconds a verdict is kept in the cache shared by the worker processes
+CONFORMANCE_WAIT_TIMEOUT = 60  # Seconds the chat waits for the check before the result is shown with the next message
+
+# The annotations folder where the final metadata files are saved (see main/storage.py)
+ANNOTATIONS_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "annotations")
+ANNOTATION_FSYNC = True  # Whether a saved file is flushed to the disk before it replaces the old file
+ANNOTATION_DEDUPLICATE = True  # Whether a file is left as it is when the metadata saved to it did not change
+
+# The index of the annotations folder, to query annotations by attribute without opening every file (see main/annotation_index.py)
+ANNOTATION_INDEX_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "annotation_index", "annotations.sqlite3")
+
+# The number of results shown per page when searching the annotations
+ANNOTATION_SEARCH_LIMIT = 20
+
+# Near-duplicate descriptions and citations of annotations, found with MinHash and LSH (see main/near_duplicates.py)
+NEAR_DUPLICATE_PERMUTATIONS = 128  # The number of hash functions in a signature
+NEAR_DUPLICATE_BANDS = 32  # The number of LSH bands, which must divide the number of hash functions
+NEAR_DUPLICATE_SHINGLE_SIZE = 3  # The number of words in a shingle
+NEAR_DUPLICATE_MIN_WORDS = 8  # Shorter texts are not compared
+NEAR_DUPLICATE_THRESHOLD = 0.7  # The estimated similarity from which texts are near-duplicates
@@ -1,32 +1,98 @@
 # croissant_chatbot_manager.py
-import json
+from concurrent.futures import TimeoutError
 from .constants import METADATA_ATTRIBUTES
 from .llm import suggest_metadata, ask_user_for_informal_description
 from .metadata_manager import MetadataManager
+from .dataset_name_index import get_dataset_name_index
+from .chat_history import ChatHistory
+from .conformance import conformance_checker, format_verdict
+from .serialization import dumps
 from typing import Dict
 
 
+# The start of the message that displays the current metadata
+METADATA_DISPLAY_PREFIX = "Here is the current metadata for your dataset:"
+
+
 class CroissantChatbotManager:
     def __init__(self):
 
-        self.history = []
+        self.history = self.new_history()
         self.waiting_for_greeting = True
         self.waiting_for_informal_description = False
         self.pending_attribute = None
         self.informal_description = ""
         self.waiting_for_HF_name = False
+        self.unconfirmed_HF_name = None
+        self.pending_conformance = None  # Future of the background conformance check of the final metadata
 
         self.metadata_manager = MetadataManager()
 
+    # Saving and restoring sessions
+    def to_state(self) -> Dict:
+        """
+        Return the state of the chatbot so the session can be saved.
+
+        Returns:
+            A Dictionary containing the history, the flags and the metadata of the session.
+        """
+        return {
+            "history": self.history.to_list(),
+            "hidden_messages": self.history.hidden_count,
+            "waiting_for_greeting": self.waiting_for_greeting,
+            "waiting_for_informal_description": self.waiting_for_informal_description,
+            "pending_attribute": self.pending_attribute,
+            "informal_description": self.informal_description,
+            "waiting_for_HF_name": self.waiting_for_HF_name,
+            "unconfirmed_HF_name": self.unconfirmed_HF_name,
+            "metadata_manager": self.metadata_manager.to_state(),
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "CroissantChatbotManager":
+        """
+        Create a chatbot from a saved session.
+
+        Args:
+            state: A Dictionary returned by to_state.
+
+        Returns:
+            The restored CroissantChatbotManager.
+        """
+        chatbot = cls()
+        chatbot.history = chatbot.new_history(state.get("history", []), state.get("hidden_messages", 0))
+        chatbot.waiting_for_greeting = state.get("waiting_for_greeting", True)
+        chatbot.waiting_for_informal_description = state.get("waiting_for_informal_description", False)
+        chatbot.pending_attribute = state.get("pending_attribute")
+        chatbot.informal_description = state.get("informal_description", "")
+        chatbot.waiting_for_HF_name = state.get("waiting_for_HF_name", False)
+        chatbot.unconfirmed_HF_name = state.get("unconfirmed_HF_name")
+        chatbot.metadata_manager.load_state(state.get("metadata_manager", {}))
+        return chatbot
+
     # Managing history
-    def append_to_history(self, message: Dict[str, str]):
+    def new_history(self, messages: list[Dict[str, str]] = (), hidden_count: int = 0) -> ChatHistory:
+        """
+        Create a chat history. Older displays of the current metadata are collapsed when it is displayed again.
+
+        Args:
+            messages: The messages to start the history with.
+            hidden_count: The number of earlier messages that were removed from the history.
+
+        Returns:
+            The chat history.
+        """
+        return ChatHistory(messages, collapsible_prefixes=[METADATA_DISPLAY_PREFIX], hidden_count=hidden_count)
+
+    def append_to_history(self, message: Dict[str, str], static: bool = False):
         """
         Append a message to the chat history.
 
         Args:
             message: A Dictionary containing the role and content of the message.
+            static: Whether the message never changes (e.g. instructions), so only its latest copy needs to be kept.
         """
-        self.history.append(message)
+        self.history.append(message, static=static)
     
     def reset_chat(self) -> list[Dict[str, str]]:
         """
@@ -36,12 +102,14 @@ class CroissantChatbotManager:
             The reset chat history as a list of messages.
         """
         self.metadata_manager.reset_metadata()
-        self.history = []
+        self.history = self.new_history()
         self.waiting_for_greeting = True
         self.waiting_for_informal_description = False
         self.pending_attribute = None
         self.informal_description = ""
         self.waiting_for_HF_name = False
+        self.unconfirmed_HF_name = None
+        self.pending_conformance = None
 
         return self.history
 
@@ -57,6 +125,7 @@ class CroissantChatbotManager:
         self.pending_attribute = None
         self.informal_description = ""
         self.waiting_for_HF_name = False
+        self.pending_conformance = None
         self.append_to_history({"role": "assistant", "content": "You can now start annotating a new dataset."})
         self.display_informal_description_prompt()
         self.waiting_for_informal_description = True
@@ -67,7 +136,7 @@ class CroissantChatbotManager:
         Display the current dataset metadata.
         """
         json_metadata = self.json_to_code_block(self.metadata_manager.get_metadata())
-        self.append_to_history({"role": "assistant", "content": f"Here is the current metadata for your dataset:\n{json_metadata}"})
+        self.append_to_history({"role": "assistant", "content": f"{METADATA_DISPLAY_PREFIX}\n{json_metadata}"})
     
     def handle_display_chatbot_instructions(self):
         """
@@ -130,7 +199,7 @@ class CroissantChatbotManager:
             If you want to see these instructions again at any time, press the 'See Instructions' button.\n
         """
         formatted_instructions = f"```text\n{instructions}\n```"
-        self.append_to_history({"role": "assistant", "content": formatted_instructions})
+        self.append_to_history({"role": "assistant", "content": formatted_instructions}, static=True)
     
     # Display methods
     def display_short_instructions(self):
@@ -147,7 +216,7 @@ class CroissantChatbotManager:
                 - If you want to see a longer version of the instructions, click the 'See Instructions' button.
                 - If you make a mistake, specifically if you add an attribute you don't want to include, press the "Refresh Chat" button to start over.
                 - If you think you have entered all the metadata attributes, type **complete** in the 'Chat Message' box to finalise the metadata."""
-        })
+        }, static=True)
 
     def display_informal_description_prompt(self):
         """
@@ -162,7 +231,7 @@ class CroissantChatbotManager:
                 - &lt;your informal description&gt;
                 - help (will provide guidance on providing an informal description) 
                 - no"""
-        })
+        }, static=True)
     
     def display_hugging_face_name_prompt(self):
         """
@@ -175,7 +244,7 @@ class CroissantChatbotManager:
                 **Please type one of these options:**
                 -  &lt;dataset name&gt;
                 - no"""
-        })
+        }, static=True)
 
     
     def json_to_code_block(self, json_data: Dict[str,str], default_value=None) -> str:
@@ -184,15 +253,13 @@ class CroissantChatbotManager:
 
         Args:
             json_data: The JSON data to format.
-            default_value: A default value to use for serialization if needed.
+            default_value: A function that serializes the objects JSON does not support, if needed.
 
         Returns:
             A string containing the formatted JSON code block.
         """
         try:
-            return f"```json\n{json.dumps(json_data, indent=2, default=default_value)}\n```"
-        except TypeError as e:
-            return f"```json\n{json.dumps(json_data, indent=2)}\n```"
+            return f"```json\n{dumps(json_data, indent=True, default=default_value)}\n```"
         except Exception as e:
             return f"```json\n{{\"error\": \"{str(e)}\"}}\n```"
 
@@ -210,8 +277,11 @@ class CroissantChatbotManager:
         """
         try:
             if not self.history:
-                self.history = []
+                self.history = self.new_history()
 
+            # Show the results of the background checks that finished since the last message
+            self.collect_conformance_result()
+            self.collect_description_check_result()
             self.append_to_history({"role": "user", "content": prompt})
             if prompt.lower() == "start new dataset":
                 self.handle_start_new_dataset()
@@ -302,10 +372,32 @@ class CroissantChatbotManager:
             if prompt.lower() == "no":
                 self.display_short_instructions()
                 self.waiting_for_HF_name = False
+                self.unconfirmed_HF_name = None
             else:
+                dataset_name = prompt.strip()
+                # Unknown names are checked against the known datasets locally before searching the Hub,
+                # unless the user repeats the name to confirm it
+                dataset_name_index = get_dataset_name_index()
+                if not dataset_name_index.contains(dataset_name) and dataset_name.lower() != (self.unconfirmed_HF_name or "").lower():
+                    suggestions = dataset_name_index.suggest(dataset_name)
+                    if suggestions:
+                        self.unconfirmed_HF_name = dataset_name
+                        suggestion_list = "\n                ".join(f"- {suggestion}" for suggestion in suggestions)
+                        self.append_to_history({
+                            "role": "assistant",
+                            "content": f"""I don't know a dataset called '{dataset_name}'. Did you mean:
+                {suggestion_list}
+                **Please type one of these options:**
+                - &lt;one of the dataset names above&gt;
+                - {dataset_name} (will search the Hugging Face Hub for the name you typed)
+                - no"""
+                        })
+                        return self.history
+                self.unconfirmed_HF_name = None
                 try:
-                    dataset_info, success = self.metadata_manager.find_dataset_info(prompt.strip())
+                    dataset_info, success = self.metadata_manager.find_dataset_info(dataset_name)
                     if success:
+                        dataset_name_index.add(dataset_info.get("name", dataset_name))
                         self.append_to_history({"role": "assistant", "content": "I fetched the following metadata for your dataset:"})
                         self.handle_display_metadata()
                     elif dataset_info is None:
@@ -324,6 +416,23 @@ class CroissantChatbotManager:
             self.display_short_instructions()
         return self.history
 
+    def handle_selected_HF_name(self, dataset_name: str) -> list[Dict[str, str]]:
+        """
+        Handle a Hugging Face dataset name selected from the autocomplete dropdown.
+
+        Args:
+            dataset_name: The selected dataset name.
+
+        Returns:
+            The updated chat history.
+        """
+        self.append_to_history({"role": "user", "content": dataset_name})
+        # Selecting a dataset skips the greeting and informal description prompts
+        self.waiting_for_greeting = False
+        self.waiting_for_informal_description = False
+        self.waiting_for_HF_name = True
+        return self.handle_HF_name(dataset_name)
+
     def handle_complete_command(self) -> list[Dict[str, str]]:
         """
         Handle the 'complete' command to finalize metadata.
@@ -351,12 +460,73 @@ class CroissantChatbotManager:
                 self.append_to_history({"role": "assistant", "content": "You can download the metadata file by clicking the 'Download Metadata File' button, then clicking the blue file size text."})
                 self.append_to_history({"role": "assistant", "content": "You can still update the metadata if needed by selecting an attribute from the dropdown."})
                 self.append_to_history({"role": "assistant", "content": "If you want to start annotating a new dataset, type **start new dataset** in the 'Chat Message' box."})
+                if self.metadata_manager.near_duplicates:
+                    duplicates = "\n".join(
+                        f"- {duplicate['filename']} ({duplicate['field']}, {duplicate['similarity']:.0%} similar)"
+                        for duplicate in self.metadata_manager.near_duplicates
+                    )
+                    self.append_to_history({"role": "assistant", "content": f"These saved annotations have nearly the same description or citation, please check that they are not the same dataset:\n{duplicates}"})
+                # Run the full mlcroissant conformance check in the background, so it does not delay this answer
+                self.pending_conformance = conformance_checker.submit(final_metadata)
+                if not self.collect_conformance_result():
+                    self.append_to_history({"role": "assistant", "content": "The full Croissant conformance check is running in the background. Its result will be shown here when it is done."})
             else:
                 self.append_to_history({"role": "assistant", "content": f"An error occurred: {final_metadata}"})
         except Exception as e:
             self.handle_errors(f"An unexpected error occurred while finalising the metadata: {str(e)}")
         return self.history
 
+    def collect_conformance_result(self, timeout: float | None = 0) -> bool:
+        """
+        Add the result of the background conformance check to the chat history, if it is done.
+
+        Args:
+            timeout: The number of seconds to wait for the check (0 to not wait, None to wait until it is done).
+
+        Returns:
+            True if the result was added to the history, False otherwise.
+        """
+        pending = self.pending_conformance
+        if pending is None:
+            return False
+        try:
+            verdict = pending.result(timeout=timeout)
+        except TimeoutError:
+            return False
+        except Exception as e:
+            verdict = {"errors": [f"The conformance check failed: {str(e)}"], "warnings": []}
+        # Another handler of the session may have added the result while this one was waiting
+        if self.pending_conformance is not pending:
+            return False
+        self.pending_conformance = None
+        self.append_to_history({"role": "assistant", "content": format_verdict(verdict)})
+        return True
+
+    def collect_description_check_result(self) -> bool:
+        """
+        Add an issue found by the full check of a description that missed the deadline to the chat history, if it is done.
+
+        Returns:
+            True if an issue was added to the history, False otherwise.
+        """
+        pending = self.metadata_manager.pending_description_check
+        if pending is None or not pending[1].done():
+            return False
+        self.metadata_manager.pending_description_check = None
+        description, future = pending
+        # The result of a description that was changed since it was checked no longer matters
+        if description not in (self.metadata_manager.get_metadata_value("description"),
+                               self.metadata_manager.get_temporary_metadata_value("description")):
+            return False
+        try:
+            valid, message = future.result()
+        except Exception as e:
+            valid, message = False, f"Unexpected error in description quality check: {str(e)}"
+        if valid:
+            return False
+        self.append_to_history({"role": "assistant", "content": f"The full analysis of the description found an issue: {message}\nYou can select `description` from the dropdown to update it."})
+        return True
+
     def handle_pending_attribute_input(self, prompt: str) -> list[Dict[str, str]]:
         """
         Handle input for a pending metadata attribute.
@@ -407,6 +577,8 @@ class CroissantChatbotManager:
                     self.metadata_manager.clear_temporary_metadata()
                     self.metadata_manager.set_metadata_value(self.pending_attribute, prompt.strip())
                     self.append_to_history({"role": "assistant", "content": f"Saved `{self.pending_attribute}` as: {prompt.strip()}."})
+                    if self.pending_attribute == "description" and self.metadata_manager.pending_description_check is not None:
+                        self.append_to_history({"role": "assistant", "content": "The analysis of the sentence variety of the description is still running. Any issue it finds will be shown with your next message."})
                     self.pending_attribute = None
         except Exception as e:
             self.handle_errors(f"An unexpected error occurred while processing your input for `{self.pending_attribute}`: {str(e)}")
@@ -0,0 +1,105 @@
+# croissant_jsonld.py
+
+# necessary imports
+import datetime
+import functools
+from typing import Any, Dict
+import dateutil.parser
+import mlcroissant as mlc
+from .serialization import dumps, loads
+
+"""
+    This module converts the flat metadata of the chatbot to Croissant JSON-LD without building an mlcroissant
+    Metadata object, which runs mlcroissant's graph and validation machinery for every dataset.
+    The @context block and conformsTo value are the same for every dataset, so they are taken from mlcroissant
+    once and cached as serialized JSON. The attributes are then mapped directly to their Croissant properties,
+    following the same rules as Metadata.to_json(): empty values are left out, single-item lists are unboxed,
+    dates become datetime objects, and the properties are sorted the same way.
+"""
+
+# Maps every attribute of the chatbot to its Croissant property
+ATTRIBUTE_PROPERTIES = {
+    "name": "name",
+    "creators": "creator",
+    "description": "description",
+    "license": "license",
+    "url": "url",
+    "publisher": "publisher",
+    "version": "version",
+    "keywords": "keywords",
+    "date_modified": "dateModified",
+    "date_created": "dateCreated",
+    "date_published": "datePublished",
+    "cite_as": "citeAs",
+    "in_language": "inLanguage",
+}
+
+DATE_ATTRIBUTES = ("date_modified", "date_created", "date_published")
+
+# Properties at the start of the JSON-LD, in this order. The other properties follow in alphabetical order.
+START_PROPERTIES = ("@context", "@type", "@id", "name", "description", "conformsTo")
+
+
+@functools.lru_cache(maxsize=1)
+def get_jsonld_template() -> str:
+    """
+    Get the serialized @context block and conformsTo value of the installed mlcroissant version.
+
+    Returns:
+        A JSON string of a Dictionary containing the @context and conformsTo values.
+    """
+    jsonld = mlc.Metadata().to_json()
+    return dumps({"@context": jsonld["@context"], "conformsTo": jsonld.get("conformsTo")})
+
+
+def convert_date(value: Any) -> datetime.datetime | None:
+    """
+    Convert a date the same way as mlcroissant.
+
+    Args:
+        value: The date as an ISO 8601 string, a date or a datetime.
+
+    Returns:
+        The date as a datetime.
+    """
+    if value is None or isinstance(value, datetime.datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            return dateutil.parser.isoparse(value)
+        except ValueError:
+            raise ValueError(f"Dates or DateTimes should follow the [ISO 8601 format](https://en.wikipedia.org/wiki/ISO_8601). Got {value}")
+    if isinstance(value, datetime.date):
+        return datetime.datetime.combine(value, datetime.time.min)
+    raise ValueError(f"Wrong type for a date. Expected Date or Datetime. Got: {value}")
+
+
+def metadata_to_jsonld(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert flat metadata to Croissant JSON-LD, giving the same result as mlc.Metadata(**metadata).to_json().
+
+    Args:
+        metadata: A Dictionary of metadata attributes (see ATTRIBUTE_PROPERTIES) and their values.
+
+    Returns:
+        The Croissant JSON-LD Dictionary. Dates are datetime objects, as in the output of mlcroissant.
+    """
+    template = loads(get_jsonld_template())
+    properties = {"@type": "sc:Dataset", "conformsTo": template["conformsTo"]}
+    for attribute, value in metadata.items():
+        if attribute not in ATTRIBUTE_PROPERTIES:
+            raise TypeError(f"Unexpected metadata attribute: '{attribute}'")
+        if attribute in DATE_ATTRIBUTES:
+            value = convert_date(value)
+        elif attribute == "version" and isinstance(value, int) and not isinstance(value, bool):
+            value = f"{value}.0.0"  # mlcroissant reads an integer version as a major version
+        if isinstance(value, list) and len(value) == 1:
+            value = value[0]
+        # Empty values are left out, but False is kept
+        if value or isinstance(value, bool):
+            properties[ATTRIBUTE_PROPERTIES[attribute]] = value
+
+    jsonld = {"@context": template["@context"]}
+    jsonld.update((key, properties[key]) for key in START_PROPERTIES if key in properties)
+    jsonld.update((key, properties[key]) for key in sorted(properties) if key not in START_PROPERTIES)
+    return jsonld
@@ -0,0 +1,255 @@
+# dataset_card.py
+
+# necessary imports
+import re
+import yaml
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Tuple, Dict, List, Any
+from huggingface_hub import hf_hub_url, get_session
+from huggingface_hub.utils import hf_raise_for_status
+from .constants import DATASET_CARD_ENRICHMENT_DEADLINE, HUB_CACHE_TTL, HUB_CACHE_MAX_ENTRIES, HUB_REQUEST_TIMEOUT
+from .hub_client import hf_api, TTLCache
+
+"""
+    This module enriches the metadata fetched from the Hugging Face Hub with information that
+    the dataset_info endpoint does not return: the dataset card (README.md) front-matter and
+    BibTeX blocks, and the repository's git tags and latest commit.
+    The requests run concurrently with a global deadline, and whatever arrives in time is merged.
+"""
+
+# Threads shared by all enrichment requests
+enrichment_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="dataset-card")
+
+# Cache of enrichment results keyed by (dataset id, commit sha), so a new commit is always refetched
+enrichment_cache = TTLCache(ttl=HUB_CACHE_TTL, max_entries=HUB_CACHE_MAX_ENTRIES)
+
+
+def fetch_dataset_card(dataset_id: str, revision: str | None = None) -> str | None:
+    """
+    Fetch the dataset card (README.md) of a dataset.
+
+    Args:
+        dataset_id: The ID of the dataset.
+        revision: The revision of the dataset (defaults to the main branch).
+
+    Returns:
+        The text of the dataset card, or None if the dataset has no card.
+    """
+    url = hf_hub_url(dataset_id, "README.md", repo_type="dataset", revision=revision)
+    response = get_session().get(url, timeout=HUB_REQUEST_TIMEOUT)
+    if response.status_code == 404:
+        return None
+    hf_raise_for_status(response)
+    return response.text
+
+
+def split_front_matter(card_text: str) -> Tuple[Dict[str, Any], str]:
+    """
+    Split a dataset card into its YAML front-matter and its Markdown body.
+
+    Args:
+        card_text: The text of the dataset card.
+
+    Returns:
+        A Tuple containing the parsed front-matter (empty if there is none or it is invalid) and the body.
+    """
+    match = re.match(r"^---[ \t]*\n(.*?)\n---[ \t]*(?:\n|$)", card_text, re.DOTALL)
+    if not match:
+        return {}, card_text
+    try:
+        front_matter = yaml.safe_load(match.group(1))
+    except yaml.YAMLError:
+        front_matter = None
+    return front_matter if isinstance(front_matter, dict) else {}, card_text[match.end():]
+
+
+def extract_bibtex_entries(text: str) -> List[str]:
+    """
+    Extract the BibTeX entries from a text, matching braces so nested fields are kept whole.
+
+    Args:
+        text: The text to search.
+
+    Returns:
+        A list of the BibTeX entries found in the text.
+    """
+    entries = []
+    for match in re.finditer(r"@[A-Za-z]+\s*\{", text):
+        depth = 0
+        for index in range(match.end() - 1, len(text)):
+            if text[index] == "{":
+                depth += 1
+            elif text[index] == "}":
+                depth -= 1
+                if depth == 0:
+                    entries.append(text[match.start():index + 1])
+                    break
+    # Drop entries that are nested inside an earlier entry
+    return [entry for entry in entries if not any(entry != other and entry in other for other in entries)]
+
+
+def as_list(value) -> List[str]:
+    """
+    Convert a front-matter value that can be a string or a list to a list of strings.
+
+    Args:
+        value: The front-matter value.
+
+    Returns:
+        A list of non-empty strings.
+    """
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(item).strip() for item in value if item is not None and str(item).strip()]
+    return [str(value).strip()] if str(value).strip() else []
+
+
+def parse_dataset_card(card_text: str) -> Dict[str, str]:
+    """
+    Map the front-matter and BibTeX blocks of a dataset card to metadata attributes.
+
+    Args:
+        card_text: The text of the dataset card.
+
+    Returns:
+        A Dictionary of the metadata attributes found in the card.
+    """
+    front_matter, body = split_front_matter(card_text)
+    return extract_metadata_from_front_matter(front_matter, body)
+
+
+def extract_metadata_from_front_matter(front_matter: Dict[str, Any], body: str = "") -> Dict[str, str]:
+    """
+    Map the front-matter of a dataset card (the "cardData" returned by the Hub) to metadata attributes.
+
+    Args:
+        front_matter: The parsed front-matter of the dataset card.
+        body: The Markdown body of the dataset card, searched for BibTeX blocks if the front-matter has no citation.
+
+    Returns:
+        A Dictionary of the metadata attributes found.
+    """
+    metadata = {}
+
+    # Keywords come from the free-form tags and the fine-grained task ids
+    keywords = []
+    for keyword in as_list(front_matter.get("tags")) + as_list(front_matter.get("task_ids")):
+        if keyword.lower() not in [existing.lower() for existing in keywords]:
+            keywords.append(keyword)
+    if keywords:
+        metadata["keywords"] = ", ".join(keywords)
+
+    version = as_list(front_matter.get("version"))
+    if version:
+        metadata["version"] = version[0]
+
+    publisher = as_list(front_matter.get("publisher"))
+    if publisher:
+        metadata["publisher"] = publisher[0]
+
+    languages = as_list(front_matter.get("language"))
+    if languages:
+        metadata["in_language"] = ", ".join(languages)
+
+    licenses = as_list(front_matter.get("license"))
+    if licenses:
+        metadata["license"] = licenses[0]
+
+    # The citation can be in the front-matter or in a BibTeX block in the body of the card
+    citations = as_list(front_matter.get("citation")) or extract_bibtex_entries(body)
+    if citations:
+        metadata["cite_as"] = citations[0]
+
+    return {attribute: value for attribute, value in metadata.items() if value}
+
+
+def fetch_and_parse_dataset_card(dataset_id: str, revision: str | None = None) -> Dict[str, str]:
+    """
+    Fetch the dataset card of a dataset and map it to metadata attributes.
+
+    Args:
+        dataset_id: The ID of the dataset.
+        revision: The revision of the dataset (defaults to the main branch).
+
+    Returns:
+        A Dictionary of the metadata attributes found in the card (empty if there is no card).
+    """
+    card_text = fetch_dataset_card(dataset_id, revision)
+    return parse_dataset_card(card_text) if card_text else {}
+
+
+def fetch_latest_version(dataset_id: str, sha: str | None = None) -> Dict[str, str]:
+    """
+    Get the version of a dataset from its latest git tag, or its latest commit if it has no tags.
+
+    Args:
+        dataset_id: The ID of the dataset.
+        sha: The latest commit of the dataset, if it is already known.
+
+    Returns:
+        A Dictionary containing the version attribute (empty if it cannot be found).
+    """
+    refs = hf_api.list_repo_refs(dataset_id, repo_type="dataset")
+    tag_names = [tag.name for tag in refs.tags]
+    if tag_names:
+        # Compare tags as versions (e.g. v1.10 > v1.9) when they look like version numbers
+        return {"version": max(tag_names, key=version_sort_key)}
+    branch_commits = [branch.target_commit for branch in refs.branches if branch.name == "main"]
+    commit = sha or (branch_commits[0] if branch_commits else None)
+    return {"version": commit[:7]} if commit else {}
+
+
+def version_sort_key(tag_name: str) -> Tuple:
+    """
+    Create a sort key that orders version-like tag names numerically.
+
+    Args:
+        tag_name: The name of a git tag (e.g. "v1.2.0").
+
+    Returns:
+        A Tuple that sorts numeric parts as numbers.
+    """
+    return tuple((0, int(part), "") if part.isdigit() else (1, 0, part) for part in re.split(r"[.\-_]", tag_name.lstrip("vV")))
+
+
+def enrich_dataset_metadata(dataset_info, metadata: Dict[str, str], deadline: float = DATASET_CARD_ENRICHMENT_DEADLINE) -> Dict[str, str]:
+    """
+    Fetch the dataset card and git information concurrently and return the attributes missing from the metadata.
+
+    Args:
+        dataset_info: The DatasetInfo of the dataset.
+        metadata: The metadata already extracted from the DatasetInfo.
+        deadline: The number of seconds to wait for all requests.
+
+    Returns:
+        A Dictionary of the attributes that were empty in the metadata and were found in time.
+    """
+    dataset_id = getattr(dataset_info, "id", None)
+    if not dataset_id:
+        return {}
+    sha = getattr(dataset_info, "sha", None)
+
+    key = (dataset_id, sha or "")
+    found, enriched = enrichment_cache.get(key)
+    if not found:
+        futures = [
+            enrichment_executor.submit(fetch_and_parse_dataset_card, dataset_id, sha),
+            enrichment_executor.submit(fetch_latest_version, dataset_id, sha),
+        ]
+        done, not_done = wait(futures, timeout=deadline)
+
+        # Merge the results that arrived in time. The card is merged last so its values take priority.
+        enriched = {}
+        for future in reversed(futures):
+            if future in done and future.exception() is None:
+                enriched.update(future.result())
+        # Datasets without a publisher in their card are published by the user or organisation that owns them
+        author = getattr(dataset_info, "author", None)
+        if author and not enriched.get("publisher"):
+            enriched["publisher"] = author
+        # Only complete results are cached, so a slow or failed request is retried on the next lookup
+        if not not_done and all(future.exception() is None for future in futures):
+            enrichment_cache.set(key, enriched)
+
+    return {attribute: value for attribute, value in enriched.items() if not metadata.get(attribute)}
@@ -0,0 +1,147 @@
+# dataset_name_index.py
+
+# necessary imports
+import bisect
+import difflib
+import threading
+from typing import List, Iterable
+from .catalog import get_catalog
+
+"""
+    This module contains an in-memory index of the known Hugging Face dataset IDs.
+    The IDs come from the local catalog, which also holds every dataset found on the Hub.
+    A sorted array of lowercased IDs is searched with bisect for prefix autocomplete,
+    and difflib compares a name with its alphabetical neighbours to suggest corrections before any network call is made.
+"""
+
+
+class DatasetNameIndex:
+    """A thread-safe prefix index of dataset IDs with fuzzy "did you mean" suggestions."""
+
+    def __init__(self, dataset_ids: Iterable[str] = (), neighbourhood: int = 50):
+        self.neighbourhood = neighbourhood  # How many neighbours on each side of a name are compared for suggestions
+        self._keys = []  # Sorted lowercased dataset IDs
+        self._short_keys = []  # Sorted Tuples of (lowercased name after the owner, lowercased dataset ID)
+        self._names = {}  # Maps a lowercased dataset ID to its original spelling
+        self._lock = threading.Lock()
+        self.add_many(dataset_ids)
+
+    def add_many(self, dataset_ids: Iterable[str]):
+        """
+        Add dataset IDs to the index.
+
+        Args:
+            dataset_ids: The dataset IDs to add.
+        """
+        with self._lock:
+            new_keys = []
+            for dataset_id in dataset_ids:
+                dataset_id = dataset_id.strip()
+                key = dataset_id.lower()
+                if not key or key in self._names:
+                    continue
+                self._names[key] = dataset_id
+                new_keys.append(key)
+            if len(new_keys) > 1:
+                self._keys = sorted(self._keys + new_keys)
+                self._short_keys = sorted(self._short_keys + [(key.rsplit("/", 1)[-1], key) for key in new_keys])
+            elif new_keys:
+                bisect.insort(self._keys, new_keys[0])
+                bisect.insort(self._short_keys, (new_keys[0].rsplit("/", 1)[-1], new_keys[0]))
+
+    def add(self, dataset_id: str):
+        """
+        Add a dataset ID to the index.
+
+        Args:
+            dataset_id: The dataset ID to add.
+        """
+        self.add_many([dataset_id])
+
+    def contains(self, dataset_id: str) -> bool:
+        """
+        Check if a dataset ID is known (case-insensitive).
+
+        Args:
+            dataset_id: The dataset ID to check.
+
+        Returns:
+            True if the dataset ID is in the index, False otherwise.
+        """
+        return dataset_id.strip().lower() in self._names
+
+    def complete(self, prefix: str, limit: int = 20) -> List[str]:
+        """
+        Find the dataset IDs that start with a prefix (case-insensitive).
+
+        Args:
+            prefix: The start of a dataset ID.
+            limit: The maximum number of dataset IDs to return.
+
+        Returns:
+            A list of the matching dataset IDs in alphabetical order.
+        """
+        prefix = prefix.strip().lower()
+        with self._lock:
+            start = bisect.bisect_left(self._keys, prefix)
+            matches = []
+            for key in self._keys[start:start + limit]:
+                if not key.startswith(prefix):
+                    break
+                matches.append(self._names[key])
+        return matches
+
+    def suggest(self, dataset_id: str, limit: int = 3, cutoff: float = 0.8) -> List[str]:
+        """
+        Suggest known dataset IDs that are close to a dataset ID that is not in the index.
+
+        Args:
+            dataset_id: The (possibly mistyped) dataset ID.
+            limit: The maximum number of suggestions.
+            cutoff: The minimum similarity (between 0 and 1) of a suggestion.
+
+        Returns:
+            A list of suggested dataset IDs, most similar first.
+        """
+        key = dataset_id.strip().lower()
+        if not key:
+            return []
+        short_key = key.rsplit("/", 1)[-1]
+        with self._lock:
+            # Comparing with every known ID is too slow for the whole Hub, so only the IDs next to the name
+            # in alphabetical order are compared. Sorting by the full ID catches typos in the dataset name,
+            # and sorting by the name after the owner catches typos in the owner.
+            start = bisect.bisect_left(self._keys, key)
+            candidates = set(self._keys[max(0, start - self.neighbourhood):start + self.neighbourhood])
+            start = bisect.bisect_left(self._short_keys, (short_key, ""))
+            neighbours = self._short_keys[max(0, start - self.neighbourhood):start + self.neighbourhood]
+            candidates.update(candidate for _, candidate in neighbours)
+
+            # A name without an owner (e.g. "mmlu") matches the datasets with that name
+            suggestions = [self._names[candidate] for name, candidate in neighbours if "/" not in key and name == key]
+            if len(suggestions) < limit:
+                for match in difflib.get_close_matches(key, sorted(candidates), n=limit, cutoff=cutoff):
+                    if self._names[match] not in suggestions:
+                        suggestions.append(self._names[match])
+        return suggestions[:limit]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+_dataset_name_index = None
+_dataset_name_index_lock = threading.Lock()
+
+
+def get_dataset_name_index() -> DatasetNameIndex:
+    """
+    Get the shared dataset name index, building it from the local catalog the first time it is used.
+
+    Returns:
+        The shared DatasetNameIndex.
+    """
+    global _dataset_name_index
+    with _dataset_name_index_lock:
+        if _dataset_name_index is None:
+            _dataset_name_index = DatasetNameIndex(get_catalog().list_dataset_ids())
+        return _dataset_name_index
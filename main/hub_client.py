@@ -0,0 +1,193 @@
+# hub_client.py
+
+# necessary imports
+import threading
+import time
+from collections import OrderedDict
+from typing import Tuple, Dict, Any, Callable
+from huggingface_hub import HfApi
+from huggingface_hub.utils import RepositoryNotFoundError, RevisionNotFoundError, HFValidationError
+from .constants import HUB_CACHE_TTL, HUB_NEGATIVE_CACHE_TTL, HUB_CACHE_MAX_ENTRIES, HUB_REQUEST_TIMEOUT
+from .shared_cache import get_shared_cache
+
+"""
+    This module contains the shared Hugging Face Hub client and a cache of the dataset information fetched with it.
+    Datasets are fetched with an exact dataset_info lookup, and both found and not-found results are cached,
+    so repeat lookups of the same dataset do not touch the network.
+"""
+
+# One client is shared by the whole app. huggingface_hub reuses a pooled HTTP session for its requests.
+hf_api = HfApi()
+
+
+class TTLCache:
+    """A thread-safe, bounded cache whose entries expire after a time-to-live."""
+
+    def __init__(self, ttl: float, max_entries: int, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()  # Maps a key to a Tuple of (expiry time, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key) -> Tuple[bool, Any]:
+        """
+        Get a value from the cache.
+
+        Args:
+            key: The key of the value.
+
+        Returns:
+            A Tuple containing a boolean indicating if the key was found and the cached value (None if not found).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self.clock():
+                if entry is not None:
+                    del self._entries[key]  # Remove the expired entry
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def set(self, key, value, ttl: float | None = None):
+        """
+        Add a value to the cache, evicting the least recently used entry if the cache is full.
+
+        Args:
+            key: The key of the value.
+            value: The value to cache. None can be cached to remember that something does not exist.
+            ttl: The time-to-live of this entry in seconds (defaults to the cache's ttl).
+        """
+        expiry = self.clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expiry, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove all entries from the cache and reset its statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Return statistics about the cache.
+
+        Returns:
+            A Dictionary containing the number of entries, hits and misses.
+        """
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# Cache of DatasetInfo objects keyed by (dataset id, revision). None means the dataset was not found.
+dataset_info_cache = TTLCache(ttl=HUB_CACHE_TTL, max_entries=HUB_CACHE_MAX_ENTRIES)
+
+
+def fetch_dataset_info(dataset_id: str, revision: str | None = None):
+    """
+    Fetch the information of a dataset from the Hugging Face Hub, using the cache when possible.
+
+    Args:
+        dataset_id: The exact ID of the dataset (e.g. "cais/mmlu").
+        revision: The revision of the dataset (defaults to the main branch).
+
+    Returns:
+        The DatasetInfo of the dataset, or None if the dataset does not exist.
+    """
+    key = (dataset_id, revision or "")
+    found, dataset_info = dataset_info_cache.get(key)
+    if found:
+        return dataset_info
+
+    # Names that another worker process found do not exist are shared through the shared cache.
+    # Datasets that exist are shared through the local catalog instead.
+    shared_cache = get_shared_cache()
+    shared_key = f"{dataset_id}@{revision or ''}"
+    if shared_cache is not None and shared_cache.get("hub_not_found", shared_key)[0]:
+        dataset_info_cache.set(key, None, ttl=HUB_NEGATIVE_CACHE_TTL)
+        return None
+
+    try:
+        dataset_info = hf_api.dataset_info(dataset_id, revision=revision, timeout=HUB_REQUEST_TIMEOUT)
+    except (RepositoryNotFoundError, RevisionNotFoundError, HFValidationError):
+        # Remember names that do not exist for a shorter time, in case the dataset is created later
+        dataset_info_cache.set(key, None, ttl=HUB_NEGATIVE_CACHE_TTL)
+        if shared_cache is not None:
+            shared_cache.set("hub_not_found", shared_key, True, ttl=HUB_NEGATIVE_CACHE_TTL)
+        return None
+
+    dataset_info_cache.set(key, dataset_info)
+    return dataset_info
+
+
+def extract_metadata_from_dataset_info(dataset_info) -> Dict[str, str]:
+    """
+    Map the information of a Hugging Face dataset to metadata attributes.
+
+    Args:
+        dataset_info: The DatasetInfo returned by the Hugging Face Hub.
+
+    Returns:
+        A Dictionary of the metadata attributes that have a value.
+    """
+    # Extract relevant metadata fields
+    # Initialize empty lists for tasks, modalities, and languages and a variable for license
+    license = ""
+    tasks = []
+    modalities = []
+    languages = []
+    # Extract tags and populate the lists and variable
+    for tag in getattr(dataset_info, "tags", None) or []:
+        if tag.startswith("license:"):
+            license = tag.split(":", 1)[1]
+        elif tag.startswith("task_categories:"):
+            tasks.append(tag.split(":", 1)[1])
+        elif tag.startswith("modality:"):
+            modalities.append(tag.split(":", 1)[1])
+        elif tag.startswith("language:"):
+            languages.append(tag.split(":", 1)[1])
+
+    # Use getattr() for all fields to handle missing attributes
+    dataset_id = getattr(dataset_info, "id", None)
+    author = getattr(dataset_info, "author", None)
+    last_modified = getattr(dataset_info, "last_modified", None)
+    created_at = getattr(dataset_info, "created_at", None)
+    description = getattr(dataset_info, "description", None)
+    citation = getattr(dataset_info, "citation", None)
+
+    # Only add attributes to metadata if they have a value
+    metadata = {}
+    if dataset_id:
+        metadata["name"] = dataset_id
+    if author:
+        metadata["creators"] = author
+    if last_modified:
+        metadata["date_modified"] = last_modified.strftime("%Y-%m-%d")
+    if created_at:
+        metadata["date_created"] = created_at.strftime("%Y-%m-%d")
+        metadata["date_published"] = created_at.strftime("%Y-%m-%d") # Assuming published date is same as created date
+    if description:
+        metadata["description"] = description
+    if license:
+        metadata["license"] = license
+    if dataset_id:
+        metadata["url"] = f"https://huggingface.co/datasets/{dataset_id}"
+    if tasks:
+        metadata["task"] = ", ".join(tasks)
+    if modalities:
+        metadata["modality"] = ", ".join(modalities)
+    if languages:
+        metadata["in_language"] = ", ".join(languages)
+    if citation:
+        metadata["cite_as"] = citation
+    return metadata
@@ -5,7 +5,12 @@ from math import e
 import requests
 from dotenv import load_dotenv
 import os
-from typing import Dict
+import hashlib
+import json
+import re
+from typing import Dict, List
+from .constants import LLM_CACHE_TTL, METADATA_ATTRIBUTES
+from .shared_cache import get_shared_cache
 
 load_dotenv()  # Load environment variables from .env file
 
@@ -134,6 +139,70 @@ def create_prompt_to_suggest_citation(metadata: Dict[str, str]) -> str:
 
     return prompt
 
+def create_prompt_to_fill_missing_attributes(metadata: Dict[str, str], attributes: List[str]) -> str:
+    """
+    Create a prompt to suggest one value for each of several missing metadata attributes in one request.
+
+    Args:
+        metadata: A Dictionary of metadata attributes and their values.
+        attributes: The missing metadata attributes.
+
+    Returns:
+        prompt: A prompt string to generate a JSON object with a value for each attribute.
+    """
+    attribute_descriptions = "\n".join(f"    - {attribute}: {METADATA_ATTRIBUTES[attribute]}" for attribute in attributes)
+    prompt = f"""
+    The user is creating metadata for a dataset with the following information:
+    {get_metadata_info_for_prompt(metadata)}
+    The following attributes are missing:
+{attribute_descriptions}
+
+    Please provide the single most likely value for each of these attributes.
+    Answer with a JSON object only, whose keys are the attribute names and whose values are strings.
+    Leave out any attribute you cannot infer from the information above.
+    """
+
+    return prompt
+
+def fill_missing_metadata(metadata: Dict[str, str], attributes: List[str]) -> Dict[str, str]:
+    """
+    Suggest values for several missing metadata attributes with one LLM request.
+
+    Args:
+        metadata: A Dictionary of metadata attributes and their values.
+        attributes: The missing metadata attributes.
+
+    Returns:
+        A Dictionary of the suggested values, only for the requested attributes the LLM could fill.
+    """
+    if not attributes:
+        return {}
+    try:
+        # The batch annotation asks the same question for a dataset on every run, so the answer is cached
+        response = str(create_llm_response(create_prompt_to_fill_missing_attributes(metadata, attributes), use_cache=True, raise_errors=True))
+    except Exception as e:
+        raise Exception(f"An error occurred while trying to use the LLM model.\n {e}")
+
+    # The model may wrap the JSON object in text or a code block
+    match = re.search(r"\{.*\}", response, re.DOTALL)
+    if match is None:
+        return {}
+    try:
+        suggestions = json.loads(match.group(0))
+    except ValueError:
+        return {}
+    if not isinstance(suggestions, dict):
+        return {}
+
+    filled = {}
+    for attribute in attributes:
+        value = suggestions.get(attribute)
+        if isinstance(value, list):
+            value = ", ".join(str(item) for item in value)
+        if isinstance(value, str) and value.strip():
+            filled[attribute] = value.strip()
+    return filled
+
 def ask_user_for_informal_description() -> str:
     """
     Generate probing questions to gather an informal description of the dataset.
@@ -179,13 +248,16 @@ def suggest_metadata(metadata: Dict[str, str], informal_description: str, attrib
         raise Exception(f"An error occurred while trying to use the LLM model.\n {e}")
 
 
-def create_llm_response(prompt: str) -> str:
+def create_llm_response(prompt: str, use_cache: bool = False, raise_errors: bool = False) -> str:
     """
     Use OpenRouter's Mistral 7B Instruct model to generate a response based on the provided prompt.
     Source: https://openrouter.ai/mistralai/mistral-7b-instruct/api 
 
     Args:
         prompt: The input prompt string for the LLM model.
+        use_cache: Whether to reuse the response to an identical prompt from the shared cache. Suggestions in the
+            chat are not cached, so asking again gives a new answer.
+        raise_errors: Whether to raise errors instead of returning an error message that can be shown in the chat.
 
     Returns:
         The response generated by the LLM model.
@@ -201,15 +273,30 @@ def create_llm_response(prompt: str) -> str:
         "model": "mistralai/mistral-7b-instruct:free", # can replace this line with the following if free tokens run out: "model": "mistralai/mistral-7b-instruct"
         "messages": [{"role": "user", "content": model_propmt}],
     }
+
+    # Worker processes share the responses to identical prompts when the shared cache is enabled
+    shared_cache = get_shared_cache() if use_cache else None
+    cache_key = hashlib.sha256(f"{data['model']}\n{model_propmt}".encode("utf-8")).hexdigest()
+    if shared_cache is not None:
+        found, cached_response = shared_cache.get("llm", cache_key)
+        if found:
+            return cached_response
+
     try:
         response = requests.post(api_url, headers=headers, json=data)
         if response.status_code == 200:
             response_json = response.json()
             if "choices" in response_json and response_json["choices"]:
-                return response_json["choices"][0]["message"]["content"]
+                content = response_json["choices"][0]["message"]["content"]
+                # Only successful responses are cached
+                if shared_cache is not None:
+                    shared_cache.set("llm", cache_key, content, ttl=LLM_CACHE_TTL)
+                return content
         else:
             raise Exception(f"An error occurred while trying to use the LLM model.\n {response.status_code}: {response.text}")
     except Exception as e:
+        if raise_errors:
+            raise
         # Handle any exceptions that occur during the request
         return f"Unexpected error occured: {e} \nI'm sorry, I couldn't process your request at the moment. Please try again later."
 
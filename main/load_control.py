@@ -0,0 +1,124 @@
+# load_control.py
+
+# necessary imports
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict
+from .constants import CONCURRENCY_GROUPS, QUEUE_ADMISSION_TIMEOUT
+
+"""
+    This module contains the load control of the Gradio events.
+    Events are split into concurrency groups (cheap UI events, LLM-bound events and NLP-bound events). Gradio limits
+    how many events of a group run at once, and this module keeps track of the events of every group:
+        - An event is admitted before it joins the Gradio queue. When too many events of its group are already
+          waiting, it is rejected straight away, so the user gets a busy message instead of waiting for minutes.
+        - When the event starts, its time in the queue is recorded, and the queue depth, wait times and
+          rejections of every group are available as metrics.
+"""
+
+
+class ConcurrencyGroup:
+    """Tracks the waiting and running events of one concurrency group and rejects events when too many are waiting."""
+
+    def __init__(self, name: str, concurrency_limit: int, max_waiting: int,
+                 admission_timeout: float = QUEUE_ADMISSION_TIMEOUT, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.concurrency_limit = concurrency_limit
+        self.max_waiting = max_waiting
+        self.admission_timeout = admission_timeout
+        self.clock = clock
+        self._admissions = deque()  # Admission times of the events that have not started yet, oldest first
+        self._lock = threading.Lock()
+        self.running = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def admit(self) -> bool:
+        """
+        Admit a new event of the group, unless too many events are already waiting.
+
+        Returns:
+            True if the event was admitted, False if it was rejected.
+        """
+        with self._lock:
+            now = self.clock()
+            self._expire_admissions(now)
+            if len(self._admissions) >= self.max_waiting:
+                self.rejected += 1
+                return False
+            self._admissions.append(now)
+            self.admitted += 1
+            return True
+
+    @contextmanager
+    def run(self):
+        """
+        Record an event of the group while it runs.
+        """
+        with self._lock:
+            now = self.clock()
+            # Gradio starts the events of a group in the order they joined the queue
+            wait = now - self._admissions.popleft() if self._admissions else 0.0
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.running += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+
+    def _expire_admissions(self, now: float):
+        """
+        Forget the admitted events that never started, e.g. because the browser tab was closed. The caller must hold the lock.
+
+        Args:
+            now: The current time.
+        """
+        while self._admissions and now - self._admissions[0] > self.admission_timeout:
+            self._admissions.popleft()
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Return statistics about the events of the group.
+
+        Returns:
+            A Dictionary containing the queue depth, the running events, the numbers of admitted, rejected and
+            completed events, and the average and maximum wait in seconds.
+        """
+        with self._lock:
+            self._expire_admissions(self.clock())
+            started = self.completed + self.running
+            return {
+                "waiting": len(self._admissions),
+                "running": self.running,
+                "concurrency_limit": self.concurrency_limit,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "completed": self.completed,
+                "average_wait": self.total_wait / started if started else 0.0,
+                "max_wait": self.max_wait,
+            }
+
+
+# The concurrency groups of the app
+concurrency_groups = {
+    name: ConcurrencyGroup(name, settings["concurrency_limit"], settings["max_waiting"])
+    for name, settings in CONCURRENCY_GROUPS.items()
+}
+
+
+def get_load_stats() -> Dict[str, Dict[str, float]]:
+    """
+    Return the statistics of all concurrency groups.
+
+    Returns:
+        A Dictionary mapping the name of every group to its statistics.
+    """
+    return {name: group.get_stats() for name, group in concurrency_groups.items()}
@@ -1,12 +1,21 @@
 # metadata_manager.py
 
 # necessary imports
-from huggingface_hub import HfApi
 from .attribute_quality import AttributeQualityChecker
+from .hub_client import fetch_dataset_info, extract_metadata_from_dataset_info
+from .dataset_card import enrich_dataset_metadata
+from .catalog import get_catalog
 from .validation import MetadataValidator
-from .constants import METADATA_ATTRIBUTES
-import json
+from .croissant_jsonld import metadata_to_jsonld
+from .constants import METADATA_ATTRIBUTES, FINALISE_STRICT, DOWNLOADS_MAX_AGE, DOWNLOADS_MAX_COUNT
+from .serialization import dumps_bytes
+from .storage import annotation_store, atomic_write
+from .annotation_index import get_annotation_index
+import hashlib
 import os
+import shutil
+import tempfile
+import time
 import mlcroissant as mlc
 import re
 import unicodedata
@@ -21,6 +30,8 @@ class MetadataManager:
         self.final_metadata = {}
         self.confirmed_metadata = {}
         self.temporary_metadata = {}
+        self.near_duplicates = []  # The saved annotations with nearly the same description or citation as the last saved one
+        self.pending_description_check = None  # The description and the Future of its full check, if it missed the deadline
 
     def reset_metadata(self):
         """
@@ -30,6 +41,34 @@ class MetadataManager:
         self.final_metadata = {}
         self.confirmed_metadata = {}
         self.temporary_metadata = {}
+        self.near_duplicates = []
+        self.pending_description_check = None
+
+    def to_state(self) -> Dict[str, Dict]:
+        """
+        Return the metadata Dictionaries so they can be saved with the session.
+
+        Returns:
+            A Dictionary containing the metadata, final, confirmed and temporary metadata.
+        """
+        return {
+            "metadata": self.metadata,
+            "final_metadata": self.final_metadata,
+            "confirmed_metadata": self.confirmed_metadata,
+            "temporary_metadata": self.temporary_metadata,
+        }
+
+    def load_state(self, state: Dict[str, Dict]):
+        """
+        Restore the metadata Dictionaries saved with a session.
+
+        Args:
+            state: A Dictionary returned by to_state.
+        """
+        self.metadata = dict(state.get("metadata", {}))
+        self.final_metadata = dict(state.get("final_metadata", {}))
+        self.confirmed_metadata = dict(state.get("confirmed_metadata", {}))
+        self.temporary_metadata = dict(state.get("temporary_metadata", {}))
 
     def is_all_attributes_filled(self) -> bool:
         """
@@ -153,7 +192,7 @@ class MetadataManager:
         validator = MetadataValidator()
         errors = validator.validate_all_attributes({attribute: value})
         # Check the quality of the attribute value
-        issues = AttributeQualityChecker().check_quality_of_all_attributes({attribute: value})
+        issues = self.check_quality({attribute: value})
         # Check if there are any errors or issues
         if errors or issues:
             error_messages = "\n".join([f"{attribute}: {message}" for attribute, message in errors.items()]) if errors else ""
@@ -162,6 +201,22 @@ class MetadataManager:
         # If no errors or issues, return True
         return True, "", ""
 
+    def check_quality(self, metadata: Dict[str, str]) -> Dict[str, str]:
+        """
+        Check the quality of attributes, remembering the full check of a description that missed the deadline.
+
+        Args:
+            metadata: A Dictionary of the attributes to check and their values.
+
+        Returns:
+            A Dictionary of issues where keys are attribute names and values are the respective quality issues.
+        """
+        checker = AttributeQualityChecker()
+        issues = checker.check_quality_of_all_attributes(metadata)
+        if checker.pending_description_check is not None:
+            self.pending_description_check = (metadata.get("description"), checker.pending_description_check)
+        return issues
+
     def validate_and_check_quality_all_attributes(self) -> Tuple[bool, str, str]:
         """
         Validate and check the quality of all attributes.
@@ -173,7 +228,7 @@ class MetadataManager:
         validator = MetadataValidator()
         errors = validator.validate_all_attributes(self.metadata)
         # Check quality of all attributes
-        issues = AttributeQualityChecker().check_quality_of_all_attributes(self.metadata)
+        issues = self.check_quality(self.metadata)
         # Check if there are any errors or issues
         if errors or issues:
             error_messages = "\n".join([f"{attribute}: {message}" for attribute, message in errors.items()]) if errors else ""
@@ -193,26 +248,95 @@ class MetadataManager:
         Returns:
             A Tuple containing the file path and filename, or an error message if saving fails.
         """
+        self.near_duplicates = []
         try:
-            # Get the path to the annotations folder
-            base_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            directory = os.path.join(base_directory, "annotations")
+            # Generate the filename
+            filename = self.get_filename()
 
-            # Ensure the directory exists
-            if not os.path.exists(directory):
-                os.makedirs(directory)
+            # Save the file. Sessions and worker processes that save the same file take turns, the file is replaced
+            # atomically, and it is not written again when the metadata did not change (see main/storage.py).
+            filepath, _ = annotation_store.save(filename, dumps_bytes(metadata, indent=True, default=self.json_serial, ensure_ascii=True))
 
-            # Generate the filename
+            # Keep the annotation index up to date, so the annotation can be queried without opening its file,
+            # and flag the saved annotations with nearly the same description or citation for review
+            try:
+                annotation_index = get_annotation_index()
+                annotation_index.upsert(filename, metadata, filepath)
+                self.near_duplicates = annotation_index.find_near_duplicates(filename)
+            except Exception as e:
+                print(f"Error updating the annotation index: {e}")
+
+            return filepath, filename
+        except Exception as e:
+            return None, f"Error saving metadata to file: {str(e)}"
+
+    def get_download_file(self, metadata: Dict[str, str]) -> Tuple[str, str]:
+        """
+        Get a file of the metadata to download.
+        The metadata is serialized in memory, and the file is written to the temporary directory under the hash of
+        its content, so downloading unchanged metadata again reuses the same file while it exists.
+
+        Args:
+            metadata: The metadata Dictionary to download.
+
+        Returns:
+            A Tuple containing the file path and filename, or None and an error message if writing the file fails.
+        """
+        try:
+            data = dumps_bytes(metadata, indent=True, default=self.json_serial, ensure_ascii=True)
             filename = self.get_filename()
+            downloads = os.path.join(tempfile.gettempdir(), "croissant_downloads")
+            directory = os.path.join(downloads, hashlib.sha256(data).hexdigest())
             filepath = os.path.join(directory, filename)
 
-            # Save the file
-            with open(filepath, "w") as file:
-                json.dump(metadata, file, indent=2, default=self.json_serial)
+            # This or another session or worker process may already have written the same file
+            if os.path.exists(filepath):
+                # The folder is aged from its last use, so the cleanup of another session does not remove it
+                os.utime(directory)
+            else:
+                os.makedirs(directory, exist_ok=True)
+                atomic_write(filepath, data, fsync=False)  # The file can be created again if it is lost
+            self.cleanup_downloads(downloads, keep=directory)
 
             return filepath, filename
         except Exception as e:
-            return None, f"Error saving metadata to file: {str(e)}"
+            return None, f"Error creating the metadata file: {str(e)}"
+
+    def cleanup_downloads(self, downloads: str, keep: str | None = None, max_age: float = DOWNLOADS_MAX_AGE,
+                          max_count: int = DOWNLOADS_MAX_COUNT) -> int:
+        """
+        Remove the download folders that are older than max_age, and the oldest ones beyond max_count.
+
+        Args:
+            downloads: The folder that contains a folder for every download file.
+            keep: A download folder that is never removed (e.g. the one just written).
+            max_age: The number of seconds a download folder is kept.
+            max_count: The number of download folders that are kept.
+
+        Returns:
+            The number of download folders removed.
+        """
+        folders = []
+        try:
+            with os.scandir(downloads) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir() and entry.path != keep:
+                            folders.append((entry.stat().st_mtime, entry.path))
+                    except OSError:
+                        continue  # Removed by another process in the meantime
+        except OSError:
+            return 0
+        folders.sort(reverse=True)
+        # The folder that is kept counts towards max_count
+        excess = len(folders) + (1 if keep else 0) - max_count
+        oldest_allowed = time.time() - max_age
+        removed = 0
+        for position, (modified, path) in enumerate(folders):
+            if modified < oldest_allowed or position >= len(folders) - excess:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        return removed
 
     def json_serial(self, obj) -> str:
         """
@@ -261,21 +385,30 @@ class MetadataManager:
         return "metadata.json"
 
     # Finalise Metadata
-    def finalise_metadata(self) -> Tuple[bool, Dict[str, str]]:
+    def finalise_metadata(self, save: bool = True, strict: bool = FINALISE_STRICT) -> Tuple[bool, Dict[str, str]]:
         """
         Finalise metadata in Croissant format.
 
+        Args:
+            save: Whether to save the final metadata to the annotations folder.
+            strict: Whether to build the Croissant metadata with mlcroissant, which also runs its validation,
+                instead of mapping the attributes to JSON-LD directly.
+
         Returns:
             A Tuple containing a boolean indicating success and the final metadata or an error message.
         """
         try:
             attributes_to_remove = ["task", "modality"]
             filtered_metadata = {k:v for k, v in self.metadata.items() if k not in attributes_to_remove}
-            # Create the Croissant metadata object
-            croissant_metadata = mlc.Metadata(**filtered_metadata)
+            if strict:
+                # Create the Croissant metadata object
+                croissant_metadata = mlc.Metadata(**filtered_metadata)
+                self.final_metadata = croissant_metadata.to_json()
+            else:
+                # Map the attributes to Croissant JSON-LD directly, with the same result
+                self.final_metadata = metadata_to_jsonld(filtered_metadata)
 
             # Set the task and modality fields
-            self.final_metadata = croissant_metadata.to_json()
             task = self.metadata.get("task", "")
             modality = self.metadata.get("modality", "")
             if task:
@@ -283,7 +416,8 @@ class MetadataManager:
             if modality:
                 self.final_metadata["modality"] = modality
             # Save metadata to a file
-            filepath, filename = self.save_metadata_to_file(self.final_metadata)
+            if save:
+                filepath, filename = self.save_metadata_to_file(self.final_metadata)
 
             return True, self.final_metadata
         except Exception as e:
@@ -301,67 +435,40 @@ class MetadataManager:
             A Dictionary containing the dataset metadata or an error message if fetching fails.
         """
         try:
-            # Fetch the dataset details using the Hugging Face Hub API
-            api = HfApi() # Hugging Face API
-            found_dataset = list(api.list_datasets(dataset_name={dataset_id_to_find}, limit=1))
-            if not found_dataset:
+            # Datasets looked up on the Hub recently are served from the local catalog without touching the network.
+            # Other catalog rows (e.g. imported from the datasets CSV) lack the dataset card and git tags attributes.
+            catalog = get_catalog()
+            catalog_metadata = catalog.get_enriched(dataset_id_to_find)
+            if catalog_metadata:
+                self.metadata.update(catalog_metadata)
+                return self.metadata, True
+
+            # Fetch the dataset details with an exact (and cached) lookup on the Hugging Face Hub
+            try:
+                found_dataset = fetch_dataset_info(dataset_id_to_find)
+            except Exception:
+                # The catalog is the fallback when the Hub cannot be reached
+                catalog_metadata = catalog.get(dataset_id_to_find)
+                if not catalog_metadata:
+                    raise
+                self.metadata.update(catalog_metadata)
+                return self.metadata, True
+            if found_dataset is None:
                 return None, False
-            found_dataset = found_dataset[0] # Get the first dataset from the list
-          
-            # Extract relevant metadata fields
-            # Initialize empty lists for tasks, modalities, and languages and a variable for license
-            license = ""
-            tasks = []
-            modalities = []
-            languages = []
-            # Extract tags and populate the lists and variable
-            for tag in found_dataset.tags:
-                if tag.startswith("license:"):
-                    license = tag.split(":", 1)[1]
-                elif tag.startswith("task_categories:"):
-                    tasks.append(tag.split(":", 1)[1])
-                elif tag.startswith("modality:"):
-                    modalities.append(tag.split(":", 1)[1])
-                elif tag.startswith("language:"):
-                    languages.append(tag.split(":", 1)[1])
-
-            # Use getattr() for all fields to handle missing attributes 
-            dataset_id = getattr(found_dataset, "id", None)
-            author = getattr(found_dataset, "author", None)
+
+            # Only attributes that have a value are added to the metadata
+            dataset_metadata = extract_metadata_from_dataset_info(found_dataset)
+            # Fill attributes the dataset info leaves empty from the dataset card and git tags
+            dataset_metadata.update(enrich_dataset_metadata(found_dataset, dataset_metadata))
+            self.metadata.update(dataset_metadata)
+
+            # Write the result through to the catalog so the next lookup is local
             last_modified = getattr(found_dataset, "last_modified", None)
-            created_at = getattr(found_dataset, "created_at", None)
-            description = getattr(found_dataset, "description", None)
-            citation = getattr(found_dataset, "citation", None)
-
-            # Only add attributes to metadata if they have a value
-            if dataset_id:
-                self.metadata["name"] = dataset_id
-            if author:
-                self.metadata["creators"] = author
-            if last_modified:
-                self.metadata["date_modified"] = last_modified.strftime("%Y-%m-%d")
-            if created_at:
-                self.metadata["date_created"] = created_at.strftime("%Y-%m-%d")
-                self.metadata["date_published"] = created_at.strftime("%Y-%m-%d") # Assuming published date is same as created date
-            if description:
-                self.metadata["description"] = description
-            if license:
-                self.metadata["license"] = license
-            if dataset_id:
-                self.metadata["url"] = f"https://huggingface.co/datasets/{dataset_id}"
-            if tasks:
-                self.metadata["task"] = ", ".join(tasks)
-            if modalities:
-                self.metadata["modality"] = ", ".join(modalities)
-            if languages:
-                self.metadata["in_language"] = ", ".join(languages)
-            if citation:
-                self.metadata["cite_as"] = citation
+            catalog.upsert(dataset_metadata.get("name", dataset_id_to_find), dataset_metadata,
+                           last_modified.isoformat() if last_modified else None, enriched=True,
+                           sha=getattr(found_dataset, "sha", None))
 
             return self.metadata, True
 
         except Exception as e:
             return {'error': str(e)}, False
-        finally:
-            if hasattr(api, "session") and api.session:
-                api.session.close()  # Close the session explicitly
@@ -0,0 +1,100 @@
+# near_duplicates.py
+
+# necessary imports
+import hashlib
+import re
+import zlib
+import numpy as np
+from typing import List
+from .constants import (
+    NEAR_DUPLICATE_PERMUTATIONS, NEAR_DUPLICATE_BANDS, NEAR_DUPLICATE_SHINGLE_SIZE, NEAR_DUPLICATE_MIN_WORDS
+)
+
+"""
+    This module contains MinHash signatures of texts, to find annotations with near-identical descriptions or citations.
+        - A text is split into shingles (runs of NEAR_DUPLICATE_SHINGLE_SIZE words). The share of shingles two texts
+          have in common (their Jaccard similarity) is how similar they are.
+        - The signature of a text holds the smallest hash of its shingles under NEAR_DUPLICATE_PERMUTATIONS hash
+          functions. The share of equal positions in two signatures estimates the Jaccard similarity of the texts.
+        - Locality-sensitive hashing (LSH) splits the signature into NEAR_DUPLICATE_BANDS bands and hashes each band
+          into a bucket. Texts that share a bucket are candidates, so similar texts are found by looking up the
+          buckets of a text instead of comparing it with every other text. With 32 bands of 4 rows, texts with a
+          similarity of 0.7 share a bucket with a probability above 0.99, and texts with a similarity of 0.2 with 0.05.
+          The similarity of the candidates is then estimated from their signatures.
+"""
+
+# The hash functions are (a * x + b) mod p, with a fixed seed so signatures saved by any process can be compared
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_random = np.random.RandomState(1)
+# a is below 2^31 and x below 2^32, so a * x + b does not overflow 64 bits
+_A = _random.randint(1, 1 << 31, size=NEAR_DUPLICATE_PERMUTATIONS, dtype=np.uint64)
+_B = _random.randint(0, 1 << 32, size=NEAR_DUPLICATE_PERMUTATIONS, dtype=np.uint64)
+
+
+def shingle(text: str, size: int = NEAR_DUPLICATE_SHINGLE_SIZE) -> List[str]:
+    """
+    Split a text into shingles: the runs of consecutive words, ignoring case and punctuation.
+
+    Args:
+        text: The text.
+        size: The number of words in a shingle.
+
+    Returns:
+        A list of shingles, without duplicates.
+    """
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= size:
+        return [" ".join(words)] if words else []
+    return list(dict.fromkeys(" ".join(words[i:i + size]) for i in range(len(words) - size + 1)))
+
+
+def minhash_signature(text: str) -> np.ndarray | None:
+    """
+    Compute the MinHash signature of a text.
+
+    Args:
+        text: The text.
+
+    Returns:
+        The signature as an array of NEAR_DUPLICATE_PERMUTATIONS 32-bit integers, or None if the text has fewer than
+        NEAR_DUPLICATE_MIN_WORDS words (short texts such as "A dataset of images." are often the same by chance).
+    """
+    if len(re.findall(r"\w+", text)) < NEAR_DUPLICATE_MIN_WORDS:
+        return None
+    hashes = np.array([zlib.crc32(item.encode("utf-8")) for item in shingle(text)], dtype=np.uint64)
+    # One row per hash function, one column per shingle
+    permuted = ((np.outer(_A, hashes) + _B[:, None]) % _MERSENNE_PRIME) & _MAX_HASH
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def band_buckets(signature: np.ndarray, bands: int = NEAR_DUPLICATE_BANDS) -> List[int]:
+    """
+    Hash every band of a signature into a bucket. The position of the band is part of the hash, so the buckets of
+    all bands can be kept in one table.
+
+    Args:
+        signature: A MinHash signature.
+        bands: The number of bands.
+
+    Returns:
+        A list with the bucket of every band, as signed 64-bit integers so they can be stored in SQLite.
+    """
+    return [
+        int.from_bytes(hashlib.blake2b(position.to_bytes(2, "little") + band.tobytes(), digest_size=8).digest(), "little", signed=True)
+        for position, band in enumerate(np.split(signature, bands))
+    ]
+
+
+def estimate_similarity(signature: np.ndarray, other_signature: np.ndarray) -> float:
+    """
+    Estimate the Jaccard similarity of two texts from their signatures.
+
+    Args:
+        signature: The MinHash signature of a text.
+        other_signature: The MinHash signature of another text.
+
+    Returns:
+        The estimated similarity, from 0.0 to 1.0.
+    """
+    return float(np.count_nonzero(signature == other_signature)) / len(signature)
@@ -0,0 +1,230 @@
+# nlp_cache.py
+
+# necessary imports
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from typing import Tuple, Dict, List, Any
+from .constants import DOC_CACHE_MAX_ENTRIES, DOC_CACHE_MAX_BYTES
+
+"""
+    This module contains a bounded LRU cache of the features extracted from spaCy Doc objects.
+    The features (part-of-speech sentence structures, token counts and the document vector) are
+    cached instead of the Doc objects themselves, so each text is run through a spaCy pipeline
+    at most once and the memory used by the cache stays small and predictable.
+"""
+
+ENTRY_OVERHEAD_BYTES = 512  # Rough size of the dictionary and key of each cache entry
+
+
+def extract_doc_features(doc) -> Dict[str, Any]:
+    """
+    Extract the features used by the quality checks and evaluation scripts from a spaCy Doc.
+
+    Args:
+        doc: A spaCy Doc object.
+
+    Returns:
+        A Dictionary of features extracted from the Doc.
+    """
+    has_vector = doc.has_vector
+    return {
+        "sentence_structures": [" ".join(token.pos_ for token in sent) for sent in doc.sents],
+        "alpha_word_count": sum(1 for token in doc if token.is_alpha),
+        "verb_count": sum(1 for token in doc if token.pos_ == "VERB"),
+        "entity_count": len(doc.ents),
+        "content_token_count": sum(1 for token in doc if not token.is_stop and not token.is_punct),
+        "vector": doc.vector.copy() if has_vector else None,
+        "vector_norm": float(doc.vector_norm) if has_vector else 0.0,
+    }
+
+
+def estimate_features_size(features: Dict[str, Any]) -> int:
+    """
+    Estimate the memory used by a features Dictionary in bytes.
+
+    Args:
+        features: A Dictionary of features returned by extract_doc_features.
+
+    Returns:
+        The estimated size in bytes.
+    """
+    size = ENTRY_OVERHEAD_BYTES
+    size += sum(sys.getsizeof(structure) for structure in features.get("sentence_structures", []))
+    vector = features.get("vector")
+    if vector is not None:
+        size += vector.nbytes
+    return size
+
+
+class DocFeatureCache:
+    """A thread-safe, bounded LRU cache of features extracted from spaCy Doc objects."""
+
+    def __init__(self, max_entries: int = DOC_CACHE_MAX_ENTRIES, max_bytes: int = DOC_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # Maps a key to a Tuple of (features, size in bytes)
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def make_key(self, nlp, text: str) -> Tuple[str, str]:
+        """
+        Create the cache key for a text processed by a spaCy pipeline.
+
+        Args:
+            nlp: The spaCy pipeline used to process the text.
+            text: The text to process.
+
+        Returns:
+            A Tuple containing the model name and the SHA-256 hash of the text.
+        """
+        model_name = f"{nlp.meta.get('lang', '')}_{nlp.meta.get('name', '')}"
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return model_name, text_hash
+
+    def get(self, key: Tuple[str, str]) -> Dict[str, Any] | None:
+        """
+        Get the cached features for a key and mark them as recently used.
+
+        Args:
+            key: The cache key created by make_key.
+
+        Returns:
+            The cached features, or None if the key is not in the cache.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def contains(self, key: Tuple[str, str]) -> bool:
+        """
+        Check if a key is in the cache without updating its statistics or recency.
+
+        Args:
+            key: The cache key created by make_key.
+
+        Returns:
+            True if the key is in the cache, False otherwise.
+        """
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key: Tuple[str, str], features: Dict[str, Any]):
+        """
+        Add features to the cache, evicting the least recently used entries if a limit is exceeded.
+
+        Args:
+            key: The cache key created by make_key.
+            features: The features to cache.
+        """
+        size = estimate_features_size(features)
+        if size > self.max_bytes:
+            return  # Never cache an entry that is larger than the whole cache
+        with self._lock:
+            if key in self._entries:
+                self._current_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (features, size)
+            self._current_bytes += size
+            while len(self._entries) > self.max_entries or self._current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._current_bytes -= evicted_size
+                self.evictions += 1
+
+    def get_features(self, nlp, text: str, pool=None) -> Dict[str, Any]:
+        """
+        Get the features of a text, running it through the spaCy pipeline only on a cache miss.
+
+        Args:
+            nlp: The spaCy pipeline used to process the text.
+            text: The text to process.
+            pool: An optional NLPWorkerPool that processes the text in a worker process instead.
+
+        Returns:
+            A Dictionary of features extracted from the text. It must not be modified.
+        """
+        key = self.make_key(nlp, text)
+        features = self.get(key)
+        if features is None:
+            if pool is not None:
+                features = pool.extract_features(text, nlp)
+            else:
+                features = extract_doc_features(nlp(text))
+            self.put(key, features)
+        return features
+
+    def get_features_batch(self, nlp, texts: List[str], batch_size: int = 64, n_process: int = 1) -> List[Dict[str, Any]]:
+        """
+        Get the features of many texts, running the cache misses through nlp.pipe in batches.
+
+        Args:
+            nlp: The spaCy pipeline used to process the texts.
+            texts: The texts to process.
+            batch_size: The number of texts spaCy processes in each batch.
+            n_process: The number of processes spaCy uses.
+
+        Returns:
+            A list of features Dictionaries, in the same order as the texts.
+        """
+        keys = [self.make_key(nlp, text) for text in texts]
+        results = {}
+        missing = {}  # Maps each uncached key to its text, so duplicates are only parsed once
+        for key, text in zip(keys, texts):
+            if key in results or key in missing:
+                continue
+            features = self.get(key)
+            if features is None:
+                missing[key] = text
+            else:
+                results[key] = features
+
+        docs = nlp.pipe(missing.values(), batch_size=batch_size, n_process=n_process)
+        for key, doc in zip(missing.keys(), docs):
+            features = extract_doc_features(doc)
+            self.put(key, features)
+            results[key] = features
+
+        return [results[key] for key in keys]
+
+    def get_stats(self) -> Dict[str, int | float]:
+        """
+        Return statistics about the cache.
+
+        Returns:
+            A Dictionary containing the number of entries, memory used, hits, misses, evictions and hit rate.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._current_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        """
+        Remove all entries from the cache and reset its statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+
+# The cache shared by the quality checks and the evaluation scripts
+doc_cache = DocFeatureCache()
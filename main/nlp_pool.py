@@ -0,0 +1,148 @@
+# nlp_pool.py
+
+# necessary imports
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any
+import spacy
+from .constants import SPACY_MODEL_NAME
+from .nlp_cache import extract_doc_features
+
+"""
+    This module contains an optional process pool for running spaCy outside the main process.
+    spaCy inference is CPU-bound and holds the GIL, so concurrent quality checks in one process
+    run on a single core. Each worker process loads the model once and returns the extracted
+    features, so throughput scales with the number of cores.
+
+    The pool is configured with environment variables:
+        - NLP_POOL_SIZE: number of worker processes (0 or unset runs spaCy in-process)
+        - NLP_POOL_FALLBACK: run spaCy in-process if the pool fails (default 1, set to 0 to disable)
+        - NLP_POOL_TIMEOUT: seconds to wait for a worker before giving up (default 30)
+"""
+
+# The spaCy pipeline loaded once in each worker process
+_worker_nlp = None
+
+
+def load_worker_model(model_name: str):
+    """
+    Load the spaCy model in a worker process. Used as the pool initializer.
+
+    Args:
+        model_name: The name of the spaCy model to load.
+    """
+    global _worker_nlp
+    _worker_nlp = spacy.load(model_name)
+
+
+def extract_features_in_worker(text: str) -> Dict[str, Any]:
+    """
+    Extract the features of a text in a worker process.
+
+    Args:
+        text: The text to process.
+
+    Returns:
+        A Dictionary of features extracted from the text.
+    """
+    return extract_doc_features(_worker_nlp(text))
+
+
+class NLPWorkerPool:
+    """A pool of worker processes that each run a preloaded spaCy pipeline."""
+
+    def __init__(self, model_name: str = SPACY_MODEL_NAME, pool_size: int = 2, fallback_to_in_process: bool = True, timeout: float = 30.0):
+        self.model_name = model_name
+        self.pool_size = pool_size
+        self.fallback_to_in_process = fallback_to_in_process
+        self.timeout = timeout
+        self.fallback_count = 0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def start(self) -> ProcessPoolExecutor:
+        """
+        Start the worker processes if they are not already running.
+
+        Returns:
+            The process pool executor.
+        """
+        with self._lock:
+            if self._executor is None:
+                # "spawn" avoids forking a process that already runs server threads
+                context = multiprocessing.get_context("spawn")
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.pool_size,
+                    mp_context=context,
+                    initializer=load_worker_model,
+                    initargs=(self.model_name,),
+                )
+            return self._executor
+
+    def warm_up(self):
+        """
+        Start every worker process and load the model, so the first requests are not slowed down.
+        """
+        executor = self.start()
+        futures = [executor.submit(extract_features_in_worker, "") for _ in range(self.pool_size)]
+        for future in futures:
+            future.result(timeout=self.timeout)
+
+    def extract_features(self, text: str, nlp=None) -> Dict[str, Any]:
+        """
+        Extract the features of a text in a worker process.
+
+        Args:
+            text: The text to process.
+            nlp: The in-process spaCy pipeline used as a fallback if the pool fails.
+
+        Returns:
+            A Dictionary of features extracted from the text.
+        """
+        try:
+            future = self.start().submit(extract_features_in_worker, text)
+            return future.result(timeout=self.timeout)
+        except (BrokenProcessPool, TimeoutError, OSError) as e:
+            if isinstance(e, BrokenProcessPool):
+                self.shutdown()  # A new pool is started on the next request
+            if not self.fallback_to_in_process or nlp is None:
+                raise
+            self.fallback_count += 1
+            return extract_doc_features(nlp(text))
+
+    def shutdown(self):
+        """
+        Stop the worker processes.
+        """
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+_nlp_pool = None
+_nlp_pool_lock = threading.Lock()
+
+
+def get_nlp_pool() -> NLPWorkerPool | None:
+    """
+    Get the shared worker pool configured by the environment variables.
+
+    Returns:
+        The shared NLPWorkerPool, or None if spaCy should run in-process.
+    """
+    global _nlp_pool
+    pool_size = int(os.getenv("NLP_POOL_SIZE", "0") or 0)
+    if pool_size <= 0:
+        return None
+    with _nlp_pool_lock:
+        if _nlp_pool is None:
+            _nlp_pool = NLPWorkerPool(
+                pool_size=pool_size,
+                fallback_to_in_process=os.getenv("NLP_POOL_FALLBACK", "1") != "0",
+                timeout=float(os.getenv("NLP_POOL_TIMEOUT", "30")),
+            )
+        return _nlp_pool
@@ -0,0 +1,147 @@
+# serialization.py
+
+# necessary imports
+import datetime
+import json
+import re
+from typing import Any, Callable
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the standard library json module is used without it
+    orjson = None
+
+"""
+    This module serializes metadata to JSON for the chat history, the saved metadata files and the downloads.
+    It uses orjson when it is installed and the standard library json module otherwise, and both give the same text:
+    two-space indentation, non-ASCII characters written as UTF-8, and dates written as YYYY-MM-DD.
+    With ensure_ascii, non-ASCII characters are written as \\u escapes like json.dumps does by default, which is
+    the format of the metadata files saved to disk.
+    orjson serializes dates natively in the RFC 3339 format, so they are passed through to serialize_default
+    to keep the format of the existing metadata files.
+"""
+
+
+def serialize_default(obj: Any) -> Any:
+    """
+    Serialize the objects that JSON does not support.
+
+    Args:
+        obj: The object to serialize.
+
+    Returns:
+        The serialized object.
+    """
+    # Dates are saved the same way as in the downloaded metadata files
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.strftime("%Y-%m-%d")
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj: Any, indent: bool = False, sort_keys: bool = False,
+                default: Callable[[Any], Any] | None = None, ensure_ascii: bool = False) -> bytes:
+    """
+    Serialize an object to UTF-8 encoded JSON.
+
+    Args:
+        obj: The object to serialize.
+        indent: Whether to indent the JSON with two spaces.
+        sort_keys: Whether to sort the keys of Dictionaries.
+        default: A function that serializes the objects JSON does not support. Defaults to serialize_default.
+        ensure_ascii: Whether to write non-ASCII characters as \\u escapes.
+
+    Returns:
+        The JSON as bytes.
+    """
+    default = default or serialize_default
+    if orjson is not None:
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            data = orjson.dumps(obj, default=default, option=option)
+            # orjson always writes UTF-8, so the escapes are added afterwards
+            return _escape_non_ascii(data.decode("utf-8")).encode("ascii") if ensure_ascii else data
+        except orjson.JSONEncodeError:
+            pass  # E.g. integers larger than 64 bits, which the json module supports
+    return _stdlib_dumps(obj, indent, sort_keys, default, ensure_ascii).encode("utf-8")
+
+
+def dumps(obj: Any, indent: bool = False, sort_keys: bool = False,
+          default: Callable[[Any], Any] | None = None, ensure_ascii: bool = False) -> str:
+    """
+    Serialize an object to a JSON string.
+
+    Args:
+        obj: The object to serialize.
+        indent: Whether to indent the JSON with two spaces.
+        sort_keys: Whether to sort the keys of Dictionaries.
+        default: A function that serializes the objects JSON does not support. Defaults to serialize_default.
+        ensure_ascii: Whether to write non-ASCII characters as \\u escapes.
+
+    Returns:
+        The JSON as a string.
+    """
+    return dumps_bytes(obj, indent, sort_keys, default, ensure_ascii).decode("utf-8")
+
+
+def loads(data: bytes | str) -> Any:
+    """
+    Parse JSON.
+
+    Args:
+        data: The JSON as bytes or a string.
+
+    Returns:
+        The parsed object.
+    """
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _escape_non_ascii(text: str) -> str:
+    """
+    Write the non-ASCII characters of JSON text as \\u escapes, as json.dumps does with ensure_ascii.
+    Non-ASCII characters can only be inside strings, so the rest of the JSON is not changed. Like json.dumps,
+    DEL (which is ASCII, but not printable) is escaped too.
+
+    Args:
+        text: The JSON text.
+
+    Returns:
+        The JSON text with only ASCII characters.
+    """
+    def escape(match: re.Match) -> str:
+        code = ord(match.group())
+        if code > 0xFFFF:
+            # Characters outside the Basic Multilingual Plane are written as a surrogate pair
+            code -= 0x10000
+            return "\\u{0:04x}\\u{1:04x}".format(0xD800 | (code >> 10), 0xDC00 | (code & 0x3FF))
+        return "\\u{0:04x}".format(code)
+    return re.sub(r"[^\x00-\x7e]", escape, text)
+
+
+def _stdlib_dumps(obj: Any, indent: bool, sort_keys: bool, default: Callable[[Any], Any],
+                  ensure_ascii: bool = False) -> str:
+    """
+    Serialize an object with the json module, in the same format as orjson.
+
+    Args:
+        obj: The object to serialize.
+        indent: Whether to indent the JSON with two spaces.
+        sort_keys: Whether to sort the keys of Dictionaries.
+        default: A function that serializes the objects JSON does not support.
+        ensure_ascii: Whether to write non-ASCII characters as \\u escapes.
+
+    Returns:
+        The JSON as a string.
+    """
+    return json.dumps(
+        obj,
+        indent=2 if indent else None,
+        separators=None if indent else (",", ":"),
+        sort_keys=sort_keys,
+        ensure_ascii=ensure_ascii,
+        default=default,
+    )
@@ -0,0 +1,221 @@
+# server.py
+
+# necessary imports
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import re
+import zlib
+from contextlib import asynccontextmanager
+from http.cookies import SimpleCookie
+from typing import List
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from .constants import DEFAULT_SHARED_CACHE_PATH
+
+"""
+    This module runs the chatbot as several worker processes behind one entrypoint:
+        python -m main.server --workers 4 --port 7860
+    Every worker is a uvicorn server with the Gradio app mounted into FastAPI. The entrypoint is a small
+    proxy that routes every browser (by a cookie) and every API client (by its Gradio session hash) to the
+    same worker, because Gradio's queue and event stream live in the memory of one process. Requests that
+    belong to no session are spread over the workers in turn.
+    The workers share the saved chatbot sessions, the local catalog and a cache of LLM responses and
+    not-found Hub datasets through SQLite databases on the local disk, so CPU-bound spaCy work scales
+    across cores while a user still sees the same session on any worker.
+"""
+
+WORKER_COOKIE = "croissant_worker"
+
+# Headers that only apply to one connection and must not be forwarded by the proxy
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "transfer-encoding", "upgrade", "content-length",
+}
+
+HEARTBEAT_PATH = re.compile(r"/heartbeat/([^/?]+)")
+
+
+def worker_for_session(session_hash: str, workers: int) -> int:
+    """
+    Get the worker that serves a session. The hash is stable across processes and restarts.
+
+    Args:
+        session_hash: The Gradio session hash of the client.
+        workers: The number of workers.
+
+    Returns:
+        The index of the worker.
+    """
+    return zlib.crc32(session_hash.encode("utf-8")) % workers
+
+
+def extract_session_hash(path: str, query_params, body: bytes) -> str | None:
+    """
+    Find the Gradio session hash of a request, if it has one.
+
+    Args:
+        path: The path of the request.
+        query_params: The query parameters of the request.
+        body: The body of the request.
+
+    Returns:
+        The session hash, or None if the request does not belong to a session.
+    """
+    if query_params.get("session_hash"):
+        return query_params.get("session_hash")
+    match = HEARTBEAT_PATH.search(path)
+    if match:
+        return match.group(1)
+    # Events are queued with a JSON body that contains the session hash
+    if body and path.endswith("/queue/join"):
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return None
+        if isinstance(payload, dict) and isinstance(payload.get("session_hash"), str):
+            return payload["session_hash"]
+    return None
+
+
+def choose_worker(cookies: dict, session_hash: str | None, workers: int, next_worker: int) -> int:
+    """
+    Choose the worker that handles a request.
+
+    Args:
+        cookies: The cookies of the request.
+        session_hash: The Gradio session hash of the request, or None.
+        workers: The number of workers.
+        next_worker: The worker to use for a request that belongs to no session.
+
+    Returns:
+        The index of the worker.
+    """
+    # A browser keeps the worker it was first sent to, including for its file downloads
+    cookie = cookies.get(WORKER_COOKIE)
+    if cookie is not None and cookie.isdigit() and int(cookie) < workers:
+        return int(cookie)
+    # API clients do not keep cookies, so their session hash decides
+    if session_hash is not None:
+        return worker_for_session(session_hash, workers)
+    return next_worker
+
+
+def create_worker_app() -> FastAPI:
+    """
+    Create the FastAPI app of a worker, with the Gradio app mounted at the root.
+
+    Returns:
+        The FastAPI app.
+    """
+    # The Gradio app is imported here, so the proxy process does not load spaCy models
+    import gradio as gr
+    from .app import demo
+
+    return gr.mount_gradio_app(FastAPI(), demo, path="/")
+
+
+def create_proxy_app(worker_urls: List[str]) -> FastAPI:
+    """
+    Create the proxy that routes requests to the workers.
+
+    Args:
+        worker_urls: The base URLs of the workers.
+
+    Returns:
+        The FastAPI app of the proxy.
+    """
+    # Event streams stay open while a request is processed, so there is no read timeout
+    client = httpx.AsyncClient(timeout=httpx.Timeout(10.0, read=None))
+    round_robin = itertools.cycle(range(len(worker_urls)))
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        yield
+        await client.aclose()
+
+    app = FastAPI(docs_url=None, redoc_url=None, openapi_url=None, lifespan=lifespan)
+
+    @app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"])
+    async def proxy(request: Request, path: str):
+        body = await request.body()
+        session_hash = extract_session_hash(request.url.path, request.query_params, body)
+        worker = choose_worker(request.cookies, session_hash, len(worker_urls), next(round_robin))
+
+        headers = [(name, value) for name, value in request.headers.raw if name.decode("latin-1").lower() not in HOP_BY_HOP_HEADERS]
+        upstream_request = client.build_request(
+            request.method,
+            httpx.URL(f"{worker_urls[worker]}/{path}", query=request.url.query.encode("utf-8")),
+            headers=headers,
+            content=body,
+        )
+        upstream_response = await client.send(upstream_request, stream=True)
+
+        response = StreamingResponse(
+            upstream_response.aiter_raw(),
+            status_code=upstream_response.status_code,
+            background=BackgroundTask(upstream_response.aclose),
+        )
+        for name, value in upstream_response.headers.multi_items():
+            if name.lower() not in HOP_BY_HOP_HEADERS:
+                response.headers.append(name, value)
+        if request.cookies.get(WORKER_COOKIE) != str(worker):
+            cookie = SimpleCookie()
+            cookie[WORKER_COOKIE] = str(worker)
+            cookie[WORKER_COOKIE]["path"] = "/"
+            cookie[WORKER_COOKIE]["httponly"] = True
+            cookie[WORKER_COOKIE]["samesite"] = "Lax"
+            response.headers.append("set-cookie", cookie[WORKER_COOKIE].OutputString())
+        return response
+
+    return app
+
+
+def run_worker(host: str, port: int):
+    """
+    Run one worker process.
+
+    Args:
+        host: The host the worker listens on.
+        port: The port the worker listens on.
+    """
+    uvicorn.run("main.server:create_worker_app", factory=True, host=host, port=port, log_level="warning")
+
+
+def main():
+    """
+    Start the workers and the proxy in front of them.
+    """
+    parser = argparse.ArgumentParser(description="Run the Croissant Chatbot with several worker processes.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="The number of worker processes.")
+    parser.add_argument("--host", default="127.0.0.1", help="The host the proxy listens on.")
+    parser.add_argument("--port", type=int, default=7860, help="The port of the proxy. The workers use the following ports.")
+    parser.add_argument("--shared-cache", default=os.getenv("SHARED_CACHE_PATH", DEFAULT_SHARED_CACHE_PATH),
+                        help="The SQLite database shared by the workers.")
+    args = parser.parse_args()
+
+    # The workers inherit the environment, so they all open the same shared cache
+    os.environ["SHARED_CACHE_PATH"] = args.shared_cache
+
+    context = multiprocessing.get_context("spawn")
+    worker_ports = [args.port + index + 1 for index in range(max(1, args.workers))]
+    processes = [context.Process(target=run_worker, args=("127.0.0.1", port), daemon=True) for port in worker_ports]
+    for process in processes:
+        process.start()
+    try:
+        proxy_app = create_proxy_app([f"http://127.0.0.1:{port}" for port in worker_ports])
+        uvicorn.run(proxy_app, host=args.host, port=args.port, log_level="warning")
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
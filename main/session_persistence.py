@@ -0,0 +1,226 @@
+# session_persistence.py
+
+# necessary imports
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict
+from .constants import SESSION_DB_PATH, SESSION_FLUSH_INTERVAL, SESSION_RETENTION, SESSION_COMPACTION_INTERVAL
+from .serialization import dumps_bytes, loads
+
+"""
+    This module saves chatbot sessions to SQLite so they survive restarts and can be resumed by any worker.
+    Sessions are saved as compressed JSON snapshots. Saves are queued in memory and written in batches
+    by a background thread (write-behind), so a chat message never waits for the disk, and snapshots
+    that did not change are not written again. Sessions that have not changed for longer than the
+    retention period are removed periodically (compaction).
+"""
+
+
+def encode_snapshot(state: Dict) -> bytes:
+    """
+    Encode the state of a session as compressed JSON.
+
+    Args:
+        state: The state Dictionary of the session.
+
+    Returns:
+        The compressed snapshot.
+    """
+    return zlib.compress(dumps_bytes(state))
+
+
+def decode_snapshot(snapshot: bytes) -> Dict:
+    """
+    Decode a compressed JSON snapshot.
+
+    Args:
+        snapshot: The compressed snapshot.
+
+    Returns:
+        The state Dictionary of the session.
+    """
+    return loads(zlib.decompress(snapshot))
+
+
+class SessionPersistence:
+    """Write-behind storage of session snapshots in SQLite, shared by all worker processes."""
+
+    def __init__(self, db_path: str = SESSION_DB_PATH, flush_interval: float = SESSION_FLUSH_INTERVAL,
+                 retention: float = SESSION_RETENTION, compaction_interval: float = SESSION_COMPACTION_INTERVAL,
+                 background: bool = True):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.retention = retention
+        self.compaction_interval = compaction_interval
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        # A busy timeout lets several worker processes write to the same database
+        self._connection = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()  # Guards the connection
+        self._pending = {}  # Maps a session ID to its latest snapshot that has not been written yet
+        self._pending_lock = threading.Lock()
+        self._written_digests = {}  # Maps a session ID to the digest of its last written snapshot
+        self._stop = threading.Event()
+        self.writes = 0
+        self.skipped_writes = 0
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    snapshot BLOB NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+        self._thread = None
+        if background:
+            self._thread = threading.Thread(target=self._run, name="session-persistence", daemon=True)
+            self._thread.start()
+
+    def save(self, session_id: str, state: Dict):
+        """
+        Queue a snapshot of a session to be written by the next flush.
+
+        Args:
+            session_id: The ID of the session.
+            state: The state Dictionary of the session.
+        """
+        snapshot = encode_snapshot(state)
+        with self._pending_lock:
+            # Only the latest snapshot of a session is written
+            self._pending[session_id] = snapshot
+
+    def load(self, session_id: str) -> Dict | None:
+        """
+        Load the latest snapshot of a session.
+
+        Args:
+            session_id: The ID of the session.
+
+        Returns:
+            The state Dictionary of the session, or None if the session was never saved.
+        """
+        with self._pending_lock:
+            snapshot = self._pending.get(session_id)
+        if snapshot is None:
+            with self._lock:
+                row = self._connection.execute("SELECT snapshot FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            snapshot = row[0] if row else None
+        return decode_snapshot(snapshot) if snapshot is not None else None
+
+    def delete(self, session_id: str):
+        """
+        Delete a saved session.
+
+        Args:
+            session_id: The ID of the session.
+        """
+        with self._pending_lock:
+            self._pending.pop(session_id, None)
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._written_digests.pop(session_id, None)
+
+    def flush(self) -> int:
+        """
+        Write the queued snapshots to the database in one transaction.
+
+        Returns:
+            The number of snapshots written.
+        """
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        now = time.time()
+        rows = []
+        digests = {}
+        for session_id, snapshot in pending.items():
+            digest = hashlib.blake2b(snapshot, digest_size=16).digest()
+            if self._written_digests.get(session_id) == digest:
+                self.skipped_writes += 1  # Nothing changed since the last write
+                continue
+            rows.append((session_id, snapshot, now))
+            digests[session_id] = digest
+
+        if rows:
+            try:
+                with self._lock, self._connection:
+                    self._connection.executemany(
+                        "INSERT OR REPLACE INTO sessions (session_id, snapshot, updated_at) VALUES (?, ?, ?)", rows
+                    )
+                    self._written_digests.update(digests)
+            except sqlite3.Error:
+                # Queue the snapshots again, unless a newer snapshot of the session was saved in the meantime
+                with self._pending_lock:
+                    for session_id, snapshot, _ in rows:
+                        self._pending.setdefault(session_id, snapshot)
+                raise
+            self.writes += len(rows)
+        return len(rows)
+
+    def compact(self) -> int:
+        """
+        Remove the sessions that have not changed for longer than the retention period and shrink the log.
+
+        Returns:
+            The number of sessions removed.
+        """
+        cutoff = time.time() - self.retention
+        with self._lock:
+            with self._connection:
+                removed = self._connection.execute("DELETE FROM sessions WHERE updated_at < ?", (cutoff,)).rowcount
+            self._connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            # Forget the digests of sessions that are no longer saved
+            if len(self._written_digests) > 0:
+                saved_ids = {row[0] for row in self._connection.execute("SELECT session_id FROM sessions")}
+                self._written_digests = {
+                    session_id: digest for session_id, digest in self._written_digests.items() if session_id in saved_ids
+                }
+        return removed
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Return statistics about the saved sessions.
+
+        Returns:
+            A Dictionary containing the number of saved and queued sessions, writes and skipped writes.
+        """
+        with self._lock:
+            saved = self._connection.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        with self._pending_lock:
+            pending = len(self._pending)
+        return {"saved_sessions": saved, "pending": pending, "writes": self.writes, "skipped_writes": self.skipped_writes}
+
+    def _run(self):
+        """
+        Flush the queued snapshots periodically and compact the database, until the persistence is closed.
+        """
+        next_compaction = time.monotonic() + self.compaction_interval
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+                if time.monotonic() >= next_compaction:
+                    self.compact()
+                    next_compaction = time.monotonic() + self.compaction_interval
+            except sqlite3.Error as e:
+                # The snapshots were queued again and are retried by the next flush
+                print(f"Error saving sessions: {e}")
+
+    def close(self):
+        """
+        Stop the background thread, write the queued snapshots and close the database.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,134 @@
+# session_store.py
+
+# necessary imports
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Any
+from .constants import SESSION_MAX_COUNT, SESSION_IDLE_TIMEOUT
+from .session_persistence import SessionPersistence
+
+"""
+    This module contains the store of chatbot sessions.
+    Every browser tab gets its own session ID and its own CroissantChatbotManager, so concurrent users
+    do not share their chat history or metadata. The store is bounded: idle sessions are evicted
+    after a timeout, and the least recently used session is evicted when the store is full.
+    With a SessionPersistence, sessions are saved after every change, so a session that was evicted,
+    or that was created by another worker or before a restart, is restored instead of starting again.
+"""
+
+
+class SessionStore:
+    """A thread-safe, bounded store of per-session objects keyed by session ID."""
+
+    def __init__(self, factory: Callable[[], Any], max_sessions: int = SESSION_MAX_COUNT,
+                 idle_timeout: float = SESSION_IDLE_TIMEOUT, clock: Callable[[], float] = time.monotonic,
+                 persistence: SessionPersistence | None = None, to_state: Callable[[Any], Dict] | None = None,
+                 from_state: Callable[[Dict], Any] | None = None):
+        self.factory = factory
+        self.persistence = persistence
+        self.to_state = to_state  # Converts a session object to a state Dictionary that can be saved
+        self.from_state = from_state  # Creates a session object from a saved state Dictionary
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+        self._sessions = OrderedDict()  # Maps a session ID to a Tuple of (last access time, session), least recent first
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evicted_idle = 0
+        self.evicted_full = 0
+        self.restored = 0
+
+    @staticmethod
+    def new_session_id() -> str:
+        """
+        Create a new random session ID.
+
+        Returns:
+            The session ID.
+        """
+        return uuid.uuid4().hex
+
+    def get(self, session_id: str) -> Any:
+        """
+        Get the object of a session, creating it if the session is new or was evicted.
+
+        Args:
+            session_id: The ID of the session.
+
+        Returns:
+            The object of the session.
+        """
+        with self._lock:
+            now = self.clock()
+            self._evict_idle(now)
+            entry = self._sessions.pop(session_id, None)
+            if entry is None:
+                state = self.persistence.load(session_id) if self.persistence else None
+                if state is not None:
+                    entry = (now, self.from_state(state))
+                    self.restored += 1
+                else:
+                    entry = (now, self.factory())
+                    self.created += 1
+            self._sessions[session_id] = (now, entry[1])  # Move the session to the most recent end
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evicted_full += 1
+            return entry[1]
+
+    def save(self, session_id: str):
+        """
+        Save the current state of a session, if the store has a persistence.
+
+        Args:
+            session_id: The ID of the session.
+        """
+        if self.persistence is None:
+            return
+        with self._lock:
+            entry = self._sessions.get(session_id)
+        if entry is not None:
+            self.persistence.save(session_id, self.to_state(entry[1]))
+
+    def remove(self, session_id: str):
+        """
+        Remove a session from memory, e.g. when its browser tab is closed. A saved session can still be restored.
+
+        Args:
+            session_id: The ID of the session.
+        """
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _evict_idle(self, now: float):
+        """
+        Evict the sessions that have been idle for longer than the timeout. The caller must hold the lock.
+
+        Args:
+            now: The current time.
+        """
+        while self._sessions:
+            session_id, (last_access, _) = next(iter(self._sessions.items()))
+            if now - last_access < self.idle_timeout:
+                break
+            del self._sessions[session_id]
+            self.evicted_idle += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Return statistics about the sessions.
+
+        Returns:
+            A Dictionary containing the number of live sessions and the numbers of created, restored and evicted sessions.
+        """
+        with self._lock:
+            self._evict_idle(self.clock())
+            return {
+                "live_sessions": len(self._sessions),
+                "created": self.created,
+                "restored": self.restored,
+                "evicted_idle": self.evicted_idle,
+                "evicted_full": self.evicted_full,
+            }
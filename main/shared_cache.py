@@ -0,0 +1,121 @@
+# shared_cache.py
+
+# necessary imports
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Tuple
+
+"""
+    This module contains a cache stored in SQLite on the local disk, so all worker processes of a
+    multi-worker deployment share it. It caches the LLM responses of the batch annotation and Hugging Face datasets that do not exist.
+    The database uses write-ahead logging, so readers in one process do not block a writer in another.
+    The cache is enabled by setting the SHARED_CACHE_PATH environment variable (main/server.py does this
+    for its workers). Without it get_shared_cache returns None and every process only uses its own caches.
+"""
+
+
+class SharedCache:
+    """A cache of JSON values with a time-to-live, shared by processes through a SQLite database."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        # A busy timeout lets several worker processes write to the same database
+        self._connection = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+                """
+            )
+
+    def get(self, namespace: str, key: str) -> Tuple[bool, Any]:
+        """
+        Get a value from the cache.
+
+        Args:
+            namespace: The namespace of the value (e.g. "llm").
+            key: The key of the value.
+
+        Returns:
+            A Tuple containing a boolean indicating if the key was found and the cached value (None if not found).
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM cache WHERE namespace = ? AND key = ? AND expires_at > ?", (namespace, key, time.time())
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+        return True, json.loads(row[0])
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float):
+        """
+        Add a value to the cache.
+
+        Args:
+            namespace: The namespace of the value.
+            key: The key of the value.
+            value: The value to cache. It must be serializable to JSON.
+            ttl: The time-to-live of the value in seconds.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, json.dumps(value), time.time() + ttl),
+            )
+
+    def prune(self) -> int:
+        """
+        Remove the expired values.
+
+        Returns:
+            The number of values removed.
+        """
+        with self._lock, self._connection:
+            return self._connection.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def close(self):
+        """
+        Close the database connection.
+        """
+        with self._lock:
+            self._connection.close()
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_cache() -> SharedCache | None:
+    """
+    Get the cache shared by the worker processes, if it is enabled.
+
+    Returns:
+        The SharedCache, or None if the SHARED_CACHE_PATH environment variable is not set.
+    """
+    global _shared_cache
+    db_path = os.getenv("SHARED_CACHE_PATH")
+    if not db_path:
+        return None
+    with _shared_cache_lock:
+        if _shared_cache is None or _shared_cache.db_path != db_path:
+            _shared_cache = SharedCache(db_path)
+            # Remove the values that expired while the app was not running
+            _shared_cache.prune()
+        return _shared_cache
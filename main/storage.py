@@ -0,0 +1,168 @@
+# storage.py
+
+# necessary imports
+import hashlib
+import os
+import tempfile
+import threading
+from typing import Dict, Tuple
+from filelock import FileLock
+from .constants import ANNOTATIONS_DIRECTORY, ANNOTATION_FSYNC, ANNOTATION_DEDUPLICATE
+
+"""
+    This module saves the final metadata files to the annotations folder, safely for many sessions and processes:
+        - Every file has its own lock (a lock file in the temporary directory), so sessions, worker processes and
+          batch threads that save a file with the same name take turns, while different files are saved in parallel.
+        - A file is written to a temporary file in the same folder, flushed to the disk and renamed over the old file,
+          so a reader or a crash never leaves a partially written file.
+        - Metadata that did not change is not written again: the hash of the last content saved to each file is
+          remembered, and a file with the same size is compared with the new content before it is replaced.
+"""
+
+
+def atomic_write(filepath: str, data: bytes, fsync: bool = True):
+    """
+    Write a file atomically: the file has either its old or its new content, even after a crash.
+
+    Args:
+        filepath: The path of the file.
+        data: The new content of the file.
+        fsync: Whether to flush the file and its folder to the disk before and after the rename.
+    """
+    directory = os.path.dirname(os.path.abspath(filepath))
+    file_descriptor, temporary_filepath = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(filepath)}.", suffix=".tmp")
+    try:
+        with os.fdopen(file_descriptor, "wb") as file:
+            file.write(data)
+            if fsync:
+                file.flush()
+                os.fsync(file.fileno())
+        os.chmod(temporary_filepath, 0o644)  # mkstemp creates files that only the owner can read
+        os.replace(temporary_filepath, filepath)
+    except BaseException:
+        try:
+            os.remove(temporary_filepath)
+        except OSError:
+            pass
+        raise
+    if fsync:
+        fsync_directory(directory)
+
+
+def fsync_directory(directory: str):
+    """
+    Flush a folder to the disk, so a rename in it survives a crash.
+
+    Args:
+        directory: The path of the folder.
+    """
+    try:
+        directory_descriptor = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # Folders cannot be opened on some platforms (e.g. Windows)
+    try:
+        os.fsync(directory_descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(directory_descriptor)
+
+
+class AnnotationStore:
+    """Saves files to the annotations folder with per-file locks, atomic writes and deduplication."""
+
+    def __init__(self, directory: str = ANNOTATIONS_DIRECTORY, lock_directory: str | None = None,
+                 fsync: bool = ANNOTATION_FSYNC, deduplicate: bool = ANNOTATION_DEDUPLICATE):
+        self.directory = directory
+        self.lock_directory = lock_directory or os.path.join(tempfile.gettempdir(), "croissant_annotation_locks")
+        self.fsync = fsync
+        self.deduplicate = deduplicate
+        self._saved = {}  # Maps a filename to the hash, modification time and size of the content last saved to it
+        self._lock = threading.Lock()
+        self.writes = 0
+        self.skipped = 0
+
+    def save(self, filename: str, data: bytes) -> Tuple[str, bool]:
+        """
+        Save a file to the annotations folder, unless it already has the same content.
+
+        Args:
+            filename: The name of the file.
+            data: The content of the file.
+
+        Returns:
+            A Tuple containing the file path and a boolean indicating if the file was written.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        os.makedirs(self.lock_directory, exist_ok=True)
+        filepath = os.path.join(self.directory, filename)
+        digest = hashlib.sha256(data).hexdigest()
+
+        # Writers of the same file take turns, in this process and in the other worker processes
+        with FileLock(os.path.join(self.lock_directory, f"{filename}.lock")):
+            if self.deduplicate and self._is_unchanged(filename, filepath, digest, data):
+                with self._lock:
+                    self.skipped += 1
+                return filepath, False
+            atomic_write(filepath, data, self.fsync)
+            self._remember(filename, filepath, digest)
+        with self._lock:
+            self.writes += 1
+        return filepath, True
+
+    def _is_unchanged(self, filename: str, filepath: str, digest: str, data: bytes) -> bool:
+        """
+        Check if a file already has the given content. The caller must hold the lock of the file.
+
+        Args:
+            filename: The name of the file.
+            filepath: The path of the file.
+            digest: The hash of the content.
+            data: The content.
+
+        Returns:
+            True if the file has the content, False otherwise.
+        """
+        try:
+            stat = os.stat(filepath)
+        except FileNotFoundError:
+            return False
+        if stat.st_size != len(data):
+            return False
+        with self._lock:
+            saved = self._saved.get(filename)
+        # The file has not been replaced since this process saved it
+        if saved == (digest, stat.st_mtime_ns, stat.st_size):
+            return True
+        with open(filepath, "rb") as file:
+            if file.read() != data:
+                return False
+        self._remember(filename, filepath, digest)
+        return True
+
+    def _remember(self, filename: str, filepath: str, digest: str):
+        """
+        Remember the content last saved to a file.
+
+        Args:
+            filename: The name of the file.
+            filepath: The path of the file.
+            digest: The hash of the content.
+        """
+        stat = os.stat(filepath)
+        with self._lock:
+            self._saved[filename] = (digest, stat.st_mtime_ns, stat.st_size)
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Return statistics about the saved files.
+
+        Returns:
+            A Dictionary containing the numbers of files written and of unchanged files that were not written.
+        """
+        with self._lock:
+            return {"writes": self.writes, "skipped": self.skipped}
+
+
+# One store is shared by all sessions of the process
+annotation_store = AnnotationStore()
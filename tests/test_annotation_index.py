@@ -0,0 +1,233 @@
+# test_annotation_index.py
+
+# necessary imports
+import datetime
+import json
+import os
+import pytest
+from main.annotation_index import AnnotationIndex, build_match_query, extract_index_values
+
+"""
+Test cases for the AnnotationIndex class.
+"""
+
+ANNOTATIONS = {
+    "shp_metadata.json": {
+        "name": "stanfordnlp/SHP",
+        "creator": "stanfordnlp",
+        "license": "MIT",
+        "task": "text-generation, question-answering",
+        "modality": "text",
+        "inLanguage": "en",
+        "keywords": "human feedback, rlhf",
+        "description": "Human preferences over responses to questions about cooking, legal advice and more.",
+        "datePublished": "2023-02-18",
+    },
+    "aya_metadata.json": {
+        "name": "CohereForAI/aya_dataset",
+        "creator": ["CohereForAI", {"@type": "sc:Person", "name": "Jane Doe"}],
+        "license": "apache-2.0",
+        "task": "text-generation",
+        "modality": "tabular, text",
+        "inLanguage": "amh, arb, en",
+        "description": "A multilingual instruction dataset written by human annotators.",
+        "datePublished": "2024-01-31",
+    },
+    "images_metadata.json": {
+        "name": "Images",
+        "license": "apache-2.0",
+        "modality": "image",
+        "datePublished": "2024-06-01T12:00:00",
+    },
+}
+
+@pytest.fixture
+def annotations_folder(tmp_path):
+    """Fixture to provide a folder of annotation files."""
+    folder = tmp_path / "annotations"
+    folder.mkdir()
+    for filename, metadata in ANNOTATIONS.items():
+        (folder / filename).write_text(json.dumps(metadata), encoding="utf-8")
+    return folder
+
+@pytest.fixture
+def index(annotations_folder):
+    """Fixture to create an index of the annotation files."""
+    index = AnnotationIndex(":memory:")
+    index.import_folder(str(annotations_folder))
+    yield index
+    index.close()
+
+def filenames(results):
+    """Return the filenames of query results."""
+    return [result["filename"] for result in results]
+
+def test_extract_index_values():
+    """Test that lists are split into their items, dates are shortened and values are lowercased."""
+    values = extract_index_values(ANNOTATIONS["aya_metadata.json"])
+    assert ("creators", "cohereforai") in values
+    assert ("creators", "jane doe") in values
+    assert ("in_language", "arb") in values
+    assert ("modality", "tabular") in values
+    assert ("name", "cohereforai/aya_dataset") in values
+    assert ("date_published", "2024-01-31") in values
+    assert extract_index_values(ANNOTATIONS["images_metadata.json"])[-1] == ("date_published", "2024-06-01")
+
+def test_import_folder(index, annotations_folder):
+    """Test that only changed files are imported again and deleted files are removed."""
+    assert index.count() == 3
+    assert index.get("shp_metadata.json") == ANNOTATIONS["shp_metadata.json"]
+    assert index.import_folder(str(annotations_folder)) == {"updated": 0, "unchanged": 3, "removed": 0}
+
+    (annotations_folder / "shp_metadata.json").write_text(json.dumps({"name": "SHP", "license": "cc-by-4.0"}), encoding="utf-8")
+    os.remove(annotations_folder / "images_metadata.json")
+    (annotations_folder / "broken_metadata.json").write_text("{", encoding="utf-8")
+    assert index.import_folder(str(annotations_folder)) == {"updated": 1, "unchanged": 2, "removed": 1}
+    assert index.get("images_metadata.json") is None
+    assert filenames(index.query({"license": "cc-by-4.0"})) == ["shp_metadata.json"]
+    assert index.query({"license": "mit"}) == []
+
+def test_query_by_attributes(index):
+    """Test that filters on several attributes must all match, and values of one attribute can match any."""
+    assert filenames(index.query()) == ["aya_metadata.json", "images_metadata.json", "shp_metadata.json"]
+    assert filenames(index.query({"license": "mit"})) == ["shp_metadata.json"]
+    assert filenames(index.query({"task": "Question-Answering"})) == ["shp_metadata.json"]
+    assert filenames(index.query({"modality": "text", "in_language": "en"})) == ["aya_metadata.json", "shp_metadata.json"]
+    assert filenames(index.query({"modality": ["image", "tabular"]})) == ["aya_metadata.json", "images_metadata.json"]
+    assert filenames(index.query({"license": "apache-2.0", "modality": "image"})) == ["images_metadata.json"]
+    assert filenames(index.query({"license": "apache-2.0"}, limit=1)) == ["aya_metadata.json"]
+    assert index.query({"license": "gpl"}) == []
+
+def test_query_by_dates(index):
+    """Test the date range filters."""
+    assert filenames(index.query(date_from="2024-01-01")) == ["aya_metadata.json", "images_metadata.json"]
+    assert filenames(index.query(date_to="2024-01-31")) == ["aya_metadata.json", "shp_metadata.json"]
+    assert filenames(index.query({"modality": "text"}, date_from="2024-01-01", date_to="2024-12-31")) == ["aya_metadata.json"]
+    assert index.query(date_attribute="date_created", date_from="2000-01-01") == []
+
+def test_query_rejects_unknown_attributes(index):
+    """Test that attributes that are not indexed are rejected."""
+    with pytest.raises(ValueError):
+        index.query({"description": "text"})
+    with pytest.raises(ValueError):
+        index.query(date_attribute="license", date_from="2024-01-01")
+    with pytest.raises(ValueError):
+        index.facets("url")
+
+def test_facets(index):
+    """Test the counts of the values of an attribute."""
+    assert index.facets("license") == [("apache-2.0", 2), ("mit", 1)]
+    assert index.facets("modality", limit=1) == [("text", 2)]
+
+def test_upsert_replaces_values(index):
+    """Test that saving an annotation again replaces its indexed values, with dates as YYYY-MM-DD."""
+    index.upsert("shp_metadata.json", {"name": "stanfordnlp/SHP", "license": "gpl-3.0",
+                                       "datePublished": datetime.datetime(2025, 3, 4, 5, 6)})
+    assert filenames(index.query({"license": "gpl-3.0"})) == ["shp_metadata.json"]
+    assert index.query({"license": "mit"}) == []
+    assert index.get("shp_metadata.json")["datePublished"] == "2025-03-04"
+    assert filenames(index.query(date_from="2025-01-01")) == ["shp_metadata.json"]
+
+def test_saved_file_is_not_imported_again(index, annotations_folder):
+    """Test that a file added with its path is known to be up to date by the next refresh."""
+    filepath = annotations_folder / "new_metadata.json"
+    filepath.write_text(json.dumps({"name": "New"}), encoding="utf-8")
+    index.upsert("new_metadata.json", {"name": "New"}, str(filepath))
+    assert index.import_folder(str(annotations_folder)) == {"updated": 0, "unchanged": 4, "removed": 0}
+
+def test_build_match_query():
+    """Test that every word is quoted and the last word matches as a prefix."""
+    assert build_match_query("Human feedback") == '"human" "feedback"*'
+    assert build_match_query('"AND" OR (x') == '"and" "or" "x"*'
+    assert build_match_query(" -- ") is None
+
+def test_search_ranks_by_text(index):
+    """Test that all words must match and that matches in the name rank above matches in the description."""
+    result = index.search("human")
+    assert filenames(result["results"]) == ["shp_metadata.json", "aya_metadata.json"]
+    assert result["total"] == 2
+    assert result["results"][0]["score"] > result["results"][1]["score"] > 0
+    assert result["results"][0]["snippet"] == "**human** feedback, rlhf"
+    assert filenames(index.search("human annotators")["results"]) == ["aya_metadata.json"]
+    assert filenames(index.search("multiling")["results"]) == ["aya_metadata.json"]  # The last word is a prefix
+    assert index.search("video")["total"] == 0
+
+def test_search_filters_and_facets(index):
+    """Test that filters narrow the results down and facets count the values of the matching annotations."""
+    result = index.search("", {"modality": "text"})
+    assert result["total"] == 2
+    assert result["facets"]["task"] == [("text-generation", 2), ("question-answering", 1)]
+    assert result["facets"]["license"] == [("apache-2.0", 1), ("mit", 1)]
+    assert filenames(index.search("human", {"license": ["MIT", "gpl"]})["results"]) == ["shp_metadata.json"]
+    assert index.search("human", {"license": "mit", "task": "translation"})["total"] == 0
+    assert index.search("", facet_limit=1)["facets"]["modality"] == [("text", 2)]
+    with pytest.raises(ValueError):
+        index.search("human", {"in_language": "en"})
+
+def test_search_pages_and_recent_first(index):
+    """Test that a search without words lists the most recently saved annotations first, page by page."""
+    index.upsert("new_metadata.json", {"name": "New", "license": "mit"})
+    assert filenames(index.search("", limit=2)["results"]) == ["new_metadata.json", "shp_metadata.json"]
+    assert filenames(index.search("", limit=2, offset=2)["results"]) == ["images_metadata.json", "aya_metadata.json"]
+    assert index.search("", limit=2)["total"] == 4
+
+def test_search_follows_updates(index, tmp_path):
+    """Test that saved, replaced and removed annotations are searched at once, also when written by another connection."""
+    assert index.search("", {"license": "mit"})["total"] == 1
+    index.upsert("new_metadata.json", {"name": "Cooking recipes", "license": "mit"})
+    index.upsert("shp_metadata.json", {"name": "stanfordnlp/SHP", "license": "cc-by-4.0"})
+    index.remove(["aya_metadata.json"])
+    result = index.search("", {"license": "mit"})
+    assert filenames(result["results"]) == ["new_metadata.json"]
+    assert ("cc-by-4.0", 1) in index.search("")["facets"]["license"]
+    assert index.search("annotators")["total"] == 0
+
+    db_path = str(tmp_path / "annotations.sqlite3")
+    first, second = AnnotationIndex(db_path), AnnotationIndex(db_path)
+    first.upsert("a_metadata.json", {"name": "A", "license": "mit"})
+    assert second.search("", {"license": "mit"})["total"] == 1
+    first.upsert("b_metadata.json", {"name": "B", "license": "mit"})
+    assert second.search("", {"license": "mit"})["total"] == 2
+    first.close()
+    second.close()
+
+STACK_DESCRIPTION = ("The Stack contains over 6TB of permissively-licensed source code files covering 358 programming "
+                     "languages. The dataset was created as part of the BigCode Project.")
+
+def test_find_near_duplicates(index):
+    """Test that annotations with nearly the same description or citation are found, and removed ones are not."""
+    index.upsert("stack_metadata.json", {"name": "bigcode/the-stack", "description": STACK_DESCRIPTION})
+    index.upsert("stack_dedup_metadata.json", {"name": "bigcode/the-stack-dedup",
+                                               "description": STACK_DESCRIPTION + " Files were deduplicated."})
+    index.upsert("stack_smol_metadata.json", {"name": "bigcode/the-stack-smol", "description": STACK_DESCRIPTION,
+                                              "citeAs": "@article{Kocetkov2022TheStack, title={The Stack: 3 TB of permissively licensed source code}}"})
+    index.upsert("stack_v2_metadata.json", {"name": "bigcode/the-stack-v2",
+                                            "citeAs": "@article{Kocetkov2022TheStack, title={The Stack: 3 TB of permissively licensed source code}}"})
+
+    duplicates = index.find_near_duplicates("stack_metadata.json")
+    assert [(duplicate["filename"], duplicate["field"]) for duplicate in duplicates] == [
+        ("stack_smol_metadata.json", "description"), ("stack_dedup_metadata.json", "description")
+    ]
+    assert duplicates[0]["similarity"] == 1.0 and 0.7 <= duplicates[1]["similarity"] < 1.0
+    assert index.find_near_duplicates("stack_v2_metadata.json") == [
+        {"filename": "stack_smol_metadata.json", "field": "citation", "similarity": 1.0}
+    ]
+    assert index.find_near_duplicates("shp_metadata.json") == []
+
+    index.remove(["stack_smol_metadata.json"])
+    assert [duplicate["filename"] for duplicate in index.find_near_duplicates("stack_metadata.json")] == ["stack_dedup_metadata.json"]
+    assert index.find_near_duplicates("stack_v2_metadata.json") == []
+
+def test_find_all_near_duplicates(index):
+    """Test that near-duplicates are grouped per field for review."""
+    for number in range(3):
+        index.upsert(f"stack_{number}_metadata.json", {"name": f"Stack {number}", "description": STACK_DESCRIPTION + f" Version {number}."})
+    index.upsert("stack_cited_metadata.json", {"name": "Stack", "citeAs": STACK_DESCRIPTION})
+    index.upsert("other_cited_metadata.json", {"name": "Other", "citeAs": STACK_DESCRIPTION})
+    assert index.find_all_near_duplicates() == [
+        {"field": "description", "filenames": ["stack_0_metadata.json", "stack_1_metadata.json", "stack_2_metadata.json"]},
+        {"field": "citation", "filenames": ["other_cited_metadata.json", "stack_cited_metadata.json"]},
+    ]
+    assert index.find_all_near_duplicates(threshold=1.0) == [
+        {"field": "citation", "filenames": ["other_cited_metadata.json", "stack_cited_metadata.json"]},
+    ]
@@ -0,0 +1,127 @@
+# test_api.py
+
+# necessary imports
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+import time
+from main.api import api, quality_checker
+from main.attribute_quality import AttributeQualityChecker
+from main.annotation_index import AnnotationIndex
+from main.catalog import DatasetCatalog
+
+"""
+Test cases for the REST API.
+"""
+
+@pytest.fixture
+def client():
+    """Fixture to create a test client of the API."""
+    return TestClient(api)
+
+@pytest.fixture(autouse=True)
+def empty_catalog():
+    """Fixture to give find_dataset_info an empty in-memory catalog during tests."""
+    catalog = DatasetCatalog(":memory:")
+    with patch("main.metadata_manager.get_catalog", return_value=catalog):
+        yield catalog
+    catalog.close()
+
+def test_health(client):
+    """Test the health endpoint."""
+    assert client.get("/health").json() == {"status": "ok"}
+
+def test_validate_attribute(client):
+    """Test validating one attribute value."""
+    response = client.post("/validate/attribute", json={"attribute": "url", "value": "https://example.com"})
+    assert response.status_code == 200
+    assert response.json() == {"attribute": "url", "valid": True, "errors": {}, "issues": {}}
+
+    response = client.post("/validate/attribute", json={"attribute": "date_created", "value": "yesterday"})
+    assert response.json()["valid"] is False
+    assert "date_created" in response.json()["errors"]
+
+    response = client.post("/validate/attribute", json={"attribute": "colour", "value": "red"})
+    assert response.status_code == 400
+
+def test_validate_attribute_bulk(client):
+    """Test that a bulk request reports the result of every item in order, including failed items."""
+    response = client.post("/validate/attribute/bulk", json={"items": [
+        {"attribute": "url", "value": "https://example.com"},
+        {"attribute": "colour", "value": "red"},
+        {"attribute": "license", "value": "not a license"},
+    ]})
+    results = response.json()
+    assert results[0]["valid"] is True
+    assert results[1] == {"error": "Invalid attribute name: colour"}
+    assert results[2]["valid"] is False
+
+def test_validate_record_with_slow_description_check(client):
+    """Test that the description check of the API waits for spaCy instead of giving a preliminary verdict."""
+    description = "The first sentence of a new description. The second one is different! Is the third a question?"
+    deadlines = []
+
+    def slow_sentence_variety(self, value):
+        deadlines.append(self.description_check_deadline)
+        time.sleep(0.2)
+        return 1, None
+
+    with patch.object(AttributeQualityChecker, "calculate_sentence_variety", autospec=True, side_effect=slow_sentence_variety):
+        response = client.post("/validate/record", json={"metadata": {"description": description}})
+    result = response.json()
+    assert deadlines == [None]
+    assert result["valid"] is False
+    assert "limited sentence variety" in result["issues"]["description"]
+    assert "preliminary" not in result["issues"]["description"]
+    assert quality_checker.pending_description_check is None
+
+def test_validate_record_bulk(client):
+    """Test validating many records at once."""
+    response = client.post("/validate/record/bulk", json={"items": [
+        {"metadata": {"url": "https://example.com", "version": "1.0"}},
+        {"metadata": {"url": "not a url"}},
+    ]})
+    results = response.json()
+    assert [result["valid"] for result in results] == [True, False]
+    assert "url" in results[1]["errors"]
+
+def test_suggest(client):
+    """Test asking for suggestions, and that LLM errors become a 502 response."""
+    with patch("main.api.suggest_metadata", return_value="Try `cais/mmlu`.") as mock_suggest:
+        response = client.post("/suggest", json={"attribute": "name", "metadata": {"description": "Questions"}})
+    assert response.json() == {"attribute": "name", "suggestion": "Try `cais/mmlu`."}
+    mock_suggest.assert_called_once_with({"description": "Questions"}, "", "name")
+
+    with patch("main.api.suggest_metadata", side_effect=Exception("LLM unavailable")):
+        response = client.post("/suggest", json={"attribute": "name"})
+    assert response.status_code == 502
+
+def test_hf_not_found(client):
+    """Test fetching a dataset that does not exist."""
+    with patch("main.metadata_manager.fetch_dataset_info", return_value=None):
+        assert client.post("/hf", json={"dataset_id": "missing/dataset"}).status_code == 404
+        results = client.post("/hf/bulk", json={"items": [{"dataset_id": "missing/dataset"}]}).json()
+    assert results == [{"found": False, "error": "Dataset missing/dataset was not found."}]
+
+def test_finalise(client):
+    """Test converting metadata to the Croissant format without saving it."""
+    with patch("main.metadata_manager.MetadataManager.save_metadata_to_file") as mock_save:
+        response = client.post("/finalise", json={"metadata": {"name": "Sample Dataset", "task": "classification"}})
+    assert response.status_code == 200
+    assert response.json()["metadata"]["name"] == "Sample Dataset"
+    assert response.json()["metadata"]["task"] == "classification"
+    mock_save.assert_not_called()
+
+def test_search(client):
+    """Test searching the saved annotations, and that unknown filters are rejected."""
+    index = AnnotationIndex(":memory:")
+    index.upsert("shp_metadata.json", {"name": "SHP", "description": "Human preferences", "task": "text-generation"})
+    index.upsert("mmlu_metadata.json", {"name": "MMLU", "description": "Questions", "task": "question-answering"})
+    with patch("main.api.get_annotation_index", return_value=index):
+        response = client.post("/search", json={"text": "human", "filters": {"task": ["text-generation"]}})
+        assert response.status_code == 200
+        assert response.json()["total"] == 1
+        assert response.json()["results"][0]["filename"] == "shp_metadata.json"
+        assert response.json()["facets"]["task"] == [{"value": "text-generation", "count": 1}]
+        assert client.post("/search", json={"filters": {"url": ["x"]}}).status_code == 400
+    index.close()
@@ -2,6 +2,7 @@
 
 # necessary imports
 from unittest.mock import patch
+import time
 import pytest
 from main.attribute_quality import AttributeQualityChecker
 import spacy  
@@ -195,7 +196,92 @@ def test_check_quality_of_all_attributes(checker):
         result = checker.check_quality_of_all_attributes(metadata)
         assert result == {"error": "Error in checking quality of all attributes: Mocked exception"}
 
+def test_sample_description(checker):
+    """Test the sample_description method."""
+    # short description is not sampled
+    text, sampled, total = checker.sample_description("First sentence. Second sentence.")
+    assert text == "First sentence. Second sentence."
+    assert sampled == total == 2
+
+    # long description is sampled to at most max_description_length characters
+    checker.max_description_length = 100
+    long_description = " ".join(f"This is sentence number {i}." for i in range(50))
+    text, sampled, total = checker.sample_description(long_description)
+    assert len(text) <= 100
+    assert total == 50
+    assert 0 < sampled < total
+    assert text.startswith("This is sentence number 0.")
+
+    # one very long sentence is truncated
+    text, sampled, total = checker.sample_description("word " * 100)
+    assert len(text) == 100
+    assert sampled == total == 1
+
+def test_check_description_reports_sampling(checker):
+    """Test that the message says when only a sample of the description was analysed."""
+    checker.max_description_length = 200
+    long_description = " ".join(f"Sentence {i} describes a different part of the data." for i in range(40))
+    valid, message = checker.check_description(long_description)
+    assert "only a sample of" in message
+    assert "of its 40 sentences was analysed." in message
+
+def test_check_description_deadline(checker):
+    """Test that a preliminary verdict is returned when spaCy misses the deadline."""
+    description = "The first sentence of a new description. The second one is different! Is the third a question?"
+    checker.description_check_deadline = 0.01
+
+    def slow_sentence_variety(value):
+        time.sleep(0.5)
+        return 3, None
+
+    with patch.object(checker, "calculate_sentence_variety", side_effect=slow_sentence_variety):
+        valid, message = checker.check_description(description)
+        # the sentence variety is pending, so the description does not pass on an estimate
+        assert "This is a preliminary result" in message
+        assert "acceptable" not in message
+        refined_valid, refined_message = checker.pending_description_check.result(timeout=30)
+    assert "This is a preliminary result" not in refined_message
+
+    # without the deadline the full analysis is used
+    valid, message = checker.check_description(description, use_deadline=False)
+    assert "This is a preliminary result" not in message
+
+def test_refine_description_check(checker):
+    """Test the refine_description_check method."""
+    checker.description_check_deadline = 0.0001
+    future = checker.refine_description_check("This is an invalid description with insufficient detail.")
+    valid, message = future.result(timeout=30)
+    assert valid is False
+    assert "This is a preliminary result" not in message
+
+def test_check_quality_of_all_attributes_batch(checker):
+    """Test the check_quality_of_all_attributes_batch method."""
+    metadata_list = [
+        {
+            "description": "The innovative model enhances efficiency, while researchers explore new optimization techniques. By leveraging cutting-edge technology, the system adapts dynamically to changing conditions. As a result, overall productivity sees a significant boost.",
+            "keywords": "keyword1, keyword2, keyword3"
+        },
+        {
+            "description": "This is an invalid description with insufficient detail.",
+            "keywords": ""
+        },
+        {"name": "no description"},
+        {}
+    ]
+    results = checker.check_quality_of_all_attributes_batch(metadata_list, batch_size=2)
+    assert results == [checker.check_quality_of_all_attributes(metadata) for metadata in metadata_list]
+    assert results[0] == {}
+    assert results[1]["keywords"] == "Please provide at least 3 keywords."
+    assert results[3] == {}
+
+    # chunks smaller than the list
+    checker.batch_chunk_size = 1
+    assert checker.check_quality_of_all_attributes_batch(metadata_list) == results
+
+    # empty list
+    assert checker.check_quality_of_all_attributes_batch([]) == []
 
-
-
-
+    # error case
+    with patch("main.attribute_quality.doc_cache.get_features_batch", side_effect=Exception("Mocked exception")):
+        results = checker.check_quality_of_all_attributes_batch(metadata_list[:2])
+        assert results == [{"error": "Error in batch quality check: Mocked exception"}] * 2
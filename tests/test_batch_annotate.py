@@ -0,0 +1,138 @@
+# test_batch_annotate.py
+
+# necessary imports
+import pytest
+from unittest.mock import patch
+from main.batch_annotate import read_dataset_ids, annotate_dataset, annotate_datasets, load_checkpoint, summarise
+from main.catalog import DatasetCatalog
+from main.attribute_quality import AttributeQualityChecker
+from main.llm import fill_missing_metadata
+
+"""
+Test cases for the batch annotation CLI.
+"""
+
+@pytest.fixture(autouse=True)
+def empty_catalog():
+    """Fixture to give find_dataset_info an empty in-memory catalog during tests."""
+    catalog = DatasetCatalog(":memory:")
+    with patch("main.metadata_manager.get_catalog", return_value=catalog):
+        yield catalog
+    catalog.close()
+
+def fake_find_dataset_info(self, dataset_id):
+    """Find every dataset except missing/dataset and unreachable/dataset, with a name and a URL."""
+    if dataset_id == "missing/dataset":
+        return None, False
+    if dataset_id == "unreachable/dataset":
+        return {"error": "Connection timed out"}, False
+    self.metadata.update({"name": dataset_id, "url": f"https://huggingface.co/datasets/{dataset_id}"})
+    return self.metadata, True
+
+@pytest.fixture
+def fake_hub():
+    """Fixture to replace the Hugging Face lookup and the LLM."""
+    with patch("main.metadata_manager.MetadataManager.find_dataset_info", fake_find_dataset_info), \
+         patch("main.batch_annotate.fill_missing_metadata", return_value={"modality": "text", "in_language": "not a language"}) as mock_fill:
+        yield mock_fill
+
+def test_read_dataset_ids(tmp_path):
+    """Test reading dataset IDs from a CSV file, skipping unknown and duplicate names."""
+    csv_path = tmp_path / "datasets.csv"
+    csv_path.write_text("Name,Likes\ncais/mmlu,10\nUnknown,1\ncais/mmlu,10\nopenai/gsm8k,5\n")
+    assert read_dataset_ids(str(csv_path)) == ["cais/mmlu", "openai/gsm8k"]
+
+def test_annotate_dataset(fake_hub):
+    """Test that missing attributes are filled with one LLM request and invalid LLM values are dropped."""
+    result = annotate_dataset("cais/mmlu", save=False)
+    assert result["status"] == "finalised"
+    assert result["filled"] == ["modality"]
+    assert "in_language" in result["missing"]
+    assert "description" in result["missing"]
+    assert "name" not in result["missing"]
+    fake_hub.assert_called_once()
+    assert set(fake_hub.call_args.args[1]) == {"description", "keywords", "in_language", "task", "modality"}
+
+    assert annotate_dataset("missing/dataset", save=False)["status"] == "not_found"
+    result = annotate_dataset("unreachable/dataset", save=False)
+    assert result["status"] == "error"
+    assert result["error"] == "Connection timed out"
+
+def test_annotate_dataset_without_deadline(fake_hub):
+    """Test that the quality check of a batch does not give a preliminary verdict when spaCy is slow."""
+    fake_hub.return_value = {"description": "The first sentence of a new description. The second one is different! Is the third a question?"}
+    deadlines = []
+    calculate = AttributeQualityChecker.calculate_sentence_variety_within_deadline
+
+    def record_deadline(self, value):
+        deadlines.append(self.description_check_deadline)
+        return calculate(self, value)
+
+    with patch.object(AttributeQualityChecker, "calculate_sentence_variety_within_deadline", autospec=True, side_effect=record_deadline):
+        result = annotate_dataset("cais/mmlu", save=False)
+    assert result["status"] == "finalised"
+    assert deadlines == [None]
+    assert "preliminary" not in result["issues"].get("description", "")
+
+def test_annotate_datasets_resumes_from_checkpoint(fake_hub, tmp_path):
+    """Test that datasets in the checkpoint file are not processed again."""
+    checkpoint_path = str(tmp_path / "checkpoint.jsonl")
+    results = annotate_datasets(["cais/mmlu", "missing/dataset"], checkpoint_path, save=False, progress=False)
+    assert [result["status"] for result in results] == ["finalised", "not_found"]
+    assert set(load_checkpoint(checkpoint_path)) == {"cais/mmlu", "missing/dataset"}
+
+    fake_hub.reset_mock()
+    results = annotate_datasets(["cais/mmlu", "missing/dataset", "openai/gsm8k"], checkpoint_path, save=False, progress=False)
+    assert [result["dataset_id"] for result in results] == ["cais/mmlu", "missing/dataset", "openai/gsm8k"]
+    assert fake_hub.call_count == 1  # Only the new dataset was processed
+
+def test_annotate_datasets_checks_quality_in_chunks(fake_hub, tmp_path):
+    """Test that the quality of the datasets of a chunk is checked in one pass, and the metadata is not saved to the checkpoint."""
+    checkpoint_path = str(tmp_path / "checkpoint.jsonl")
+    dataset_ids = ["cais/mmlu", "openai/gsm8k", "missing/dataset", "allenai/c4"]
+    batch_check = AttributeQualityChecker.check_quality_of_all_attributes_batch
+    with patch("main.batch_annotate.BATCH_QUALITY_CHUNK_SIZE", 3), \
+         patch.object(AttributeQualityChecker, "check_quality_of_all_attributes_batch", autospec=True, side_effect=batch_check) as mock_batch:
+        results = annotate_datasets(dataset_ids, checkpoint_path, save=False, progress=False)
+    assert [len(call.args[1]) for call in mock_batch.call_args_list] == [2, 1]
+    assert [result["status"] for result in results] == ["finalised", "finalised", "not_found", "finalised"]
+    assert all("metadata" not in result for result in load_checkpoint(checkpoint_path).values())
+
+def test_annotate_dataset_llm_error(fake_hub):
+    """Test that an error of the LLM is recorded and the dataset is still finalised."""
+    with patch("main.llm.requests.post", side_effect=ConnectionError("LLM unreachable")):
+        fake_hub.side_effect = lambda metadata, attributes: fill_missing_metadata(metadata, attributes)
+        result = annotate_dataset("cais/mmlu", save=False)
+    assert result["status"] == "finalised"
+    assert "LLM unreachable" in result["llm_error"]
+    assert result["filled"] == []
+
+def test_annotate_datasets_retries_lookup_errors(fake_hub, tmp_path):
+    """Test that datasets whose lookup failed are processed again when the run resumes."""
+    checkpoint_path = str(tmp_path / "checkpoint.jsonl")
+    results = annotate_datasets(["unreachable/dataset"], checkpoint_path, save=False, progress=False)
+    assert results[0]["status"] == "error"
+
+    with patch("main.batch_annotate.annotate_dataset", return_value={"dataset_id": "unreachable/dataset", "status": "finalised"}) as mock_annotate:
+        results = annotate_datasets(["unreachable/dataset"], checkpoint_path, save=False, progress=False)
+    mock_annotate.assert_called_once()
+    assert results[0]["status"] == "finalised"
+    assert load_checkpoint(checkpoint_path)["unreachable/dataset"]["status"] == "finalised"
+
+def test_summarise():
+    """Test the per-attribute failure rates."""
+    results = [
+        {"dataset_id": "a", "status": "finalised", "filled": ["modality"], "missing": ["description"], "errors": {"url": "bad"}, "issues": {}},
+        {"dataset_id": "b", "status": "finalised", "filled": [], "missing": [], "errors": {}, "issues": {"keywords": "few"},
+         "near_duplicates": [{"filename": "a_metadata.json", "field": "description", "similarity": 0.9}]},
+        {"dataset_id": "c", "status": "not_found", "filled": [], "missing": [], "errors": {}, "issues": {}},
+        {"dataset_id": "d", "status": "error", "filled": [], "missing": [], "errors": {}, "issues": {}},
+    ]
+    summary = summarise(results)
+    assert summary["statuses"] == {"finalised": 2, "not_found": 1, "error": 1}
+    assert summary["attributes"]["description"]["missing_rate"] == 0.5
+    assert summary["attributes"]["url"]["failure_rate"] == 0.5
+    assert summary["attributes"]["keywords"]["issue_rate"] == 0.5
+    assert summary["attributes"]["modality"]["filled_by_llm"] == 1
+    assert summary["attributes"]["name"]["failure_rate"] == 0.0
+    assert summary["near_duplicates"] == 1
@@ -0,0 +1,116 @@
+# test_catalog.py
+
+# necessary imports
+import json
+import pytest
+from main.catalog import DatasetCatalog
+
+"""
+Test cases for the DatasetCatalog class.
+"""
+
+@pytest.fixture
+def catalog():
+    """Fixture to create an empty in-memory catalog."""
+    catalog = DatasetCatalog(":memory:")
+    yield catalog
+    catalog.close()
+
+def test_get_is_case_insensitive(catalog):
+    """Test that datasets are found regardless of the case of their ID."""
+    catalog.upsert("Sample/Dataset", {"name": "Sample/Dataset", "license": "mit"})
+    assert catalog.get("sample/dataset") == {"name": "Sample/Dataset", "license": "mit"}
+    assert catalog.get(" SAMPLE/DATASET ") == {"name": "Sample/Dataset", "license": "mit"}
+    assert catalog.get("missing/dataset") is None
+    assert catalog.list_dataset_ids() == ["Sample/Dataset"]
+
+def test_upsert_merges_non_empty_values(catalog):
+    """Test that an update keeps existing values that the new metadata leaves empty."""
+    catalog.upsert("sample/dataset", {"license": "mit", "task": "question-answering"}, "2024-01-01")
+    catalog.upsert("sample/dataset", {"license": "", "task": "summarization", "modality": "text"})
+    assert catalog.get("sample/dataset") == {"license": "mit", "task": "summarization", "modality": "text"}
+    assert catalog.get_last_modified("sample/dataset") == "2024-01-01"
+    assert catalog.count() == 1
+
+def test_get_enriched(catalog, monkeypatch):
+    """Test that only metadata enriched by a Hub lookup is served, until it is too old or the dataset changed."""
+    catalog.upsert("imported/dataset", {"name": "imported/dataset"})
+    assert catalog.get_enriched("imported/dataset") is None
+    catalog.upsert("sample/dataset", {"license": "mit"}, "2024-01-01", enriched=True)
+    assert catalog.get_enriched("sample/dataset") == {"license": "mit"}
+    assert catalog.get_enriched("sample/dataset", max_age=-1) is None
+
+    # An import without a new last modified time keeps the enrichment, a newer version of the dataset does not
+    catalog.upsert("sample/dataset", {"modality": "text"})
+    assert catalog.get_enriched("sample/dataset") == {"license": "mit", "modality": "text"}
+    catalog.upsert("sample/dataset", {"task": "summarization"}, "2024-02-01")
+    assert catalog.get_enriched("sample/dataset") is None
+
+def test_upsert_new_commit_replaces_merged_attributes(catalog):
+    """Test that the metadata of a new commit replaces the row, dropping attributes merged in for an older commit."""
+    catalog.upsert("sample/dataset", {"license": "mit", "task": "question-answering"}, enriched=True, sha="aaa")
+    catalog.upsert("sample/dataset", {"modality": "text"})
+    assert catalog.get("sample/dataset") == {"license": "mit", "task": "question-answering", "modality": "text"}
+
+    # the same commit is merged
+    catalog.upsert("sample/dataset", {"version": "1.0"}, enriched=True, sha="aaa")
+    assert catalog.get("sample/dataset") == {"license": "mit", "task": "question-answering", "modality": "text", "version": "1.0"}
+
+    # a new commit replaces the row
+    catalog.upsert("sample/dataset", {"license": "apache-2.0"}, enriched=True, sha="bbb")
+    assert catalog.get_enriched("sample/dataset") == {"license": "apache-2.0"}
+
+def test_catalog_without_enrichment_column(tmp_path):
+    """Test that a catalog created before rows were marked as enriched is opened with no row enriched."""
+    import sqlite3
+    db_path = str(tmp_path / "hf_catalog.sqlite3")
+    connection = sqlite3.connect(db_path)
+    connection.execute("CREATE TABLE datasets (dataset_key TEXT PRIMARY KEY, dataset_id TEXT NOT NULL, metadata TEXT NOT NULL, last_modified TEXT, updated_at REAL NOT NULL)")
+    connection.execute("INSERT INTO datasets VALUES ('sample/dataset', 'sample/dataset', '{\"license\": \"mit\"}', NULL, 0)")
+    connection.commit()
+    connection.close()
+    catalog = DatasetCatalog(db_path)
+    assert catalog.get("sample/dataset") == {"license": "mit"}
+    assert catalog.get_enriched("sample/dataset") is None
+    catalog.close()
+
+def test_refresh(catalog, tmp_path):
+    """Test that the catalog imports the datasets CSV and the extracted metadata files."""
+    csv_path = tmp_path / "datasets.csv"
+    csv_path.write_text(
+        "Name,Link,Likes,Downloads,Dataset Tasks,Modality,Last Modified,Date Last Accessed\n"
+        "sample/dataset,https://huggingface.co/datasets/sample/dataset,1,2,Unknown,text,2025-01-06,2025-03-29\n"
+        "other/dataset,https://huggingface.co/datasets/other/dataset,1,2,summarization,text,2025-01-06,2025-03-29\n",
+        encoding="utf-8",
+    )
+    metadata_folder = tmp_path / "hf_metadata"
+    metadata_folder.mkdir()
+    (metadata_folder / "sample_dataset_hf.json").write_text(
+        json.dumps({"name": "sample/dataset", "license": "mit", "task": "", "url": ""}), encoding="utf-8"
+    )
+    (metadata_folder / "notes.txt").write_text("ignored", encoding="utf-8")
+
+    assert catalog.refresh(str(metadata_folder), str(csv_path)) == 2
+    assert catalog.get("sample/dataset") == {
+        "name": "sample/dataset",
+        "url": "https://huggingface.co/datasets/sample/dataset",
+        "modality": "text",
+        "date_modified": "2025-01-06",
+        "license": "mit",
+    }
+    assert catalog.get("other/dataset")["task"] == "summarization"
+
+    # missing files are skipped
+    assert catalog.import_datasets_csv(str(tmp_path / "missing.csv")) == 0
+    assert catalog.import_hf_metadata_folder(str(tmp_path / "missing")) == 0
+
+def test_catalog_persists(tmp_path):
+    """Test that the catalog is stored on disk."""
+    db_path = str(tmp_path / "catalog" / "hf_catalog.sqlite3")
+    catalog = DatasetCatalog(db_path)
+    catalog.upsert("sample/dataset", {"license": "mit"})
+    catalog.close()
+
+    catalog = DatasetCatalog(db_path)
+    assert catalog.get("sample/dataset") == {"license": "mit"}
+    catalog.close()
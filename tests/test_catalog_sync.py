@@ -0,0 +1,104 @@
+# test_catalog_sync.py
+
+# necessary imports
+from unittest.mock import patch, MagicMock
+import pytest
+from main.catalog import DatasetCatalog
+from main.catalog_sync import SYNC_STATE_NAME, build_first_page_url, extract_metadata_from_listing, sync_catalog
+
+"""
+Test cases for the catalog sync functions.
+"""
+
+FIRST_PAGE_URL = build_first_page_url(page_size=2)
+SECOND_PAGE_URL = "https://huggingface.co/api/datasets?cursor=page2"
+
+@pytest.fixture
+def catalog():
+    """Fixture to create an empty in-memory catalog."""
+    catalog = DatasetCatalog(":memory:")
+    yield catalog
+    catalog.close()
+
+def make_item(dataset_id, last_modified="2024-02-01T00:00:00.000Z"):
+    """Create a dataset as returned by the full dataset listing."""
+    return {
+        "id": dataset_id,
+        "author": dataset_id.split("/")[0],
+        "lastModified": last_modified,
+        "tags": ["license:mit", "task_categories:question-answering"],
+        "cardData": {"tags": ["science"], "pretty_name": "Sample"},
+    }
+
+def make_response(items, next_url=None):
+    """Create a response of the dataset listing."""
+    response = MagicMock()
+    response.json.return_value = items
+    response.links = {"next": {"url": next_url}} if next_url else {}
+    return response
+
+@pytest.fixture
+def pages():
+    """Fixture to provide two pages of the dataset listing keyed by URL."""
+    return {
+        FIRST_PAGE_URL: make_response([make_item("owner/first"), make_item("owner/second")], SECOND_PAGE_URL),
+        SECOND_PAGE_URL: make_response([make_item("owner/third")]),
+    }
+
+def test_extract_metadata_from_listing():
+    """Test that a dataset from the listing is mapped to a catalog row."""
+    dataset_id, metadata, last_modified = extract_metadata_from_listing(make_item("owner/first"))
+    assert dataset_id == "owner/first"
+    assert metadata["license"] == "mit"
+    assert metadata["task"] == "question-answering"
+    assert metadata["keywords"] == "science"
+    assert metadata["date_modified"] == "2024-02-01"
+    assert last_modified == "2024-02-01T00:00:00+00:00"
+
+def test_sync_catalog(catalog, pages):
+    """Test that all pages are synced and the checkpoint is removed when the sync finishes."""
+    with patch("main.catalog_sync.http_backoff", side_effect=lambda method, url, **kwargs: pages[url]):
+        counts = sync_catalog(catalog, page_size=2)
+
+    assert counts == {"seen": 3, "written": 3, "unchanged": 0}
+    assert catalog.list_dataset_ids() == ["owner/first", "owner/second", "owner/third"]
+    assert catalog.get_sync_state(SYNC_STATE_NAME) is None
+
+def test_sync_catalog_skips_unchanged(catalog, pages):
+    """Test that datasets whose last modified time has not changed are not written again."""
+    with patch("main.catalog_sync.http_backoff", side_effect=lambda method, url, **kwargs: pages[url]):
+        sync_catalog(catalog, page_size=2)
+        pages[SECOND_PAGE_URL] = make_response([make_item("owner/third", "2024-03-01T00:00:00.000Z")])
+        counts = sync_catalog(catalog, page_size=2)
+
+    assert counts == {"seen": 3, "written": 1, "unchanged": 2}
+    assert catalog.get("owner/third")["date_modified"] == "2024-03-01"
+
+def test_sync_catalog_limit(catalog, pages):
+    """Test that the sync stops after the limit."""
+    with patch("main.catalog_sync.http_backoff", side_effect=lambda method, url, **kwargs: pages[url]) as mock_get:
+        counts = sync_catalog(catalog, limit=1, page_size=2)
+
+    assert counts["seen"] == 1
+    assert catalog.list_dataset_ids() == ["owner/first"]
+    mock_get.assert_called_once()
+
+def test_sync_catalog_resumes(catalog, pages):
+    """Test that an interrupted sync resumes from the last checkpoint."""
+    def interrupt_on_second_page(method, url, **kwargs):
+        if url == SECOND_PAGE_URL:
+            raise ConnectionError("Mocked error")
+        return pages[url]
+
+    with patch("main.catalog_sync.http_backoff", side_effect=interrupt_on_second_page):
+        with pytest.raises(ConnectionError):
+            sync_catalog(catalog, page_size=2)
+    assert catalog.get_sync_state(SYNC_STATE_NAME)["next_url"] == SECOND_PAGE_URL
+    assert catalog.count() == 2
+
+    with patch("main.catalog_sync.http_backoff", side_effect=lambda method, url, **kwargs: pages[url]) as mock_get:
+        counts = sync_catalog(catalog, page_size=2)
+
+    assert counts == {"seen": 3, "written": 3, "unchanged": 0}
+    assert [call.args[1] for call in mock_get.call_args_list] == [SECOND_PAGE_URL]
+    assert catalog.count() == 3
@@ -0,0 +1,58 @@
+# test_chat_history.py
+
+# necessary imports
+from main.chat_history import ChatHistory
+
+"""
+Test cases for the ChatHistory class.
+"""
+
+def message(content, role="assistant"):
+    """Create a chat message."""
+    return {"role": role, "content": content}
+
+def test_static_messages_are_shared_and_kept_once():
+    """Test that earlier copies of a static message are replaced by a reference in place, and that sessions share it."""
+    first, second = ChatHistory(), ChatHistory()
+    first.append(message("Instructions\nType a greeting to start."), static=True)
+    first.append(message("hello", "user"))
+    first.append(message("Instructions\nType a greeting to start."), static=True)
+    second.append(message("Instructions\nType a greeting to start."), static=True)
+
+    assert first == [
+        message("Instructions _(shown again below)_"),
+        message("hello", "user"),
+        message("Instructions\nType a greeting to start."),
+    ]
+    assert first[-1] is second[-1]
+
+def test_collapsible_messages():
+    """Test that older versions of a message are collapsed."""
+    history = ChatHistory(collapsible_prefixes=["Current metadata:"])
+    history.append(message("Current metadata:\n{\"name\": \"a\"}"))
+    history.append(message("ok", "user"))
+    history.append(message("Current metadata:\n{\"name\": \"b\"}"))
+
+    assert history[0] == message("Current metadata: _(a newer version is shown below)_")
+    assert history[-1] == message("Current metadata:\n{\"name\": \"b\"}")
+
+def test_oldest_messages_are_removed():
+    """Test that the history keeps at most max_messages messages and counts the removed ones."""
+    history = ChatHistory(max_messages=3)
+    for number in range(10):
+        history.append(message(str(number), "user"))
+
+    assert len(history) == 4
+    assert history.hidden_count == 7
+    assert history[0] == message("_7 earlier messages were removed to keep the chat short._")
+    assert [entry["content"] for entry in history[1:]] == ["7", "8", "9"]
+
+def test_restore():
+    """Test that a history can be restored from its messages and the number of removed messages."""
+    history = ChatHistory(max_messages=3)
+    for number in range(5):
+        history.append(message(str(number), "user"))
+
+    restored = ChatHistory(list(history), max_messages=3, hidden_count=history.hidden_count)
+    assert restored == history
+    assert restored.hidden_count == 2
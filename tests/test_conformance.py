@@ -0,0 +1,90 @@
+# test_conformance.py
+
+# necessary imports
+import datetime
+import threading
+import pytest
+from unittest.mock import patch
+from main.conformance import ConformanceChecker, check_conformance, content_hash, format_verdict
+from main.croissant_chatbot_manager import CroissantChatbotManager
+from main.croissant_jsonld import metadata_to_jsonld
+
+"""
+Test cases for the background Croissant conformance check.
+"""
+
+@pytest.fixture
+def final_metadata():
+    """Fixture to provide final Croissant metadata."""
+    return metadata_to_jsonld({
+        "name": "Sample Dataset",
+        "creators": "John Doe",
+        "description": "This is a sample dataset.",
+        "url": "https://example.com",
+        "date_created": "2023-01-01",
+    })
+
+@pytest.fixture
+def checker():
+    """Fixture to create a conformance checker."""
+    return ConformanceChecker(workers=1, max_entries=2)
+
+def test_content_hash(final_metadata):
+    """Test that the hash does not depend on the order of the keys and changes with the content."""
+    reordered = dict(reversed(list(final_metadata.items())))
+    assert content_hash(reordered) == content_hash(final_metadata)
+    assert content_hash({**final_metadata, "version": "1.0.0"}) != content_hash(final_metadata)
+
+def test_check_conformance(final_metadata):
+    """Test that mlcroissant errors and warnings are reported, including dates read back from the saved file."""
+    assert isinstance(final_metadata["dateCreated"], datetime.datetime)
+    verdict = check_conformance(final_metadata)
+    assert any("creator" in error for error in verdict["errors"])
+    assert any("version" in warning for warning in verdict["warnings"])
+
+def test_verdicts_are_cached(checker, final_metadata):
+    """Test that checking unchanged metadata again does not run mlcroissant again."""
+    with patch("main.conformance.check_conformance", return_value={"errors": [], "warnings": []}) as mock_check:
+        first = checker.submit(final_metadata).result(timeout=10)
+        second = checker.submit(dict(final_metadata)).result(timeout=10)
+    assert first == second == {"errors": [], "warnings": []}
+    assert mock_check.call_count == 1
+    assert checker.checks == 1
+    assert checker.cache_hits == 1
+
+def test_verdicts_are_shared_between_processes(final_metadata, tmp_path, monkeypatch):
+    """Test that a verdict found by another worker process is read from the shared cache."""
+    from main import shared_cache as shared_cache_module
+    monkeypatch.setattr(shared_cache_module, "_shared_cache", None)
+    monkeypatch.setenv("SHARED_CACHE_PATH", str(tmp_path / "shared_cache.sqlite3"))
+    with patch("main.conformance.check_conformance", return_value={"errors": ["bad"], "warnings": []}) as mock_check:
+        ConformanceChecker(workers=1).submit(final_metadata).result(timeout=10)
+        assert ConformanceChecker(workers=1).submit(final_metadata).result(timeout=10) == {"errors": ["bad"], "warnings": []}
+    assert mock_check.call_count == 1
+    shared_cache_module._shared_cache.close()
+
+def test_format_verdict():
+    """Test the chat message of a verdict."""
+    assert "passed" in format_verdict({"errors": [], "warnings": []})
+    message = format_verdict({"errors": ["bad creator"], "warnings": ["no version"]})
+    assert "- **Error:** bad creator" in message
+    assert "- **Warning:** no version" in message
+
+def test_slow_check_stays_pending(checker, final_metadata):
+    """Test that a check that is still running is kept pending instead of being reported as failed."""
+    done = threading.Event()
+    def slow_check(metadata):
+        done.wait(timeout=10)
+        return {"errors": [], "warnings": []}
+    manager = CroissantChatbotManager()
+    with patch("main.conformance.check_conformance", side_effect=slow_check):
+        manager.pending_conformance = checker.submit(final_metadata)
+        history_length = len(manager.history)
+        assert manager.collect_conformance_result(timeout=0) is False
+        assert manager.collect_conformance_result(timeout=0.01) is False
+        assert manager.pending_conformance is not None
+        assert len(manager.history) == history_length
+        done.set()
+        assert manager.collect_conformance_result(timeout=10) is True
+    assert manager.pending_conformance is None
+    assert "passed" in manager.history[-1]["content"]
@@ -0,0 +1,67 @@
+# test_croissant_jsonld.py
+
+# necessary imports
+import datetime
+import glob
+import json
+import os
+import pytest
+from main.croissant_jsonld import ATTRIBUTE_PROPERTIES, metadata_to_jsonld
+from main.metadata_manager import MetadataManager
+
+"""
+Test cases for the direct Croissant JSON-LD emission, compared with the mlcroissant path.
+"""
+
+ANNOTATIONS_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "annotations")
+ANNOTATION_FILES = sorted(glob.glob(os.path.join(ANNOTATIONS_DIRECTORY, "*.json")))
+
+# Maps every Croissant property back to the attribute of the chatbot
+PROPERTY_ATTRIBUTES = {croissant_property: attribute for attribute, croissant_property in ATTRIBUTE_PROPERTIES.items()}
+PROPERTY_ATTRIBUTES.update({"task": "task", "modality": "modality"})
+
+
+def finalise(metadata, strict):
+    """Finalise metadata without saving it and serialize it the same way as the saved files."""
+    manager = MetadataManager()
+    manager.metadata = dict(metadata)
+    success, final_metadata = manager.finalise_metadata(save=False, strict=strict)
+    return success, json.dumps(final_metadata, indent=2, default=manager.json_serial)
+
+
+@pytest.mark.parametrize("annotation_file", ANNOTATION_FILES, ids=os.path.basename)
+def test_both_paths_match_for_annotations(annotation_file):
+    """Test that the fast and mlcroissant paths produce identical JSON for the metadata of every annotation."""
+    with open(annotation_file, "r") as file:
+        annotation = json.load(file)
+    metadata = {PROPERTY_ATTRIBUTES[key]: value for key, value in annotation.items() if key in PROPERTY_ATTRIBUTES}
+
+    fast_success, fast_json = finalise(metadata, strict=False)
+    strict_success, strict_json = finalise(metadata, strict=True)
+    assert fast_success and strict_success
+    assert fast_json == strict_json
+
+
+@pytest.mark.parametrize("metadata", [
+    {},
+    {"name": "a/b", "version": "", "url": None},
+    {"creators": ["Jane Doe"], "keywords": ["x", "y"], "in_language": ["en"]},
+    {"date_created": "2022-03-02T10:11:12", "date_modified": datetime.date(2020, 1, 2), "date_published": datetime.datetime(2021, 5, 6)},
+    {"name": "a/b", "version": 2, "description": " spaced "},
+])
+def test_both_paths_match_for_edge_cases(metadata):
+    """Test that both paths handle empty values, lists, dates and integer versions the same way."""
+    assert finalise(metadata, strict=False) == finalise(metadata, strict=True)
+
+
+@pytest.mark.parametrize("metadata", [{"date_created": "21-04-2024"}, {"date_published": ""}])
+def test_invalid_dates_fail_on_both_paths(metadata):
+    """Test that dates that are not in the ISO 8601 format fail on both paths."""
+    assert finalise(metadata, strict=False)[0] is False
+    assert finalise(metadata, strict=True)[0] is False
+
+
+def test_context_is_not_shared():
+    """Test that changing the returned JSON-LD does not change the cached @context."""
+    metadata_to_jsonld({})["@context"]["@language"] = "fr"
+    assert metadata_to_jsonld({})["@context"]["@language"] == "en"
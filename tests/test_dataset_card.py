@@ -0,0 +1,179 @@
+# test_dataset_card.py
+
+# necessary imports
+import time
+from unittest.mock import patch, MagicMock
+import pytest
+from main.dataset_card import (
+    split_front_matter,
+    extract_bibtex_entries,
+    parse_dataset_card,
+    fetch_latest_version,
+    version_sort_key,
+    enrich_dataset_metadata,
+    enrichment_cache,
+)
+
+"""
+Test cases for the dataset card enrichment functions.
+"""
+
+SAMPLE_CARD = """---
+language:
+- en
+- fr
+license: mit
+pretty_name: Sample Dataset
+tags:
+- science
+- exams
+task_ids:
+- multiple-choice-qa
+- Science
+---
+
+# Dataset Card for Sample Dataset
+
+## Citation
+
+```bibtex
+@article{sample2023,
+  title={A {Sample} Dataset},
+  author={Doe, John},
+  year={2023}
+}
+```
+"""
+
+@pytest.fixture(autouse=True)
+def clear_enrichment_cache():
+    """Fixture to make sure every test starts with an empty enrichment cache."""
+    enrichment_cache.clear()
+    yield
+    enrichment_cache.clear()
+
+@pytest.fixture
+def sample_dataset_info():
+    """Fixture to provide a sample DatasetInfo-like object."""
+    return type("Dataset", (object,), {"id": "sample/dataset", "sha": "0123456789abcdef"})()
+
+def test_split_front_matter():
+    """Test the split_front_matter function."""
+    front_matter, body = split_front_matter(SAMPLE_CARD)
+    assert front_matter["license"] == "mit"
+    assert front_matter["pretty_name"] == "Sample Dataset"
+    assert body.startswith("\n# Dataset Card")
+
+    # no front-matter
+    assert split_front_matter("# Title") == ({}, "# Title")
+
+    # invalid front-matter
+    front_matter, body = split_front_matter("---\n: [invalid\n---\nbody")
+    assert front_matter == {}
+    assert body == "body"
+
+def test_extract_bibtex_entries():
+    """Test the extract_bibtex_entries function."""
+    entries = extract_bibtex_entries(SAMPLE_CARD)
+    assert len(entries) == 1
+    assert entries[0].startswith("@article{sample2023,")
+    assert entries[0].endswith("}")
+    assert "title={A {Sample} Dataset}" in entries[0]
+
+    # several entries and no entries
+    assert len(extract_bibtex_entries("@misc{a, title={A}} and @book{b, title={B}}")) == 2
+    assert extract_bibtex_entries("No citation here.") == []
+
+def test_parse_dataset_card():
+    """Test the parse_dataset_card function."""
+    metadata = parse_dataset_card(SAMPLE_CARD)
+    assert metadata["keywords"] == "science, exams, multiple-choice-qa"
+    assert metadata["in_language"] == "en, fr"
+    assert metadata["license"] == "mit"
+    assert metadata["cite_as"].startswith("@article{sample2023,")
+    assert "version" not in metadata
+
+    # front-matter values take priority over BibTeX blocks in the body
+    card = "---\ncitation: '@misc{front, title={Front}}'\nversion: 2.0.0\npublisher: Sample Lab\n---\n@misc{body, title={Body}}"
+    metadata = parse_dataset_card(card)
+    assert metadata["cite_as"] == "@misc{front, title={Front}}"
+    assert metadata["version"] == "2.0.0"
+    assert metadata["publisher"] == "Sample Lab"
+
+    # empty card
+    assert parse_dataset_card("") == {}
+
+def test_version_sort_key():
+    """Test that version-like tags are ordered numerically."""
+    assert max(["v1.9", "v1.10", "v1.2"], key=version_sort_key) == "v1.10"
+
+def test_fetch_latest_version():
+    """Test the fetch_latest_version function."""
+    refs = MagicMock()
+    refs.tags = [MagicMock(), MagicMock()]
+    refs.tags[0].name = "v1.0"
+    refs.tags[1].name = "v2.0"
+    with patch("main.dataset_card.hf_api.list_repo_refs", return_value=refs):
+        assert fetch_latest_version("sample/dataset") == {"version": "v2.0"}
+
+    # no tags, so the latest commit is used
+    refs.tags = []
+    with patch("main.dataset_card.hf_api.list_repo_refs", return_value=refs):
+        assert fetch_latest_version("sample/dataset", sha="0123456789abcdef") == {"version": "0123456"}
+
+def test_enrich_dataset_metadata(sample_dataset_info):
+    """Test that enrichment only returns the attributes missing from the metadata."""
+    with patch("main.dataset_card.fetch_dataset_card", return_value=SAMPLE_CARD) as mock_card, \
+         patch("main.dataset_card.fetch_latest_version", return_value={"version": "v1.0"}) as mock_version:
+        enriched = enrich_dataset_metadata(sample_dataset_info, {"license": "apache-2.0", "keywords": ""})
+
+        assert enriched["version"] == "v1.0"
+        assert enriched["keywords"] == "science, exams, multiple-choice-qa"
+        assert "publisher" not in enriched
+        assert "license" not in enriched
+
+        # the result is cached by dataset id and commit
+        enrich_dataset_metadata(sample_dataset_info, {})
+        mock_card.assert_called_once()
+        mock_version.assert_called_once()
+
+def test_enrich_dataset_metadata_deadline(sample_dataset_info):
+    """Test that results that miss the deadline are left out and not cached."""
+    def slow_card(dataset_id, revision=None):
+        time.sleep(0.5)
+        return SAMPLE_CARD
+
+    with patch("main.dataset_card.fetch_dataset_card", side_effect=slow_card), \
+         patch("main.dataset_card.fetch_latest_version", return_value={"version": "v1.0"}):
+        enriched = enrich_dataset_metadata(sample_dataset_info, {}, deadline=0.1)
+
+    assert enriched == {"version": "v1.0"}
+    assert enrichment_cache.get_stats()["entries"] == 0
+
+def test_enrich_dataset_metadata_errors(sample_dataset_info):
+    """Test that failed requests are ignored."""
+    with patch("main.dataset_card.fetch_dataset_card", side_effect=Exception("Mocked exception")), \
+         patch("main.dataset_card.fetch_latest_version", side_effect=Exception("Mocked exception")):
+        assert enrich_dataset_metadata(sample_dataset_info, {}) == {}
+    # failed requests are not cached
+    assert enrichment_cache.get_stats()["entries"] == 0
+
+    # a request that failed once is retried on the next lookup
+    with patch("main.dataset_card.fetch_dataset_card", side_effect=Exception("Mocked exception")), \
+         patch("main.dataset_card.fetch_latest_version", return_value={"version": "v1.0"}):
+        assert enrich_dataset_metadata(sample_dataset_info, {}) == {"version": "v1.0"}
+    assert enrichment_cache.get_stats()["entries"] == 0
+
+    # no dataset id
+    assert enrich_dataset_metadata(type("Dataset", (object,), {})(), {}) == {}
+
+def test_enrich_dataset_metadata_publisher(sample_dataset_info):
+    """Test that the publisher comes from the card, or from the author of the dataset."""
+    sample_dataset_info.author = "sample"
+    card = "---\npublisher: Sample Lab\n---\n"
+    with patch("main.dataset_card.fetch_latest_version", return_value={}):
+        with patch("main.dataset_card.fetch_dataset_card", return_value=card):
+            assert enrich_dataset_metadata(sample_dataset_info, {})["publisher"] == "Sample Lab"
+        enrichment_cache.clear()
+        with patch("main.dataset_card.fetch_dataset_card", return_value=SAMPLE_CARD):
+            assert enrich_dataset_metadata(sample_dataset_info, {})["publisher"] == "sample"
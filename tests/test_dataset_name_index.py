@@ -0,0 +1,50 @@
+# test_dataset_name_index.py
+
+# necessary imports
+import pytest
+from main.dataset_name_index import DatasetNameIndex
+
+"""
+Test cases for the DatasetNameIndex class.
+"""
+
+@pytest.fixture
+def dataset_name_index():
+    """Fixture to create an index of sample dataset IDs."""
+    return DatasetNameIndex(["cais/mmlu", "openai/gsm8k", "openai/openai_humaneval", "HuggingFaceFW/fineweb", "rajpurkar/squad"])
+
+def test_contains(dataset_name_index):
+    """Test that dataset IDs are found regardless of their case."""
+    assert dataset_name_index.contains("huggingfacefw/FineWeb")
+    assert not dataset_name_index.contains("cais/mmmlu")
+    assert len(dataset_name_index) == 5
+
+def test_complete(dataset_name_index):
+    """Test that completions keep the original spelling and are in alphabetical order."""
+    assert dataset_name_index.complete("OpenAI/") == ["openai/gsm8k", "openai/openai_humaneval"]
+    assert dataset_name_index.complete("hugging") == ["HuggingFaceFW/fineweb"]
+    assert dataset_name_index.complete("openai/", limit=1) == ["openai/gsm8k"]
+    assert dataset_name_index.complete("zzz") == []
+
+def test_add(dataset_name_index):
+    """Test that added dataset IDs can be completed."""
+    dataset_name_index.add("openai/mrcr")
+    dataset_name_index.add("OPENAI/MRCR")  # duplicates are ignored
+    assert dataset_name_index.complete("openai/") == ["openai/gsm8k", "openai/mrcr", "openai/openai_humaneval"]
+
+def test_suggest(dataset_name_index):
+    """Test the "did you mean" suggestions."""
+    # typos in the dataset name and in the owner
+    assert dataset_name_index.suggest("cais/mmmlu") == ["cais/mmlu"]
+    assert dataset_name_index.suggest("opnai/gsm8k") == ["openai/gsm8k"]
+    # name without an owner
+    assert dataset_name_index.suggest("squad") == ["rajpurkar/squad"]
+    # nothing close enough
+    assert dataset_name_index.suggest("completely/different") == []
+    assert dataset_name_index.suggest("") == []
+
+def test_suggest_large_index():
+    """Test that suggestions are found among many similar dataset IDs."""
+    dataset_name_index = DatasetNameIndex(f"user{number}/dataset-{number}" for number in range(10000))
+    assert dataset_name_index.suggest("user1234/datset-1234")[0] == "user1234/dataset-1234"
+    assert dataset_name_index.suggest("usr1234/dataset-1234")[0] == "user1234/dataset-1234"
@@ -0,0 +1,33 @@
+# test_evaluate_metadata.py
+
+# necessary imports
+import numpy as np
+from analysis.evaluate_metadata import get_vector_similarity, evaluate_keyword_similarity
+
+"""
+Test cases for the script that evaluates the metadata quality of the annotations.
+"""
+
+def features(vector):
+    """Create the cached features of a document with a vector."""
+    vector = np.array(vector, dtype=np.float32)
+    return {"vector": vector, "vector_norm": float(np.linalg.norm(vector))}
+
+def test_get_vector_similarity():
+    """Test the cosine similarity of two document vectors."""
+    assert get_vector_similarity("a", features([1.0, 0.0]), "b", features([1.0, 0.0])) == 1.0
+    assert get_vector_similarity("a", features([1.0, 0.0]), "b", features([0.0, 1.0])) == 0.0
+
+    # a document without a vector is not similar to other documents
+    assert get_vector_similarity("a", features([0.0, 0.0]), "b", features([1.0, 0.0])) == 0.0
+
+def test_get_vector_similarity_of_identical_texts():
+    """Test that identical texts are fully similar, even without a vector, as with spaCy's Doc.similarity."""
+    no_vector = {"vector": None, "vector_norm": 0.0}
+    assert get_vector_similarity("qwzxv", no_vector, "qwzxv", no_vector) == 1.0
+    assert get_vector_similarity("qwzxv", no_vector, "vxzwq", no_vector) == 0.0
+
+def test_evaluate_keyword_similarity_of_repeated_keywords():
+    """Test that repeated keywords count as similar, even if the model does not know them."""
+    assert evaluate_keyword_similarity("qwzxv, qwzxv") == 1.0
+    assert evaluate_keyword_similarity("") == 0.0
@@ -0,0 +1,137 @@
+# test_extract_huggingface_metadata.py
+
+# necessary imports
+import json
+import os
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+import pytest
+import requests
+from huggingface_hub.utils import HfHubHTTPError
+from analysis.extract_huggingface_metadata import RateLimiter, fetch_hf_metadata, is_fresh, save_metadata, process_csv, get_metadata_path
+
+"""
+Test cases for the script that extracts the Hugging Face metadata of the datasets in a CSV file.
+"""
+
+class FakeClock:
+    """A clock that only moves when the test sleeps."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+def http_error(status_code, headers=None):
+    """Create the error the Hub client raises for a response with the status code."""
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    return HfHubHTTPError(f"{status_code} error", response=response)
+
+@pytest.fixture
+def dataset_info():
+    """Fixture to create the dataset details returned by the Hub."""
+    return SimpleNamespace(id="cais/mmlu", author="cais", description="A benchmark of many subjects.", citation="",
+                           tags=["license:mit", "task_categories:question-answering", "language:en"])
+
+def test_rate_limiter_spacing():
+    """Test that requests to a host are spaced by the interval, and requests to other hosts are not delayed."""
+    clock = FakeClock()
+    rate_limiter = RateLimiter(4, clock=clock, sleep=clock.sleep)
+    for _ in range(3):
+        rate_limiter.wait()
+    assert clock.sleeps == [0.25, 0.25]
+
+    rate_limiter.wait("example.com")
+    assert clock.sleeps == [0.25, 0.25]
+
+    # a request after a pause is not delayed
+    clock.now += 10
+    rate_limiter.wait()
+    assert clock.sleeps == [0.25, 0.25]
+
+@pytest.mark.parametrize("status_code", [429, 503])
+def test_fetch_hf_metadata_retries(dataset_info, status_code):
+    """Test that rate limits and server errors are retried until the request succeeds."""
+    with patch("analysis.extract_huggingface_metadata.fetch_dataset_info", side_effect=[http_error(status_code), dataset_info]) as mock_fetch, \
+         patch("analysis.extract_huggingface_metadata.time.sleep") as mock_sleep:
+        metadata, success = fetch_hf_metadata("cais/mmlu", backoff=0.5)
+    assert success
+    assert metadata["name"] == "cais/mmlu"
+    assert metadata["license"] == "mit"
+    assert metadata["in_language"] == "en"
+    assert mock_fetch.call_count == 2
+    mock_sleep.assert_called_once_with(0.5)
+
+def test_fetch_hf_metadata_retry_after(dataset_info):
+    """Test that the wait time requested by the Hub is used."""
+    with patch("analysis.extract_huggingface_metadata.fetch_dataset_info", side_effect=[http_error(429, {"Retry-After": "3"}), dataset_info]), \
+         patch("analysis.extract_huggingface_metadata.time.sleep") as mock_sleep:
+        metadata, success = fetch_hf_metadata("cais/mmlu")
+    assert success
+    mock_sleep.assert_called_once_with(3.0)
+
+def test_fetch_hf_metadata_does_not_retry_client_errors():
+    """Test that errors that cannot be fixed by retrying are returned straight away."""
+    with patch("analysis.extract_huggingface_metadata.fetch_dataset_info", side_effect=http_error(401)) as mock_fetch, \
+         patch("analysis.extract_huggingface_metadata.time.sleep") as mock_sleep:
+        metadata, success = fetch_hf_metadata("cais/mmlu")
+    assert not success
+    assert "401 error" in metadata["error"]
+    assert mock_fetch.call_count == 1
+    mock_sleep.assert_not_called()
+
+def test_is_fresh(tmp_path):
+    """Test that a metadata file is fresh until it is older than the maximum age."""
+    file_path = tmp_path / "cais_mmlu_hf.json"
+    assert not is_fresh(str(file_path), 7)
+    file_path.write_text("{}")
+    assert is_fresh(str(file_path), 7)
+    eight_days_ago = time.time() - 8 * 24 * 60 * 60
+    os.utime(file_path, (eight_days_ago, eight_days_ago))
+    assert not is_fresh(str(file_path), 7)
+
+def test_process_csv_skips_fresh_files(tmp_path, dataset_info):
+    """Test that only the datasets without a fresh metadata file are fetched, unless forced."""
+    csv_path = tmp_path / "datasets.csv"
+    csv_path.write_text("Name\ncais/mmlu\nopenai/gsm8k\n")
+    output_folder = str(tmp_path / "hf_metadata")
+    os.makedirs(output_folder)
+    with open(get_metadata_path("openai/gsm8k", output_folder), "w") as f:
+        json.dump({"name": "openai/gsm8k"}, f)
+
+    with patch("analysis.extract_huggingface_metadata.fetch_dataset_info", return_value=dataset_info) as mock_fetch:
+        counts = process_csv(str(csv_path), output_folder, requests_per_second=0)
+        assert counts == {"saved": 1, "skipped": 1, "failed": 0}
+        mock_fetch.assert_called_once_with("cais/mmlu")
+
+        counts = process_csv(str(csv_path), output_folder, requests_per_second=0, force=True)
+        assert counts["skipped"] == 0
+        assert mock_fetch.call_count == 3
+
+def test_save_metadata(tmp_path):
+    """Test that the metadata is saved as JSON."""
+    save_metadata({"name": "cais/mmlu", "license": "mit"}, str(tmp_path))
+    with open(get_metadata_path("cais/mmlu", str(tmp_path))) as f:
+        assert json.load(f) == {"name": "cais/mmlu", "license": "mit"}
+
+def test_save_metadata_failure_leaves_no_partial_file(tmp_path):
+    """Test that a failed write neither leaves a temporary file nor replaces the existing file."""
+    file_path = get_metadata_path("cais/mmlu", str(tmp_path))
+    with open(file_path, "w") as f:
+        json.dump({"name": "cais/mmlu", "license": "mit"}, f)
+
+    with patch("analysis.extract_huggingface_metadata.json.dump", side_effect=OSError("No space left on device")):
+        with pytest.raises(OSError):
+            save_metadata({"name": "cais/mmlu", "license": "apache-2.0"}, str(tmp_path))
+    assert os.listdir(tmp_path) == [os.path.basename(file_path)]
+    with open(file_path) as f:
+        assert json.load(f)["license"] == "mit"
@@ -0,0 +1,125 @@
+# test_hub_client.py
+
+# necessary imports
+import datetime
+from unittest.mock import patch, MagicMock
+import pytest
+from huggingface_hub.utils import RepositoryNotFoundError
+from main.hub_client import TTLCache, dataset_info_cache, fetch_dataset_info, extract_metadata_from_dataset_info
+
+"""
+Test cases for the Hugging Face Hub client functions.
+"""
+
+class FakeClock:
+    """A clock that only moves when the test advances it."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture(autouse=True)
+def clear_dataset_info_cache():
+    """Fixture to make sure every test starts with an empty dataset info cache."""
+    dataset_info_cache.clear()
+    yield
+    dataset_info_cache.clear()
+
+@pytest.fixture
+def sample_dataset_info():
+    """Fixture to provide a sample DatasetInfo-like object."""
+    return type("Dataset", (object,), {
+        "id": "sample/dataset",
+        "author": "sample",
+        "last_modified": datetime.datetime(2024, 2, 1),
+        "created_at": datetime.datetime(2023, 1, 1),
+        "description": "This is a sample dataset.",
+        "citation": "@article{sample2023}",
+        "tags": ["license:mit", "task_categories:question-answering", "modality:text", "language:en", "language:fr"],
+    })()
+
+def test_ttl_cache_expiry():
+    """Test that TTLCache entries expire after their time-to-live."""
+    clock = FakeClock()
+    cache = TTLCache(ttl=10, max_entries=10, clock=clock)
+    cache.set("key", "value")
+    cache.set("short", "value", ttl=1)
+
+    assert cache.get("key") == (True, "value")
+    assert cache.get("short") == (True, "value")
+    clock.now = 5
+    assert cache.get("key") == (True, "value")
+    assert cache.get("short") == (False, None)
+    clock.now = 10
+    assert cache.get("key") == (False, None)
+    assert cache.get_stats() == {"entries": 0, "hits": 3, "misses": 2}
+
+def test_ttl_cache_caches_none():
+    """Test that None can be cached to remember missing values."""
+    cache = TTLCache(ttl=10, max_entries=10)
+    cache.set("missing", None)
+    assert cache.get("missing") == (True, None)
+
+def test_ttl_cache_max_entries():
+    """Test that the least recently used entry is evicted when the cache is full."""
+    cache = TTLCache(ttl=10, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.get("c") == (True, 3)
+
+def test_fetch_dataset_info_is_cached(sample_dataset_info):
+    """Test that repeat lookups of a dataset are served from the cache."""
+    with patch("main.hub_client.hf_api.dataset_info", return_value=sample_dataset_info) as mock_dataset_info:
+        assert fetch_dataset_info("sample/dataset") is sample_dataset_info
+        assert fetch_dataset_info("sample/dataset") is sample_dataset_info
+        mock_dataset_info.assert_called_once()
+        assert mock_dataset_info.call_args.args == ("sample/dataset",)
+
+        # a different revision is a different cache entry
+        fetch_dataset_info("sample/dataset", revision="v1")
+        assert mock_dataset_info.call_count == 2
+
+def test_fetch_dataset_info_negative_cache():
+    """Test that datasets that do not exist are cached as None."""
+    not_found = RepositoryNotFoundError("Mocked not found", response=MagicMock())
+    with patch("main.hub_client.hf_api.dataset_info", side_effect=not_found) as mock_dataset_info:
+        assert fetch_dataset_info("missing/dataset") is None
+        assert fetch_dataset_info("missing/dataset") is None
+        mock_dataset_info.assert_called_once()
+
+def test_fetch_dataset_info_errors_are_not_cached():
+    """Test that network errors are raised and not cached."""
+    with patch("main.hub_client.hf_api.dataset_info", side_effect=ConnectionError("Mocked error")) as mock_dataset_info:
+        with pytest.raises(ConnectionError):
+            fetch_dataset_info("sample/dataset")
+        with pytest.raises(ConnectionError):
+            fetch_dataset_info("sample/dataset")
+        assert mock_dataset_info.call_count == 2
+
+def test_extract_metadata_from_dataset_info(sample_dataset_info):
+    """Test the extract_metadata_from_dataset_info function."""
+    metadata = extract_metadata_from_dataset_info(sample_dataset_info)
+    assert metadata == {
+        "name": "sample/dataset",
+        "creators": "sample",
+        "date_modified": "2024-02-01",
+        "date_created": "2023-01-01",
+        "date_published": "2023-01-01",
+        "description": "This is a sample dataset.",
+        "license": "mit",
+        "url": "https://huggingface.co/datasets/sample/dataset",
+        "task": "question-answering",
+        "modality": "text",
+        "in_language": "en, fr",
+        "cite_as": "@article{sample2023}",
+    }
+
+    # missing fields and tags
+    empty_dataset_info = type("Dataset", (object,), {"id": "", "tags": None})()
+    assert extract_metadata_from_dataset_info(empty_dataset_info) == {}
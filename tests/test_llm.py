@@ -12,7 +12,9 @@ from main.llm import (
     ask_user_for_informal_description,
     suggest_metadata,
     create_llm_response,
+    fill_missing_metadata,
 )
+from main.shared_cache import SharedCache
 
 """
     Test cases for the LLM functions.
@@ -149,3 +151,34 @@ def test_create_llm_response_error(mock_post):
     assert "Unexpected error occured:" in response 
     mock_post.assert_called_once()
 
+@patch("main.llm.requests.post")
+def test_create_llm_response_cache(mock_post, tmp_path):
+    """Test that responses are only reused from the shared cache when asked to."""
+    mock_post.return_value.status_code = 200
+    mock_post.return_value.json.return_value = {
+        "choices": [{"message": {"content": "This is a test response."}}]
+    }
+
+    with patch("main.llm.get_shared_cache", return_value=SharedCache(str(tmp_path / "shared_cache.sqlite3"))):
+        # suggestions give a new answer every time
+        create_llm_response("Test prompt")
+        create_llm_response("Test prompt")
+        assert mock_post.call_count == 2
+
+        assert create_llm_response("Test prompt", use_cache=True) == "This is a test response."
+        assert create_llm_response("Test prompt", use_cache=True) == "This is a test response."
+        assert mock_post.call_count == 3
+
+
+def test_fill_missing_metadata(sample_metadata):
+    """Test that several missing attributes are filled from one JSON response of the LLM."""
+    response = 'Here you go:\n```json\n{"keywords": ["nlp", "questions", "benchmark"], "task": "question-answering", "url": "https://x.org", "modality": ""}\n```'
+    with patch("main.llm.create_llm_response", return_value=response) as mock_response:
+        filled = fill_missing_metadata(sample_metadata, ["keywords", "task", "modality"])
+    mock_response.assert_called_once()
+    assert "- keywords:" in mock_response.call_args.args[0]
+    assert filled == {"keywords": "nlp, questions, benchmark", "task": "question-answering"}
+
+    with patch("main.llm.create_llm_response", return_value="I cannot help with that."):
+        assert fill_missing_metadata(sample_metadata, ["task"]) == {}
+    assert fill_missing_metadata(sample_metadata, []) == {}
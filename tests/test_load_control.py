@@ -0,0 +1,69 @@
+# test_load_control.py
+
+# necessary imports
+import pytest
+from main.load_control import ConcurrencyGroup, concurrency_groups, get_load_stats
+
+"""
+Test cases for the ConcurrencyGroup class.
+"""
+
+class FakeClock:
+    """A clock that only moves when the test advances it."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    """Fixture to provide a fake clock."""
+    return FakeClock()
+
+@pytest.fixture
+def group(clock):
+    """Fixture to create a concurrency group with room for two waiting events."""
+    return ConcurrencyGroup("llm", concurrency_limit=1, max_waiting=2, admission_timeout=60, clock=clock)
+
+def test_events_are_rejected_when_too_many_are_waiting(group):
+    """Test that events are rejected once the group has too many waiting events, and admitted again when they start."""
+    assert group.admit()
+    assert group.admit()
+    assert not group.admit()
+    with group.run():
+        assert group.admit()
+    stats = group.get_stats()
+    assert stats["waiting"] == 2
+    assert stats["admitted"] == 3
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 1
+
+def test_wait_times(group, clock):
+    """Test that the time an event waited in the queue is recorded when it starts."""
+    group.admit()
+    clock.now = 4
+    group.admit()
+    with group.run():
+        assert group.get_stats()["running"] == 1
+    clock.now = 6
+    with group.run():
+        pass
+    stats = group.get_stats()
+    assert stats["running"] == 0
+    assert stats["max_wait"] == 4
+    assert stats["average_wait"] == 3
+
+def test_admissions_that_never_start_expire(group, clock):
+    """Test that admitted events that never started stop counting as waiting."""
+    group.admit()
+    group.admit()
+    clock.now = 61
+    assert group.get_stats()["waiting"] == 0
+    assert group.admit()
+
+def test_app_groups():
+    """Test that the app has separate groups for cheap UI events, LLM-bound events and NLP-bound events."""
+    assert {"ui", "llm", "nlp"} <= set(concurrency_groups)
+    assert set(get_load_stats()) == set(concurrency_groups)
@@ -2,13 +2,17 @@
 
 # necessary imports
 import pytest
-from unittest.mock import patch, mock_open
+from unittest.mock import patch
 from main.metadata_manager import MetadataManager
 from main.attribute_quality import AttributeQualityChecker
 from main.validation import MetadataValidator
+from main.catalog import DatasetCatalog
+from main.croissant_chatbot_manager import CroissantChatbotManager
+from concurrent.futures import Future
 import os
 import json
 import datetime
+import time
 
 """
 Test cases for the MetadataManager class.
@@ -24,6 +28,20 @@ def metadata_manager(sample_metadata, sample_final_metadata, sample_confirmed_me
     manager.temporary_metadata = sample_temporary_metadata
     return manager
 
+@pytest.fixture(autouse=True)
+def no_dataset_card_enrichment():
+    """Fixture to stop find_dataset_info from fetching dataset cards during tests."""
+    with patch("main.metadata_manager.enrich_dataset_metadata", return_value={}) as mock_enrich:
+        yield mock_enrich
+
+@pytest.fixture(autouse=True)
+def empty_catalog():
+    """Fixture to give find_dataset_info an empty in-memory catalog during tests."""
+    catalog = DatasetCatalog(":memory:")
+    with patch("main.metadata_manager.get_catalog", return_value=catalog):
+        yield catalog
+    catalog.close()
+
 @pytest.fixture
 def sample_metadata():
     """Fixture to provide sample metadata."""
@@ -89,6 +107,12 @@ def test_reset_metadata(metadata_manager):
     assert metadata_manager.confirmed_metadata == {}
     assert metadata_manager.temporary_metadata == {}
 
+def test_reset_metadata_clears_near_duplicates(metadata_manager):
+    """Test that the near-duplicates of the previous dataset are not shown after a reset."""
+    metadata_manager.near_duplicates = [{"filename": "a_metadata.json", "field": "description", "similarity": 0.9}]
+    metadata_manager.reset_metadata()
+    assert metadata_manager.near_duplicates == []
+
 def test_is_all_attributes_filled(metadata_manager_with_final_metadata):
     """Test the is_all_attributes_filled method."""
     # All attributes filled
@@ -319,32 +343,109 @@ def test_validate_and_check_quality_all_attributes_with_issues_and_errors(metada
 
 def test_save_metadata_to_file(metadata_manager, sample_metadata):
     """Test the save_metadata_to_file method."""
-    # Mock os.makedirs, os.path.exists, and open
-    with patch("os.makedirs") as mock_makedirs, \
-         patch("os.path.exists", return_value=False) as mock_exists, \
-         patch("builtins.open", mock_open()) as mock_file, \
-         patch.object(metadata_manager, "get_filename", return_value="test_metadata.json") as mock_get_filename:
-        
+    annotation_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "annotations", "test_metadata.json")
+    with patch("main.metadata_manager.annotation_store") as mock_store, \
+         patch("main.metadata_manager.get_annotation_index") as mock_get_index, \
+         patch.object(metadata_manager, "get_filename", return_value="test_metadata.json"):
+        mock_store.save.return_value = (annotation_path, True)
+
         # Call the method
         filepath, filename = metadata_manager.save_metadata_to_file(sample_metadata)
 
-        # Check if os.makedirs was called
-        mock_makedirs.assert_called_once_with(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "annotations"))
-
-        # Check if the file was opened
-        mock_file.assert_called_once_with(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "annotations", "test_metadata.json"), "w")
-
-        # Concatenate all write calls
-        written_content = "".join(call.args[0] for call in mock_file().write.call_args_list)
-
-        # Check the written content
+        # Check that the serialized metadata was saved to the annotations store
+        mock_store.save.assert_called_once()
+        saved_filename, data = mock_store.save.call_args.args
+        assert saved_filename == "test_metadata.json"
         expected_content = json.dumps(sample_metadata, indent=2, default=metadata_manager.json_serial)
-        assert written_content == expected_content
+        assert data.decode("utf-8") == expected_content
+
+        # Check that the annotation index was updated and searched for near-duplicates
+        mock_get_index.return_value.upsert.assert_called_once_with("test_metadata.json", sample_metadata, annotation_path)
+        mock_get_index.return_value.find_near_duplicates.assert_called_once_with("test_metadata.json")
+        assert metadata_manager.near_duplicates == mock_get_index.return_value.find_near_duplicates.return_value
 
         # Check the returned values
         assert filepath.endswith("annotations/test_metadata.json")
         assert filename == "test_metadata.json"
 
+def test_save_metadata_to_file_error(metadata_manager, sample_metadata):
+    """Test that an error while saving is returned as a message."""
+    with patch("main.metadata_manager.annotation_store") as mock_store:
+        mock_store.save.side_effect = OSError("disk full")
+        filepath, message = metadata_manager.save_metadata_to_file(sample_metadata)
+        assert filepath is None
+        assert "disk full" in message
+
+def test_get_download_file(metadata_manager, sample_final_metadata, tmp_path):
+    """Test that the download file is written once and reused while the metadata is unchanged."""
+    with patch("main.metadata_manager.tempfile.gettempdir", return_value=str(tmp_path)), \
+         patch.object(metadata_manager, "get_filename", return_value="test_metadata.json"):
+        filepath, filename = metadata_manager.get_download_file(sample_final_metadata)
+        assert filename == "test_metadata.json"
+        assert os.path.basename(filepath) == "test_metadata.json"
+        with open(filepath, "r", encoding="utf-8") as file:
+            assert json.load(file) == json.loads(json.dumps(sample_final_metadata, default=metadata_manager.json_serial))
+
+        # Unchanged metadata reuses the file
+        with patch("main.metadata_manager.os.replace") as mock_replace:
+            assert metadata_manager.get_download_file(dict(sample_final_metadata)) == (filepath, filename)
+            mock_replace.assert_not_called()
+
+        # A file that was removed is written again
+        os.remove(filepath)
+        assert metadata_manager.get_download_file(sample_final_metadata) == (filepath, filename)
+        assert os.path.exists(filepath)
+
+        # Another manager with the same metadata reuses the file
+        other_manager = MetadataManager()
+        with patch.object(other_manager, "get_filename", return_value="test_metadata.json"), \
+             patch("main.metadata_manager.os.replace") as mock_replace:
+            assert other_manager.get_download_file(sample_final_metadata) == (filepath, filename)
+            mock_replace.assert_not_called()
+
+        # Changed metadata gets a new file
+        changed_filepath, _ = metadata_manager.get_download_file({**sample_final_metadata, "name": "Changed"})
+        assert changed_filepath != filepath
+        assert os.path.exists(changed_filepath)
+        assert [path.name for path in tmp_path.rglob("*.tmp")] == []
+
+def test_cleanup_downloads(metadata_manager, tmp_path):
+    """Test that download folders are removed when they are too old or too many, the oldest first."""
+    now = time.time()
+    for age, name in [(10, "new"), (20, "middle"), (30, "old"), (2 * 24 * 60 * 60, "expired")]:
+        folder = tmp_path / name
+        folder.mkdir()
+        (folder / "test_metadata.json").write_text("{}")
+        os.utime(folder, (now - age, now - age))
+
+    # the expired folder is removed
+    assert metadata_manager.cleanup_downloads(str(tmp_path)) == 1
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["middle", "new", "old"]
+
+    # the oldest folders beyond the maximum count are removed, but never the one to keep
+    assert metadata_manager.cleanup_downloads(str(tmp_path), keep=str(tmp_path / "old"), max_count=2) == 1
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["new", "old"]
+    assert metadata_manager.cleanup_downloads(str(tmp_path), keep=str(tmp_path / "old"), max_count=1) == 1
+    assert [path.name for path in tmp_path.iterdir()] == ["old"]
+
+    # a missing folder is ignored
+    assert metadata_manager.cleanup_downloads(str(tmp_path / "missing")) == 0
+
+def test_reused_download_survives_cleanup(metadata_manager, sample_final_metadata, tmp_path):
+    """Test that a download folder that is reused is aged from its last use, so a cleanup does not remove it."""
+    with patch("main.metadata_manager.tempfile.gettempdir", return_value=str(tmp_path)), \
+         patch.object(metadata_manager, "get_filename", return_value="test_metadata.json"):
+        filepath, _ = metadata_manager.get_download_file(sample_final_metadata)
+        directory = os.path.dirname(filepath)
+        two_days_ago = time.time() - 2 * 24 * 60 * 60
+        os.utime(directory, (two_days_ago, two_days_ago))
+
+        assert metadata_manager.get_download_file(sample_final_metadata)[0] == filepath
+        # the cleanup after writing another download keeps the reused folder
+        metadata_manager.get_download_file({**sample_final_metadata, "name": "Changed"})
+    assert os.path.exists(filepath)
+    assert time.time() - os.path.getmtime(directory) < 60
+
 def test_json_serial(metadata_manager):
     """Test the json_serial method."""
 
@@ -434,8 +535,8 @@ def test_finalise_metadata_unexpected_error(metadata_manager):
 
 def test_find_dataset_info(metadata_manager):
     """Test the find_dataset_info method."""
-    # Mock the HfApi.list_datasets method to simulate fetching dataset info
-    with patch("main.metadata_manager.HfApi.list_datasets", return_value=[
+    # Mock the fetch_dataset_info function to simulate fetching dataset info
+    with patch("main.metadata_manager.fetch_dataset_info", return_value=
         type("Dataset", (object,), {
             "id": "sample_dataset_id",
             "author": "John Doe",
@@ -450,7 +551,7 @@ def test_find_dataset_info(metadata_manager):
                 "language:en"
             ]
         })()
-    ]):
+    ):
         # Call the actual method
         dataset_info, success = metadata_manager.find_dataset_info("sample_dataset_id")
 
@@ -468,8 +569,8 @@ def test_find_dataset_info(metadata_manager):
 
 def test_find_dataset_info_missing_tags(metadata_manager):
     """Test the find_dataset_info method with missing tags."""
-    # Mock the HfApi.list_datasets method to simulate fetching dataset info
-    with patch("main.metadata_manager.HfApi.list_datasets", return_value=[
+    # Mock the fetch_dataset_info function to simulate fetching dataset info
+    with patch("main.metadata_manager.fetch_dataset_info", return_value=
         type("Dataset", (object,), {
             "id": "sample_dataset_id",
             "author": "John Doe",
@@ -482,7 +583,7 @@ def test_find_dataset_info_missing_tags(metadata_manager):
                 "task_categories:classification",
             ]
         })()
-    ]):
+    ):
         # Call the actual method
         dataset_info, success = metadata_manager.find_dataset_info("sample_dataset_id")
 
@@ -499,9 +600,9 @@ def test_find_dataset_info_missing_tags(metadata_manager):
 
 def test_find_dataset_info_id_returns_nothing(metadata_manager):
     """Test the find_dataset_info method with an ID that returns nothing."""
-    # Mock the HfApi.list_datasets method to simulate fetching dataset info
+    # Mock the fetch_dataset_info function to simulate fetching dataset info
     metadata_manager.metadata = {}
-    with patch("main.metadata_manager.HfApi.list_datasets", return_value=[
+    with patch("main.metadata_manager.fetch_dataset_info", return_value=
         type("Dataset", (object,), {
             "id": "",
             "author": "",
@@ -509,7 +610,7 @@ def test_find_dataset_info_id_returns_nothing(metadata_manager):
             "citation": "",
             "tags": []
         })()
-    ]):
+    ):
         # Call the actual method
         dataset_info, success = metadata_manager.find_dataset_info("sample_dataset_id")
 
@@ -520,11 +621,135 @@ def test_find_dataset_info_id_returns_nothing(metadata_manager):
 
 def test_find_dataset_info_with_invalid_id(metadata_manager):
     """Test the find_dataset_info method with an invalid dataset ID."""
-    # Mock the HfApi.list_datasets method to simulate fetching dataset info
-    with patch("main.metadata_manager.HfApi.list_datasets", return_value=None):
+    # Mock the fetch_dataset_info function to simulate a dataset that does not exist
+    with patch("main.metadata_manager.fetch_dataset_info", return_value=None):
         # Call the actual method
         dataset_info, success = metadata_manager.find_dataset_info("invalid_dataset_id")
 
         # Check the returned values
         assert success is False
-        assert "error" in dataset_info
\ No newline at end of file
+        assert dataset_info is None
+
+def test_find_dataset_info_error(metadata_manager):
+    """Test the find_dataset_info method when the Hub request fails."""
+    with patch("main.metadata_manager.fetch_dataset_info", side_effect=Exception("Mocked exception")):
+        dataset_info, success = metadata_manager.find_dataset_info("sample_dataset_id")
+
+        assert success is False
+        assert dataset_info == {"error": "Mocked exception"}
+
+def test_find_dataset_info_with_enrichment(metadata_manager, no_dataset_card_enrichment):
+    """Test that find_dataset_info merges the attributes found in the dataset card."""
+    metadata_manager.metadata = {}
+    no_dataset_card_enrichment.return_value = {"version": "v1.0", "keywords": "qa, science, exams"}
+    with patch("main.metadata_manager.fetch_dataset_info", return_value=type("Dataset", (object,), {"id": "sample_dataset_id", "tags": []})()):
+        dataset_info, success = metadata_manager.find_dataset_info("sample_dataset_id")
+
+        assert success is True
+        assert dataset_info["name"] == "sample_dataset_id"
+        assert dataset_info["version"] == "v1.0"
+        assert dataset_info["keywords"] == "qa, science, exams"
+
+def test_find_dataset_info_from_catalog(metadata_manager, empty_catalog):
+    """Test that find_dataset_info serves datasets enriched by a recent Hub lookup without touching the network."""
+    metadata_manager.metadata = {}
+    empty_catalog.upsert("Sample/Dataset", {"name": "Sample/Dataset", "license": "mit"}, enriched=True)
+    with patch("main.metadata_manager.fetch_dataset_info") as mock_fetch:
+        dataset_info, success = metadata_manager.find_dataset_info("sample/dataset")
+
+        assert success is True
+        assert dataset_info == {"name": "Sample/Dataset", "license": "mit"}
+        mock_fetch.assert_not_called()
+
+def test_find_dataset_info_writes_through_to_catalog(metadata_manager, empty_catalog):
+    """Test that datasets found on the Hub are added to the catalog."""
+    metadata_manager.metadata = {}
+    dataset = type("Dataset", (object,), {"id": "sample/dataset", "tags": ["license:mit"], "last_modified": datetime.datetime(2024, 2, 1)})()
+    with patch("main.metadata_manager.fetch_dataset_info", return_value=dataset):
+        metadata_manager.find_dataset_info("sample/dataset")
+
+    assert empty_catalog.get("SAMPLE/dataset")["license"] == "mit"
+    assert empty_catalog.get_last_modified("sample/dataset") == "2024-02-01T00:00:00"
+
+def test_find_dataset_info_enriches_imported_catalog_rows(metadata_manager, empty_catalog):
+    """Test that datasets only imported into the catalog are looked up on the Hub and enriched."""
+    metadata_manager.metadata = {}
+    empty_catalog.upsert("sample/dataset", {"name": "sample/dataset", "modality": "text"})
+    dataset = type("Dataset", (object,), {"id": "sample/dataset", "tags": ["license:mit"], "last_modified": None})()
+    with patch("main.metadata_manager.fetch_dataset_info", return_value=dataset) as mock_fetch, \
+         patch("main.metadata_manager.enrich_dataset_metadata", return_value={"version": "1.0.0"}):
+        dataset_info, success = metadata_manager.find_dataset_info("sample/dataset")
+
+    assert success is True
+    mock_fetch.assert_called_once()
+    assert dataset_info["version"] == "1.0.0"
+    enriched = empty_catalog.get_enriched("sample/dataset")
+    assert enriched["modality"] == "text" and enriched["license"] == "mit" and enriched["version"] == "1.0.0"
+
+def test_find_dataset_info_replaces_rows_of_older_commits(metadata_manager, empty_catalog):
+    """Test that a lookup that finds a new commit of a dataset replaces the attributes merged in for the older one."""
+    metadata_manager.metadata = {}
+    empty_catalog.upsert("sample/dataset", {"name": "sample/dataset", "task": "summarization"}, enriched=True, sha="old")
+    empty_catalog.upsert("sample/dataset", {"modality": "text"})
+    dataset = type("Dataset", (object,), {"id": "sample/dataset", "tags": ["license:mit"], "last_modified": None, "sha": "new"})()
+    with patch.object(empty_catalog, "get_enriched", return_value=None), \
+         patch("main.metadata_manager.fetch_dataset_info", return_value=dataset):
+        metadata_manager.find_dataset_info("sample/dataset")
+
+    row = empty_catalog.get("sample/dataset")
+    assert row["license"] == "mit"
+    assert "task" not in row and "modality" not in row
+
+def test_find_dataset_info_falls_back_to_catalog(metadata_manager, empty_catalog):
+    """Test that the catalog is used when the Hub cannot be reached, and the error is returned otherwise."""
+    metadata_manager.metadata = {}
+    empty_catalog.upsert("sample/dataset", {"name": "sample/dataset", "modality": "text"})
+    with patch("main.metadata_manager.fetch_dataset_info", side_effect=ConnectionError("Hub unreachable")):
+        assert metadata_manager.find_dataset_info("sample/dataset") == ({"name": "sample/dataset", "modality": "text"}, True)
+        assert metadata_manager.find_dataset_info("missing/dataset") == ({"error": "Hub unreachable"}, False)
+
+def test_state_round_trip(metadata_manager):
+    """Test that the metadata Dictionaries can be saved and restored."""
+    state = metadata_manager.to_state()
+    restored = MetadataManager()
+    restored.load_state(state)
+    assert restored.metadata == metadata_manager.metadata
+    assert restored.final_metadata == metadata_manager.final_metadata
+    assert restored.confirmed_metadata == metadata_manager.confirmed_metadata
+    assert restored.temporary_metadata == metadata_manager.temporary_metadata
+    assert restored.metadata is not metadata_manager.metadata
+
+def test_pending_description_check_is_shown_in_chat(metadata_manager):
+    """Test that an issue found by a description check that missed the deadline is shown with the next message."""
+    description = "The first sentence of a new description. The second one is different! Is the third a question?"
+    future = Future()
+    with patch("main.metadata_manager.AttributeQualityChecker") as mock_checker:
+        mock_checker.return_value.check_quality_of_all_attributes.return_value = {}
+        mock_checker.return_value.pending_description_check = future
+        is_valid, _, _ = metadata_manager.validate_and_check_quality("description", description)
+    assert is_valid
+    assert metadata_manager.pending_description_check == (description, future)
+
+    chatbot = CroissantChatbotManager()
+    chatbot.metadata_manager = metadata_manager
+    metadata_manager.set_metadata_value("description", description)
+    history_length = len(chatbot.history)
+    # the check is still running
+    assert chatbot.collect_description_check_result() is False
+    future.set_result((False, "The description lacks sentence variety."))
+    assert chatbot.collect_description_check_result() is True
+    assert len(chatbot.history) == history_length + 1
+    assert "The description lacks sentence variety." in chatbot.history[-1]["content"]
+    assert metadata_manager.pending_description_check is None
+
+def test_pending_description_check_of_changed_description(metadata_manager):
+    """Test that the result of a check of a description that was changed since is not shown."""
+    future = Future()
+    future.set_result((False, "The description lacks sentence variety."))
+    metadata_manager.pending_description_check = ("An old description.", future)
+    metadata_manager.set_metadata_value("description", "A new description.")
+    chatbot = CroissantChatbotManager()
+    chatbot.metadata_manager = metadata_manager
+    history_length = len(chatbot.history)
+    assert chatbot.collect_description_check_result() is False
+    assert len(chatbot.history) == history_length
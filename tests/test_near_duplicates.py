@@ -0,0 +1,44 @@
+# test_near_duplicates.py
+
+# necessary imports
+import numpy as np
+from main.near_duplicates import shingle, minhash_signature, band_buckets, estimate_similarity
+
+"""
+Test cases for the MinHash signatures and LSH buckets.
+"""
+
+DESCRIPTION = ("The Stack contains over 6TB of permissively-licensed source code files covering 358 programming "
+               "languages. The dataset was created as part of the BigCode Project, an open scientific collaboration "
+               "working on the responsible development of Large Language Models for Code.")
+
+def test_shingle():
+    """Test that shingles are runs of words, ignoring case and punctuation."""
+    assert shingle("A b, c. A B c", size=3) == ["a b c", "b c a", "c a b"]
+    assert shingle("Two words", size=3) == ["two words"]
+    assert shingle("...", size=3) == []
+
+def test_minhash_signature():
+    """Test that signatures are the same in every process and short texts get none."""
+    signature = minhash_signature(DESCRIPTION)
+    assert signature.dtype == np.uint32 and len(signature) == 128
+    assert np.array_equal(signature, minhash_signature(DESCRIPTION.upper()))
+    assert minhash_signature("A dataset of images.") is None
+
+def test_estimate_similarity():
+    """Test that near-identical texts are similar and different texts are not."""
+    signature = minhash_signature(DESCRIPTION)
+    variant = minhash_signature(DESCRIPTION.replace("BigCode Project", "BigCode project, deduplicated"))
+    other = minhash_signature("Chest X-ray images of patients with pneumonia, labelled by two radiologists and checked by a third.")
+    assert estimate_similarity(signature, signature) == 1.0
+    assert estimate_similarity(signature, variant) > 0.7
+    assert estimate_similarity(signature, other) < 0.2
+
+def test_band_buckets():
+    """Test that near-identical texts share buckets and the same band in another position does not."""
+    signature = minhash_signature(DESCRIPTION)
+    variant = minhash_signature(DESCRIPTION.replace("BigCode Project", "BigCode project, deduplicated"))
+    buckets = band_buckets(signature)
+    assert len(buckets) == 32 and all(-2**63 <= bucket < 2**63 for bucket in buckets)
+    assert set(buckets) & set(band_buckets(variant))
+    assert len(set(band_buckets(np.zeros(128, dtype=np.uint32)))) == 32
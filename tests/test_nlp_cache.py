@@ -0,0 +1,125 @@
+# test_nlp_cache.py
+
+# necessary imports
+from unittest.mock import MagicMock
+import pytest
+import spacy
+from main.nlp_cache import DocFeatureCache, extract_doc_features, estimate_features_size
+
+"""
+Test cases for the DocFeatureCache class.
+"""
+
+@pytest.fixture
+def nlp():
+    """Fixture to create a small spaCy pipeline that does not need a downloaded model."""
+    pipeline = spacy.blank("en")
+    pipeline.add_pipe("sentencizer")
+    return pipeline
+
+@pytest.fixture
+def cache():
+    """Fixture to create a DocFeatureCache instance."""
+    return DocFeatureCache(max_entries=3, max_bytes=1024 * 1024)
+
+def test_extract_doc_features(nlp):
+    """Test the extract_doc_features function."""
+    features = extract_doc_features(nlp("This is the first sentence. This is the second one!"))
+    assert len(features["sentence_structures"]) == 2
+    assert features["alpha_word_count"] == 10
+    assert features["entity_count"] == 0
+    assert features["vector"] is None
+    assert features["vector_norm"] == 0.0
+
+def test_estimate_features_size(nlp):
+    """Test the estimate_features_size function."""
+    short_features = extract_doc_features(nlp("One sentence."))
+    long_features = extract_doc_features(nlp("One sentence. " * 50))
+    assert estimate_features_size(short_features) > 0
+    assert estimate_features_size(long_features) > estimate_features_size(short_features)
+
+def test_make_key(cache, nlp):
+    """Test the make_key method."""
+    model_name, text_hash = cache.make_key(nlp, "Some text.")
+    assert model_name == "en_pipeline"
+    assert len(text_hash) == 64
+    assert cache.make_key(nlp, "Some text.") == (model_name, text_hash)
+    assert cache.make_key(nlp, "Other text.") != (model_name, text_hash)
+
+def test_get_features_parses_each_text_once(cache, nlp):
+    """Test that get_features only runs the pipeline on a cache miss."""
+    counting_nlp = MagicMock(wraps=nlp)
+    counting_nlp.meta = nlp.meta
+
+    first = cache.get_features(counting_nlp, "A short text. Another sentence.")
+    second = cache.get_features(counting_nlp, "A short text. Another sentence.")
+
+    assert first is second
+    assert counting_nlp.call_count == 1
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+def test_eviction_by_entries(cache, nlp):
+    """Test that the least recently used entry is evicted when there are too many entries."""
+    for text in ["First text.", "Second text.", "Third text."]:
+        cache.get_features(nlp, text)
+    # Use the first text so that the second becomes the least recently used
+    cache.get_features(nlp, "First text.")
+    cache.get_features(nlp, "Fourth text.")
+
+    stats = cache.get_stats()
+    assert stats["entries"] == 3
+    assert stats["evictions"] == 1
+    assert cache.get(cache.make_key(nlp, "Second text.")) is None
+    assert cache.get(cache.make_key(nlp, "First text.")) is not None
+
+def test_eviction_by_bytes(nlp):
+    """Test that entries are evicted when the memory cap is exceeded."""
+    features = extract_doc_features(nlp("A sentence."))
+    size = estimate_features_size(features)
+    cache = DocFeatureCache(max_entries=100, max_bytes=size * 2)
+    for text in ["A sentence.", "B sentence.", "C sentence."]:
+        cache.get_features(nlp, text)
+
+    stats = cache.get_stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] <= stats["max_bytes"]
+    assert stats["evictions"] == 1
+
+def test_entry_larger_than_cache_is_not_stored(nlp):
+    """Test that an entry larger than the whole cache is not stored."""
+    cache = DocFeatureCache(max_entries=10, max_bytes=10)
+    features = cache.get_features(nlp, "A sentence.")
+    assert features["sentence_structures"]
+    assert cache.get_stats()["entries"] == 0
+
+def test_clear(cache, nlp):
+    """Test the clear method."""
+    cache.get_features(nlp, "A sentence.")
+    cache.clear()
+    stats = cache.get_stats()
+    assert stats["entries"] == 0
+    assert stats["bytes"] == 0
+    assert stats["hits"] == 0
+    assert stats["misses"] == 0
+    assert stats["evictions"] == 0
+
+def test_get_features_batch(cache, nlp):
+    """Test that get_features_batch parses each uncached text once and keeps the order of the texts."""
+    counting_nlp = MagicMock(wraps=nlp)
+    counting_nlp.meta = nlp.meta
+    counting_nlp.pipe.side_effect = nlp.pipe
+
+    cache.get_features(nlp, "Cached text.")
+    texts = ["New text. Two sentences.", "Cached text.", "New text. Two sentences."]
+    results = cache.get_features_batch(counting_nlp, texts, batch_size=2)
+
+    assert len(results) == 3
+    assert results[0] is results[2]
+    assert len(results[0]["sentence_structures"]) == 2
+    assert len(results[1]["sentence_structures"]) == 1
+    counting_nlp.pipe.assert_called_once()
+    assert list(counting_nlp.pipe.call_args.args[0]) == ["New text. Two sentences."]
+    counting_nlp.assert_not_called()
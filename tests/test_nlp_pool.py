@@ -0,0 +1,81 @@
+# test_nlp_pool.py
+
+# necessary imports
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import patch, MagicMock
+import pytest
+import spacy
+from main import nlp_pool
+from main.nlp_pool import NLPWorkerPool, get_nlp_pool
+from main.nlp_cache import DocFeatureCache, extract_doc_features
+
+"""
+Test cases for the NLPWorkerPool class.
+"""
+
+@pytest.fixture
+def nlp():
+    """Fixture to create a small spaCy pipeline that does not need a downloaded model."""
+    pipeline = spacy.blank("en")
+    pipeline.add_pipe("sentencizer")
+    return pipeline
+
+@pytest.fixture
+def worker_pool():
+    """Fixture to create an NLPWorkerPool with one worker, shut down after the test."""
+    pool = NLPWorkerPool(pool_size=1, timeout=120)
+    yield pool
+    pool.shutdown()
+
+def test_extract_features_in_worker(worker_pool, nlp):
+    """Test that a worker process returns the same structure of features as in-process extraction."""
+    text = "The first sentence is short. The second sentence is a little longer than the first."
+    features = worker_pool.extract_features(text, nlp)
+    expected = extract_doc_features(nlp(text))
+    assert len(features["sentence_structures"]) == len(expected["sentence_structures"])
+    assert features["alpha_word_count"] == expected["alpha_word_count"]
+    assert worker_pool.fallback_count == 0
+
+def test_extract_features_fallback(nlp):
+    """Test that the pool falls back to in-process extraction when it is broken."""
+    pool = NLPWorkerPool(pool_size=1)
+    broken_executor = MagicMock()
+    broken_executor.submit.side_effect = BrokenProcessPool("Mocked broken pool")
+    with patch.object(pool, "start", return_value=broken_executor):
+        features = pool.extract_features("A sentence. Another sentence.", nlp)
+    assert len(features["sentence_structures"]) == 2
+    assert pool.fallback_count == 1
+
+def test_extract_features_without_fallback(nlp):
+    """Test that errors are raised when the fallback is disabled."""
+    pool = NLPWorkerPool(pool_size=1, fallback_to_in_process=False)
+    broken_executor = MagicMock()
+    broken_executor.submit.side_effect = BrokenProcessPool("Mocked broken pool")
+    with patch.object(pool, "start", return_value=broken_executor):
+        with pytest.raises(BrokenProcessPool):
+            pool.extract_features("A sentence.", nlp)
+
+def test_cache_uses_pool(nlp):
+    """Test that the feature cache only sends cache misses to the pool."""
+    cache = DocFeatureCache()
+    pool = MagicMock()
+    pool.extract_features.side_effect = lambda text, fallback_nlp: extract_doc_features(fallback_nlp(text))
+    cache.get_features(nlp, "A sentence.", pool=pool)
+    cache.get_features(nlp, "A sentence.", pool=pool)
+    pool.extract_features.assert_called_once_with("A sentence.", nlp)
+
+def test_get_nlp_pool(monkeypatch):
+    """Test the get_nlp_pool function."""
+    monkeypatch.setattr(nlp_pool, "_nlp_pool", None)
+
+    # disabled by default
+    monkeypatch.delenv("NLP_POOL_SIZE", raising=False)
+    assert get_nlp_pool() is None
+
+    # configured with environment variables
+    monkeypatch.setenv("NLP_POOL_SIZE", "4")
+    monkeypatch.setenv("NLP_POOL_FALLBACK", "0")
+    pool = get_nlp_pool()
+    assert pool.pool_size == 4
+    assert pool.fallback_to_in_process is False
+    assert get_nlp_pool() is pool
@@ -0,0 +1,102 @@
+# test_serialization.py
+
+# necessary imports
+import datetime
+import glob
+import json
+import os
+import pytest
+from unittest.mock import patch
+from main import serialization
+from main.serialization import dumps, dumps_bytes, loads, serialize_default
+
+ANNOTATIONS_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "annotations")
+ANNOTATION_FILES = sorted(glob.glob(os.path.join(ANNOTATIONS_FOLDER, "*.json")))
+
+SAMPLE_METADATA = {
+    "name": "Café reviews",
+    "creators": ["Zoë", "李"],
+    "dateCreated": datetime.datetime(2023, 1, 2, 3, 4, 5),
+    "datePublished": datetime.date(2023, 2, 1),
+    "keywords": [],
+    "version": 1,
+    "details": {},
+    "empty": None,
+    "valid": True,
+}
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request):
+    """Run a test with orjson and with the standard library fallback."""
+    if request.param == "orjson":
+        if serialization.orjson is None:
+            pytest.skip("orjson is not installed")
+        yield
+    else:
+        with patch("main.serialization.orjson", None):
+            yield
+
+
+def test_serialize_default():
+    """Test that dates are serialized as YYYY-MM-DD and other objects are rejected."""
+    assert serialize_default(datetime.datetime(2023, 1, 2, 3, 4, 5)) == "2023-01-02"
+    assert serialize_default(datetime.date(2023, 1, 2)) == "2023-01-02"
+    with pytest.raises(TypeError):
+        serialize_default(object())
+
+
+def test_dumps_matches_indented_json(backend):
+    """Test that indented output matches json.dumps(indent=2) with dates as YYYY-MM-DD and UTF-8 text."""
+    expected = json.dumps(SAMPLE_METADATA, indent=2, ensure_ascii=False, default=serialize_default)
+    assert dumps(SAMPLE_METADATA, indent=True) == expected
+    assert dumps_bytes(SAMPLE_METADATA, indent=True) == expected.encode("utf-8")
+
+
+def test_dumps_ensure_ascii(backend):
+    """Test that non-ASCII characters are written as \\u escapes, as json.dumps does by default for the saved files."""
+    metadata = {**SAMPLE_METADATA, "description": "Emoji \U0001F950, a line separator \u2028 and DEL \x7f."}
+    expected = json.dumps(metadata, indent=2, default=serialize_default)
+    assert dumps(metadata, indent=True, ensure_ascii=True) == expected
+    assert dumps_bytes(metadata, indent=True, ensure_ascii=True) == expected.encode("ascii")
+    assert json.loads(dumps(metadata, ensure_ascii=True)) == json.loads(expected)
+
+
+def test_dumps_compact_and_sorted(backend):
+    """Test the compact and sorted output."""
+    assert dumps({"b": 1, "a": [1, 2]}) == '{"b":1,"a":[1,2]}'
+    assert dumps({"b": 1, "a": [1, 2]}, sort_keys=True) == '{"a":[1,2],"b":1}'
+
+
+def test_dumps_custom_default(backend):
+    """Test that a custom default function is used instead of serialize_default."""
+    assert dumps({"date": datetime.datetime(2023, 1, 2)}, default=lambda obj: "custom") == '{"date":"custom"}'
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
+
+
+def test_dumps_falls_back_for_large_integers():
+    """Test that integers orjson does not support are serialized by the json module."""
+    assert dumps({"value": 2 ** 70}) == f'{{"value":{2 ** 70}}}'
+
+
+def test_loads(backend):
+    """Test that bytes and strings are parsed."""
+    assert loads(b'{"name": "Caf\\u00e9"}') == {"name": "Café"}
+    assert loads('["a", 1]') == ["a", 1]
+
+
+@pytest.mark.parametrize("annotation_file", ANNOTATION_FILES, ids=os.path.basename)
+def test_annotations_round_trip(annotation_file):
+    """Test that orjson and the fallback give the same text for every annotation, matching json.dumps(indent=2)."""
+    with open(annotation_file, "r", encoding="utf-8") as file:
+        metadata = json.load(file)
+    expected = json.dumps(metadata, indent=2, ensure_ascii=False)
+    assert dumps(metadata, indent=True) == expected
+    with patch("main.serialization.orjson", None):
+        assert dumps(metadata, indent=True) == expected
+    # the files saved to disk keep the \\u escapes of json.dumps(indent=2)
+    expected_saved = json.dumps(metadata, indent=2)
+    assert dumps(metadata, indent=True, ensure_ascii=True) == expected_saved
+    with patch("main.serialization.orjson", None):
+        assert dumps(metadata, indent=True, ensure_ascii=True) == expected_saved
@@ -0,0 +1,30 @@
+# test_server.py
+
+# necessary imports
+import json
+from main.server import worker_for_session, extract_session_hash, choose_worker, WORKER_COOKIE
+
+"""
+Test cases for the routing of the multi-worker server.
+"""
+
+def test_worker_for_session_is_stable():
+    """Test that a session is always sent to the same worker."""
+    assert worker_for_session("abc123", 4) == worker_for_session("abc123", 4)
+    assert {worker_for_session(f"session{i}", 4) for i in range(100)} == {0, 1, 2, 3}
+
+def test_extract_session_hash():
+    """Test that the session hash is found in the query, the heartbeat path and the queue join body."""
+    assert extract_session_hash("/gradio_api/queue/data", {"session_hash": "abc"}, b"") == "abc"
+    assert extract_session_hash("/gradio_api/heartbeat/abc", {}, b"") == "abc"
+    body = json.dumps({"data": [], "fn_index": 0, "session_hash": "abc"}).encode()
+    assert extract_session_hash("/gradio_api/queue/join", {}, body) == "abc"
+    assert extract_session_hash("/gradio_api/queue/join", {}, b"not json") is None
+    assert extract_session_hash("/config", {}, b"") is None
+
+def test_choose_worker():
+    """Test that the cookie takes precedence over the session hash, and other requests use the next worker."""
+    assert choose_worker({WORKER_COOKIE: "1"}, "abc", 2, 0) == 1
+    assert choose_worker({}, "abc", 2, 0) == worker_for_session("abc", 2)
+    assert choose_worker({WORKER_COOKIE: "7"}, None, 2, 0) == 0  # A cookie from a larger deployment is ignored
+    assert choose_worker({}, None, 2, 1) == 1
@@ -0,0 +1,78 @@
+# test_session_persistence.py
+
+# necessary imports
+import datetime
+import time
+import pytest
+from main.session_persistence import SessionPersistence, encode_snapshot, decode_snapshot
+
+"""
+Test cases for the SessionPersistence class.
+"""
+
+@pytest.fixture
+def persistence(tmp_path):
+    """Fixture to create a session persistence without a background thread."""
+    persistence = SessionPersistence(str(tmp_path / "sessions.sqlite3"), background=False)
+    yield persistence
+    persistence.close()
+
+def test_snapshot_round_trip():
+    """Test that snapshots are compressed and dates are saved as YYYY-MM-DD."""
+    state = {"history": [{"role": "user", "content": "hello " * 100}], "date": datetime.datetime(2024, 2, 1, 12, 30)}
+    snapshot = encode_snapshot(state)
+    assert isinstance(snapshot, bytes)
+    assert len(snapshot) < 200
+    assert decode_snapshot(snapshot) == {"history": state["history"], "date": "2024-02-01"}
+
+def test_save_is_written_behind(persistence, tmp_path):
+    """Test that saves are visible immediately but only written to the database by a flush."""
+    persistence.save("session", {"value": 1})
+    assert persistence.load("session") == {"value": 1}
+
+    # another worker only sees the session after the flush
+    other_worker = SessionPersistence(str(tmp_path / "sessions.sqlite3"), background=False)
+    assert other_worker.load("session") is None
+    assert persistence.flush() == 1
+    assert other_worker.load("session") == {"value": 1}
+    other_worker.close()
+
+def test_only_latest_and_changed_snapshots_are_written(persistence):
+    """Test that saves are batched and unchanged snapshots are skipped."""
+    persistence.save("session", {"value": 1})
+    persistence.save("session", {"value": 2})
+    assert persistence.flush() == 1
+    assert persistence.load("session") == {"value": 2}
+
+    persistence.save("session", {"value": 2})
+    assert persistence.flush() == 0
+    assert persistence.get_stats() == {"saved_sessions": 1, "pending": 0, "writes": 1, "skipped_writes": 1}
+
+def test_delete(persistence):
+    """Test that deleted sessions are forgotten."""
+    persistence.save("session", {"value": 1})
+    persistence.flush()
+    persistence.delete("session")
+    assert persistence.load("session") is None
+
+def test_compact(persistence):
+    """Test that sessions older than the retention period are removed."""
+    persistence.save("old", {"value": 1})
+    persistence.flush()
+    time.sleep(0.2)
+    persistence.save("new", {"value": 2})
+    persistence.flush()
+    persistence.retention = 0.1
+    assert persistence.compact() == 1
+    assert persistence.load("old") is None
+    assert persistence.load("new") == {"value": 2}
+
+def test_background_flush(tmp_path):
+    """Test that the background thread writes the queued snapshots."""
+    persistence = SessionPersistence(str(tmp_path / "sessions.sqlite3"), flush_interval=0.01)
+    persistence.save("session", {"value": 1})
+    deadline = time.monotonic() + 5
+    while persistence.get_stats()["saved_sessions"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert persistence.get_stats()["saved_sessions"] == 1
+    persistence.close()
@@ -0,0 +1,84 @@
+# test_session_store.py
+
+# necessary imports
+import pytest
+from main.session_store import SessionStore
+from main.session_persistence import SessionPersistence
+
+"""
+Test cases for the SessionStore class.
+"""
+
+class FakeClock:
+    """A clock that only moves when the test advances it."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    """Fixture to provide a fake clock."""
+    return FakeClock()
+
+@pytest.fixture
+def session_store(clock):
+    """Fixture to create a session store of dictionaries."""
+    return SessionStore(dict, max_sessions=2, idle_timeout=10, clock=clock)
+
+def test_sessions_are_separate(session_store):
+    """Test that every session gets its own object and keeps it."""
+    first = session_store.get("first")
+    first["value"] = 1
+    assert session_store.get("first") is first
+    assert session_store.get("second") == {}
+    assert session_store.get_stats() == {"live_sessions": 2, "created": 2, "restored": 0, "evicted_idle": 0, "evicted_full": 0}
+
+def test_new_session_id():
+    """Test that session IDs are unique."""
+    assert SessionStore.new_session_id() != SessionStore.new_session_id()
+
+def test_idle_sessions_are_evicted(session_store, clock):
+    """Test that sessions are evicted after the idle timeout."""
+    first = session_store.get("first")
+    clock.now = 5
+    session_store.get("second")
+    clock.now = 12
+    assert session_store.get_stats()["live_sessions"] == 1
+
+    # an evicted session starts again with a new object
+    assert session_store.get("first") is not first
+    assert session_store.get_stats()["evicted_idle"] == 1
+
+def test_least_recently_used_session_is_evicted(session_store):
+    """Test that the least recently used session is evicted when the store is full."""
+    first = session_store.get("first")
+    second = session_store.get("second")
+    session_store.get("first")
+    session_store.get("third")
+    assert session_store.get("first") is first
+    assert session_store.get("second") is not second
+    assert session_store.get_stats()["evicted_full"] == 2
+
+def test_remove(session_store):
+    """Test that removed sessions are forgotten."""
+    session_store.get("first")
+    session_store.remove("first")
+    session_store.remove("missing")
+    assert session_store.get_stats()["live_sessions"] == 0
+
+def test_sessions_are_restored(tmp_path, clock):
+    """Test that a session evicted from memory, or created by another worker, is restored from its saved state."""
+    persistence = SessionPersistence(str(tmp_path / "sessions.sqlite3"), background=False)
+    session_store = SessionStore(dict, max_sessions=2, idle_timeout=10, clock=clock,
+                                 persistence=persistence, to_state=dict, from_state=dict)
+    session_store.get("first")["value"] = 1
+    session_store.save("first")
+    persistence.flush()
+
+    other_worker = SessionStore(dict, persistence=persistence, to_state=dict, from_state=dict)
+    assert other_worker.get("first") == {"value": 1}
+    assert other_worker.get_stats()["restored"] == 1
+    persistence.close()
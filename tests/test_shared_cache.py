@@ -0,0 +1,48 @@
+# test_shared_cache.py
+
+# necessary imports
+import pytest
+from main import shared_cache as shared_cache_module
+from main.shared_cache import SharedCache, get_shared_cache
+
+"""
+Test cases for the SharedCache class.
+"""
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Fixture to provide the path of a shared cache database."""
+    return str(tmp_path / "shared_cache.sqlite3")
+
+def test_values_are_shared_between_connections(db_path):
+    """Test that a value set by one process is found by another."""
+    writer = SharedCache(db_path)
+    reader = SharedCache(db_path)
+    writer.set("llm", "key", {"answer": "value"}, ttl=60)
+    assert reader.get("llm", "key") == (True, {"answer": "value"})
+    assert reader.get("llm", "missing") == (False, None)
+    assert reader.get("hub_not_found", "key") == (False, None)
+    writer.close()
+    reader.close()
+
+def test_expired_values(db_path):
+    """Test that expired values are not returned and are pruned."""
+    cache = SharedCache(db_path)
+    cache.set("llm", "old", "value", ttl=-1)
+    cache.set("llm", "new", "value", ttl=60)
+    assert cache.get("llm", "old") == (False, None)
+    assert cache.prune() == 1
+    assert cache.get("llm", "new") == (True, "value")
+    cache.close()
+
+def test_get_shared_cache(db_path, monkeypatch):
+    """Test that the shared cache is only enabled by the SHARED_CACHE_PATH environment variable."""
+    monkeypatch.setattr(shared_cache_module, "_shared_cache", None)
+    monkeypatch.delenv("SHARED_CACHE_PATH", raising=False)
+    assert get_shared_cache() is None
+
+    monkeypatch.setenv("SHARED_CACHE_PATH", db_path)
+    cache = get_shared_cache()
+    assert cache.db_path == db_path
+    assert get_shared_cache() is cache
+    cache.close()
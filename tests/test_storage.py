@@ -0,0 +1,103 @@
+# test_storage.py
+
+# necessary imports
+import os
+import threading
+import pytest
+from multiprocessing import get_context
+from unittest.mock import patch
+from main.storage import AnnotationStore, atomic_write
+
+"""
+Test cases for the atomic writes and the AnnotationStore class.
+"""
+
+@pytest.fixture
+def store(tmp_path):
+    """Fixture to create an AnnotationStore in a temporary folder."""
+    return AnnotationStore(str(tmp_path / "annotations"), lock_directory=str(tmp_path / "locks"))
+
+def save_in_process(directory, lock_directory, filename, index):
+    """Save a file from another process."""
+    store = AnnotationStore(directory, lock_directory=lock_directory)
+    for repeat in range(20):
+        store.save(filename, f'{{"writer": {index}, "repeat": {repeat}, "padding": "{"x" * 1000 * index}"}}'.encode("utf-8"))
+
+def test_atomic_write(tmp_path):
+    """Test that a file is replaced and no temporary file is left behind."""
+    filepath = str(tmp_path / "metadata.json")
+    atomic_write(filepath, b"old")
+    atomic_write(filepath, b"new")
+    with open(filepath, "rb") as file:
+        assert file.read() == b"new"
+    assert os.listdir(tmp_path) == ["metadata.json"]
+
+def test_atomic_write_keeps_old_content_on_error(tmp_path):
+    """Test that a failed write leaves the old file and no temporary file."""
+    filepath = str(tmp_path / "metadata.json")
+    atomic_write(filepath, b"old")
+    with patch("main.storage.os.replace", side_effect=OSError("failed")), pytest.raises(OSError):
+        atomic_write(filepath, b"new")
+    with open(filepath, "rb") as file:
+        assert file.read() == b"old"
+    assert os.listdir(tmp_path) == ["metadata.json"]
+
+def test_save_writes_file(store):
+    """Test that a new file is written."""
+    filepath, written = store.save("metadata.json", b'{"name": "Sample"}')
+    assert written is True
+    assert filepath == os.path.join(store.directory, "metadata.json")
+    with open(filepath, "rb") as file:
+        assert file.read() == b'{"name": "Sample"}'
+
+def test_save_skips_unchanged_content(store):
+    """Test that unchanged content is not written again, while changed content is."""
+    store.save("metadata.json", b'{"name": "Sample"}')
+    with patch("main.storage.atomic_write") as mock_write:
+        assert store.save("metadata.json", b'{"name": "Sample"}')[1] is False
+        mock_write.assert_not_called()
+    assert store.save("metadata.json", b'{"name": "Other!"}')[1] is True
+    assert store.get_stats() == {"writes": 2, "skipped": 1}
+
+def test_save_compares_files_written_by_others(store, tmp_path):
+    """Test that a file with the same content written by another process is not written again."""
+    other_store = AnnotationStore(store.directory, lock_directory=store.lock_directory)
+    other_store.save("metadata.json", b'{"name": "Sample"}')
+    assert store.save("metadata.json", b'{"name": "Sample"}')[1] is False
+    other_store.save("metadata.json", b'{"name": "Sampl2"}')
+    assert store.save("metadata.json", b'{"name": "Sample"}')[1] is True
+
+def test_save_without_deduplication(tmp_path):
+    """Test that every save writes the file when deduplication is off."""
+    store = AnnotationStore(str(tmp_path / "annotations"), lock_directory=str(tmp_path / "locks"), deduplicate=False)
+    store.save("metadata.json", b"{}")
+    assert store.save("metadata.json", b"{}")[1] is True
+
+def test_concurrent_saves_from_threads(store):
+    """Test that threads saving the same file leave one complete version of it."""
+    contents = [f'{{"writer": {index}, "padding": "{"x" * 10000 * index}"}}'.encode("utf-8") for index in range(8)]
+    threads = [threading.Thread(target=store.save, args=("metadata.json", content)) for content in contents]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with open(os.path.join(store.directory, "metadata.json"), "rb") as file:
+        assert file.read() in contents
+    assert os.listdir(store.directory) == ["metadata.json"]
+
+def test_concurrent_saves_from_processes(store):
+    """Test that worker processes saving the same file leave one complete version of it."""
+    context = get_context("spawn")
+    processes = [
+        context.Process(target=save_in_process, args=(store.directory, store.lock_directory, "metadata.json", index))
+        for index in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+    with open(os.path.join(store.directory, "metadata.json"), "r", encoding="utf-8") as file:
+        content = file.read()
+    assert '"repeat": 19' in content and content.endswith('"}')
+    assert os.listdir(store.directory) == ["metadata.json"]